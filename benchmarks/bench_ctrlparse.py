@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark of parsing the control listings of v4l2-ctl.
+
+Each listing of benchmarks/fixtures (outputs of `v4l2-ctl -l` and `v4l2-ctl -L` of
+real cameras) is converted into the control dicts shown by the sliders.
+
+    - legacy: the former parser, which searches the class titles in the whole
+      output, then each key with re.search and scans the value character by
+      character
+    - table: ctrlinfo.parse_controls, one pass with precompiled patterns, which
+      also reads the menu items (-L) that the legacy parser skips
+
+"ctrls" is the number of controls of the user and camera classes, and "items" the
+number of their menu items.
+
+Usage:
+    python benchmarks/bench_ctrlparse.py [--repeat N]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "usbcamGUI"))
+
+from ctrlinfo import parse_controls
+
+
+fixture_dir = Path(__file__).resolve().parent / "fixtures"
+
+
+def legacy_retreive(target: str) -> dict:
+    value_list = {"min": 0, "max": 0, "step": 0, "value": 0, "default": 0, "flags": "init"}
+    for key in value_list:
+        m = re.search(key, target)
+        if m:
+            start = m.start()
+            end = start
+            while end != len(target):
+                if target[end] == " ":
+                    break
+                end += 1
+            tmp = target[start:end].split("=")
+            try:
+                value_list[key] = int(tmp[1])
+            except:
+                value_list[key] = str(tmp[1])
+        else:
+            value_list[key] = None
+    return value_list
+
+
+def legacy_extract(string: str) -> str:
+    start, end = 0, 0
+    m1 = re.search("User Controls", string)
+    if m1:
+        start = m1.end()
+    m2 = re.search("Codec Controls", string)
+    end = m2.start() if m2 else -1
+    s = string[start:end]
+    m3 = re.search("Camera Controls", string)
+    if not m3:
+        return s
+    start = m3.end()
+    m4 = re.search("JPEG Compression Controls", string)
+    if not m4:
+        return s
+    return s + string[start:m4.start()]
+
+
+def legacy_parse(output: str) -> dict:
+    params = {}
+    for line in legacy_extract(output).strip().split("\n"):
+        tmp = line.split()
+        if len(tmp) > 3:
+            sub_dict = {"hex": tmp[1], "type": tmp[2]}
+            sub_dict.update(legacy_retreive(line))
+            params[tmp[0]] = sub_dict
+    return params
+
+
+def table_parse(output: str) -> dict:
+    listing = parse_controls(output)
+    return listing.get_params(listing.get_vidcap_names())
+
+
+def run(func, output: str, repeat: int) -> float:
+    """Measures a parser.
+
+    Returns:
+        float: Average time in usec of one parse.
+    """
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        func(output)
+    return (time.perf_counter() - t0) * 1e6 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="The number of parses for each listing.")
+    args = parser.parse_args()
+
+    print("{:<20} {:>6} {:>6} {:>6} {:>12} {:>12} {:>8}".format(
+        "listing", "lines", "ctrls", "items", "legacy", "table", "speedup"))
+    for path in sorted(fixture_dir.glob("*.txt")):
+        output = path.read_text()
+        params = table_parse(output)
+        items = sum(len(param["menu"]) for param in params.values() if param["menu"])
+        legacy = run(legacy_parse, output, args.repeat)
+        table = run(table_parse, output, args.repeat)
+        print("{:<20} {:>6} {:>6} {:>6} {:>10.1f}us {:>10.1f}us {:>7.1f}x".format(
+            path.stem, len(output.splitlines()), len(params), items, legacy, table, legacy / table))
+
+
+if __name__ == "__main__":
+    main()
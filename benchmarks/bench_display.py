@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark of the display paths of a captured BGR frame.
+
+Each path converts a BGR frame (as read by cv2.VideoCapture) into the pixel format
+displayed by the window, wraps it into a QImage, updates the QPixmap and paints it
+like QGraphicsView does.
+
+    - rgb888: cvtColor BGR -> RGB, QImage.Format_RGB888 (converted again by Qt)
+    - bgrx: cvtColor BGR -> BGRA, QImage.Format_RGB32
+    - bgr888: no cvtColor, QImage.Format_BGR888 (Qt >= 5.14)
+
+Usage:
+    python benchmarks/bench_display.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "usbcamGUI"))
+
+from PySide2.QtGui import QGuiApplication, QImage, QPainter, QPixmap
+
+from frame import bgr_codes, frame_shape
+import cv2
+
+
+sizes = [(640, 480), (1920, 1080), (3840, 2160)]
+qimage_formats = {
+    "rgb888": "Format_RGB888",
+    "bgrx": "Format_RGB32",
+    "bgr888": "Format_BGR888",
+}
+
+
+def run(width: int, height: int, pixel_format: str, repeat: int) -> list:
+    """Measures the time of each step of a display path.
+
+    Returns:
+        list: Average time in msec of cvtColor, QPixmap update and paint.
+    """
+    src = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+    dst = np.empty(frame_shape(height, width, pixel_format), dtype=np.uint8)
+    qformat = getattr(QImage, qimage_formats[pixel_format])
+    code = bgr_codes[pixel_format]
+    pixmap = QPixmap(width, height)
+    canvas = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    elapsed = [0.0, 0.0, 0.0]
+
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        frame = src if code is None else cv2.cvtColor(src, code, dst=dst)
+        t1 = time.perf_counter()
+        qimage = QImage(frame.data, width, height, frame.strides[0], qformat)
+        pixmap.convertFromImage(qimage)
+        t2 = time.perf_counter()
+        painter = QPainter(canvas)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.end()
+        t3 = time.perf_counter()
+        elapsed[0] += t1 - t0
+        elapsed[1] += t2 - t1
+        elapsed[2] += t3 - t2
+    return [e * 1000 / repeat for e in elapsed]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="The number of frames for each path.")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    formats = [f for f in qimage_formats if hasattr(QImage, qimage_formats[f])]
+    print("{:<10} {:<8} {:>10} {:>10} {:>10} {:>10}".format(
+        "size", "format", "cvtColor", "pixmap", "paint", "total"))
+    for width, height in sizes:
+        for pixel_format in formats:
+            result = run(width, height, pixel_format, args.repeat)
+            print("{:<10} {:<8} {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms".format(
+                "{}x{}".format(width, height), pixel_format, *result, sum(result)))
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""The modules of usbcamGUI import each other by their flat names."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "usbcamGUI"))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Tests of parse_controls on the listings of real cameras in benchmarks/fixtures."""
+from pathlib import Path
+
+import pytest
+
+import v4l2_api as v4l2
+from ctrlinfo import parse_controls
+
+
+fixtures = Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures"
+
+
+def parse_fixture(name: str):
+    return parse_controls((fixtures / name).read_text())
+
+
+@pytest.mark.parametrize("name, count, vidcap", [
+    ("uvc_generic_l.txt", 16, 16),
+    ("uvc_c920_L.txt", 17, 17),
+    ("uvc_noid_l.txt", 12, 12),
+    ("vivid_L.txt", 18, 9),
+    ("bcm2835_L.txt", 29, 22),
+])
+def test_control_count(name, count, vidcap):
+    listing = parse_fixture(name)
+    assert len(listing.infos) == count
+    assert len(listing.get_vidcap_names()) == vidcap
+
+
+def test_types():
+    listing = parse_fixture("vivid_L.txt")
+    types = {name: info.type for name, info in listing.infos.items()}
+    assert types["integer"] == v4l2.V4L2_CTRL_TYPE_INTEGER
+    assert types["boolean"] == v4l2.V4L2_CTRL_TYPE_BOOLEAN
+    assert types["button"] == v4l2.V4L2_CTRL_TYPE_BUTTON
+    assert types["integer_64_bit"] == v4l2.V4L2_CTRL_TYPE_INTEGER64
+    assert types["menu"] == v4l2.V4L2_CTRL_TYPE_MENU
+    assert types["string"] == v4l2.V4L2_CTRL_TYPE_STRING
+    assert types["bitmask"] == v4l2.V4L2_CTRL_TYPE_BITMASK
+    assert types["integer_menu"] == v4l2.V4L2_CTRL_TYPE_INTEGER_MENU
+    # Array types are not known.
+    assert types["u32_1_element_array"] == 0
+
+
+def test_fields():
+    listing = parse_fixture("vivid_L.txt")
+    info = listing.infos["integer_64_bit"]
+    assert (info.id, info.minimum, info.maximum, info.step, info.default) == (
+        0x00f00003, -2**63, 2**63 - 1, 1, 0)
+    info = listing.infos["bitmask"]
+    assert (info.maximum, info.default) == (0x8000ffff, 0x80000800)
+    assert listing.values["bitmask"] == 0x80000800
+    assert listing.values["string"] == ""
+    assert listing.values["button"] is None
+    # The fields of an array are not in the usual order.
+    info = listing.infos["u32_1_element_array"]
+    assert (info.minimum, info.maximum, info.step) == (0, 255, 1)
+    assert listing.values["u32_1_element_array"] is None
+
+
+def test_menu_items():
+    listing = parse_fixture("uvc_c920_L.txt")
+    assert listing.infos["power_line_frequency"].menu == {0: "Disabled", 1: "50 Hz", 2: "60 Hz"}
+    assert listing.infos["auto_exposure"].menu == {1: "Manual Mode", 3: "Aperture Priority Mode"}
+    # The label printed after a menu value is not a part of the value.
+    assert listing.values["auto_exposure"] == 3
+
+    listing = parse_fixture("vivid_L.txt")
+    assert listing.infos["menu"].menu == {1: "Menu Item 1", 3: "Menu Item 3", 4: "Menu Item 4"}
+    assert listing.infos["integer_menu"].menu == {1: 1, 2: 2, 3: 3, 4: 5, 5: 8, 6: 13, 7: 21, 8: 42}
+    assert listing.values["integer_menu"] == 4
+
+    listing = parse_fixture("bcm2835_L.txt")
+    assert listing.infos["auto_exposure_bias"].menu[0] == -4000
+    assert listing.infos["color_effects"].menu[1] == "Black & White"
+
+
+def test_no_menu_items_with_l():
+    listing = parse_fixture("uvc_generic_l.txt")
+    assert listing.infos["power_line_frequency"].menu is None
+    assert listing.get_params(["power_line_frequency"])["power_line_frequency"]["menu"] is None
+
+
+def test_flags():
+    listing = parse_fixture("vivid_L.txt")
+    assert listing.infos["gain"].flags == v4l2.V4L2_CTRL_FLAG_INACTIVE | v4l2.V4L2_CTRL_FLAG_VOLATILE
+    assert listing.infos["button"].flags == \
+        v4l2.V4L2_CTRL_FLAG_WRITE_ONLY | v4l2.V4L2_CTRL_FLAG_EXECUTE_ON_WRITE
+    assert listing.infos["brightness"].flags == v4l2.V4L2_CTRL_FLAG_SLIDER
+    assert listing.infos["audio_mute"].flags == 0
+    params = listing.get_params(["gain", "button"])
+    assert params["gain"]["flags"] == "inactive,volatile"
+    assert params["button"]["flags"] == "write-only,execute-on-write"
+
+
+def test_listing_without_ids():
+    listing = parse_fixture("uvc_noid_l.txt")
+    assert all(info.id == 0 for info in listing.infos.values())
+    assert all(title == "" for title in listing.classes.values())
+    # Without IDs nor class titles, every control is shown.
+    assert listing.get_vidcap_names() == list(listing.infos)
+    info = listing.infos["white_balance_temperature"]
+    assert (info.type, info.minimum, info.maximum, info.step, info.default) == (
+        v4l2.V4L2_CTRL_TYPE_INTEGER, 2800, 6500, 10, 4600)
+    assert info.flags == v4l2.V4L2_CTRL_FLAG_INACTIVE
+
+
+def test_classes():
+    listing = parse_fixture("bcm2835_L.txt")
+    assert listing.classes["brightness"] == "User Controls"
+    assert listing.classes["h264_profile"] == "Codec Controls"
+    assert listing.classes["auto_exposure"] == "Camera Controls"
+    assert "h264_profile" not in listing.get_vidcap_names()
+
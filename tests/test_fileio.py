@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Tests of the JSON files written by FileIO."""
+import json
+
+import pytest
+
+from fileIO import FileIO
+
+
+def test_write_json(tmp_path):
+    path = tmp_path / "sub" / FileIO.hashed_filename(["uvcvideo", "C920", "AB"])
+    assert FileIO.write_json(path, {"a": [1, 2]})
+    assert json.loads(path.read_text()) == {"a": [1, 2]}
+    assert FileIO.write_json(path, {"a": 3}, indent=2)
+    assert json.loads(path.read_text()) == {"a": 3}
+    assert [item.name for item in path.parent.iterdir()] == [path.name]
+
+
+def test_failed_write_keeps_the_file(tmp_path):
+    path = tmp_path / "entry.json"
+    FileIO.write_json(path, {"a": 1})
+    with pytest.raises(TypeError):
+        FileIO.write_json(path, {"a": object()})
+    assert json.loads(path.read_text()) == {"a": 1}
+    assert [item.name for item in tmp_path.iterdir()] == ["entry.json"]
+
+
+def test_unwritable_directory(tmp_path):
+    (tmp_path / "file").write_text("")
+    assert not FileIO.write_json(tmp_path / "file" / "entry.json", {})
+
+
+def test_hashed_filename():
+    assert FileIO.hashed_filename(["a", "b"]) == FileIO.hashed_filename(("a", "b"))
+    assert FileIO.hashed_filename(["a", "b"]) != FileIO.hashed_filename(["ab", ""])
+    assert len(FileIO.hashed_filename(["a"])) == len("0123456789abcdef.json")
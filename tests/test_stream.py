@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Tests of V4L2Stream on the emulated device of stream.FakeDevice."""
+import errno
+import mmap
+
+import pytest
+
+import v4l2_api as v4l2
+from stream import FakeDevice, V4L2Stream
+
+
+class MappedDevice(FakeDevice):
+    """FakeDevice whose buffers are real mappings, which cannot be closed while viewed."""
+
+    def mmap(self, length: int, offset: int):
+        return mmap.mmap(-1, length)
+
+
+class FailingDevice(FakeDevice):
+    """FakeDevice rejecting the next ioctl of a request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = {}
+
+    def ioctl(self, request: int, arg):
+        error = self.failures.pop(request, None)
+        if error is not None:
+            raise OSError(error, "injected failure")
+        return super().ioctl(request, arg)
+
+
+def open_stream(device=None, nbuffers: int = 4) -> V4L2Stream:
+    stream = V4L2Stream(device or FakeDevice(64, 48, "YUYV", 1000), nbuffers)
+    stream.open()
+    stream.start()
+    return stream
+
+
+def test_dequeue_in_queue_order():
+    stream = open_stream()
+    buffers = [stream.dequeue() for _ in range(4)]
+    assert [buffer.index for buffer in buffers] == [0, 1, 2, 3]
+    assert [buffer.sequence for buffer in buffers] == [0, 1, 2, 3]
+    assert all(buffer.data.size == 64 * 48 * 2 for buffer in buffers)
+    assert all((buffer.data == buffer.sequence).all() for buffer in buffers)
+    # Every buffer is held by the caller.
+    assert stream.dequeue(0.01) is None
+
+    stream.queue(buffers[2])
+    stream.queue(buffers[0])
+    assert [stream.dequeue().index for _ in range(2)] == [2, 0]
+    stream.close()
+
+
+def test_switch_format():
+    stream = open_stream()
+    stream.dequeue()
+    assert stream.switch_format("GREY", 32, 24, 15) == ("GREY", 32, 24, 15.0)
+    assert stream.is_streaming
+    buffer = stream.dequeue()
+    assert buffer.index == 0
+    assert buffer.data.size == 32 * 24
+    stream.close()
+
+
+@pytest.mark.parametrize("request_", [v4l2.VIDIOC_S_FMT, v4l2.VIDIOC_STREAMOFF, v4l2.VIDIOC_REQBUFS])
+def test_switch_format_restarts_on_failure(request_):
+    device = FailingDevice(64, 48, "YUYV", 1000)
+    stream = open_stream(device)
+    device.failures[request_] = errno.EBUSY
+    with pytest.raises(OSError):
+        stream.switch_format("GREY", 32, 24, 15)
+    assert stream.is_streaming
+    assert stream.dequeue() is not None
+    stream.close()
+
+
+def test_stop_then_start():
+    stream = open_stream()
+    stream.dequeue()
+    stream.stop()
+    assert not stream.is_streaming
+    assert stream.dequeue(0.01) is None
+    # Stopping twice does nothing.
+    stream.stop()
+    stream.start()
+    buffers = [stream.dequeue() for _ in range(4)]
+    assert [buffer.index for buffer in buffers] == [0, 1, 2, 3]
+    stream.close()
+
+
+def test_stop_with_a_held_buffer():
+    device = MappedDevice(64, 48, "YUYV", 1000)
+    stream = open_stream(device)
+    buffer = stream.dequeue()
+    with pytest.raises(OSError) as raised:
+        stream.stop()
+    assert raised.value.errno == errno.EBUSY
+    assert not stream.is_streaming
+    # The driver buffers are not freed while one of them is mapped.
+    assert len(device.buffers) == 4
+
+    del buffer
+    stream.start()
+    assert stream.is_streaming
+    assert stream.dequeue() is not None
+    stream.close()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Tests of the frame number and timestamp drawn by SyntheticCamera."""
+import pytest
+
+from camera import SyntheticCamera
+from frame import JpegFrame, as_array
+
+
+def read_record(camera: SyntheticCamera):
+    with camera.lock:
+        camera.grab_frame()
+        return camera.retrieve_frame()
+
+
+@pytest.mark.parametrize("fourcc", SyntheticCamera.fourcc_list)
+@pytest.mark.parametrize("colorspace, pixel_format, channels", [
+    ("rgb", "rgb888", 3),
+    ("rgb", "bgrx", 4),
+    ("gray", "rgb888", None),
+])
+def test_stamp_round_trip(fourcc, colorspace, pixel_format, channels):
+    camera = SyntheticCamera(0, colorspace, width=640, height=480, fps=1000.0, fourcc=fourcc)
+    camera.pixel_format = pixel_format
+    for number in range(3):
+        record = read_record(camera)
+        frame = as_array(record.frame)
+        assert frame.shape[:2] == (480, 640)
+        assert (frame.shape[2] if frame.ndim == 3 else None) == channels
+        assert record.sequence == number
+        assert SyntheticCamera.decode_stamp(frame) == (number, pytest.approx(record.timestamp, abs=1e-6))
+
+
+def test_stamp_round_trip_in_passthrough():
+    camera = SyntheticCamera(0, width=320, height=240, fps=1000.0, fourcc="MJPG")
+    camera.set_passthrough(True)
+    camera.update_passthrough()
+    record = read_record(camera)
+    assert isinstance(record.frame, JpegFrame)
+    assert SyntheticCamera.decode_stamp(record.frame.decode()) == (0, pytest.approx(record.timestamp, abs=1e-6))
+
+
+def test_stamps_after_switch_format():
+    camera = SyntheticCamera(0, width=640, height=480, fps=1000.0, fourcc="YUYV")
+    read_record(camera)
+    camera.switch_format("GREY", 320, 240, 1000.0)
+    record = read_record(camera)
+    frame = as_array(record.frame)
+    assert frame.shape[:2] == (240, 320)
+    assert SyntheticCamera.decode_stamp(frame)[0] == 1
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pool of preallocated frame buffers.
+
+Frames are written into recycled numpy arrays (through the `dst` argument of
+OpenCV functions) instead of allocating a new array for every frame. A buffer
+is reference counted: the producer owns the first reference, each consumer
+(display, save, recording) which keeps the frame takes another one with
+retain(), and the buffer goes back to the pool when the last reference is
+released.
+"""
+import threading
+
+import numpy as np
+
+
+class FramePool():
+    """Frame buffers keyed by shape and dtype.
+
+    Arrays which are not handed out by the pool can be passed to retain() and
+    release() safely, they are simply ignored.
+
+    Args:
+        maxfree (int, optional): Maximum number of free buffers kept per shape and
+            dtype. Defaults to 8.
+    """
+
+    def __init__(self, maxfree: int = 8):
+        self.maxfree = maxfree
+        self.lock = threading.Lock()
+        self.free = {}
+        self.refs = {}
+        self.allocated = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, shape: tuple, dtype=np.uint8) -> np.ndarray:
+        """Gets a buffer, recycled if one is free.
+
+        Args:
+            shape (tuple): Shape of the buffer. None returns None.
+            dtype (optional): Data type of the buffer. Defaults to np.uint8.
+
+        Returns:
+            numpy.ndarray: The buffer, owned by the caller.
+        """
+        if shape is None:
+            return None
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self.lock:
+            free = self.free.get(key)
+            if free:
+                array = free.pop()
+                self.reused += 1
+            else:
+                array = np.empty(shape, dtype=dtype)
+                self.allocated += 1
+            self.refs[id(array)] = [array, 1]
+        return array
+
+    def track(self, result: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """Takes over the result of a function called with a pool buffer as dst.
+
+        OpenCV allocates a new array when dst doesn't fit the result. The new array
+        is registered in the pool (and counted as allocated), and dst is released.
+
+        Args:
+            result (numpy.ndarray): The returned array.
+            dst (numpy.ndarray): The buffer passed as dst. None is allowed.
+
+        Returns:
+            numpy.ndarray: result
+        """
+        if result is dst:
+            return result
+        self.release(dst)
+        with self.lock:
+            self.refs[id(result)] = [result, 1]
+            self.allocated += 1
+        return result
+
+    def retain(self, array):
+        """Adds a reference to the buffer.
+        """
+        with self.lock:
+            entry = self.refs.get(id(array))
+            if entry is not None and entry[0] is array:
+                entry[1] += 1
+
+    def release(self, array):
+        """Removes a reference. The buffer becomes free when no reference remains.
+        """
+        with self.lock:
+            entry = self.refs.get(id(array))
+            if entry is None or entry[0] is not array:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self.refs[id(array)]
+            key = (array.shape, array.dtype.str)
+            free = self.free.setdefault(key, [])
+            if len(free) < self.maxfree:
+                free.append(array)
+            else:
+                self.discarded += 1
+
+    def get_counters(self) -> dict:
+        """Gets the counters of the pool.
+
+        Returns:
+            dict: The number of buffers allocated, reused, discarded, in use and free.
+        """
+        with self.lock:
+            return {
+                "allocated": self.allocated,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "in use": len(self.refs),
+                "free": sum(len(free) for free in self.free.values()),
+            }
@@ -3,10 +3,51 @@
 """
 """
 import sys
+import time
+import threading
 from abc import ABCMeta, abstractmethod
 import cv2
-from v4l import V4L2
+import numpy as np
 from util import WindowsUtil
+from stream import V4L2Stream, DeviceFile
+from frame import FrameRecord, JpegFrame, MjpegWriter, bgr_codes, gray_codes, yuyv_codes, frame_shape
+from recorder import RecordWriter
+from bufferpool import FramePool
+from capture import DropDetector
+from controls import V4L2Controls
+from controlmodel import ControlState
+from capcache import CapabilityCache
+from capindex import CapabilityIndex
+
+
+class FormatChange():
+    """Result of a format switch by Camera.set_properties.
+
+    Args:
+        requested (tuple): fourcc, width, height and fps requested
+        negotiated (tuple): fourcc, width, height and fps chosen by the driver
+        elapsed (float): Seconds taken by the switch
+    """
+
+    __slots__ = ("requested", "negotiated", "elapsed")
+
+    def __init__(self, requested: tuple, negotiated: tuple, elapsed: float):
+        self.requested = requested
+        self.negotiated = negotiated
+        self.elapsed = elapsed
+
+    @property
+    def matches(self) -> bool:
+        """True if the driver has chosen the requested mode.
+        """
+        fourcc, width, height, fps = self.requested
+        actual_fourcc, actual_width, actual_height, actual_fps = self.negotiated
+        return (fourcc, width, height) == (actual_fourcc, actual_width, actual_height) \
+            and abs(fps - actual_fps) <= 0.01
+
+    @staticmethod
+    def describe(mode: tuple) -> str:
+        return "{} {}x{} {:.2f} fps".format(*mode)
 
 
 #class Camera(metaclass=ABCMeta):
@@ -20,6 +61,21 @@ class Camera():
         self.parent = parent
         self.is_reading = True
         self.is_recording = False
+        self.lock = threading.Lock()
+        self.sec = 1 / 30.0
+        self.passthrough = False
+        self.is_passthrough = False
+        self.record_policy = "drop-oldest"
+        self.record_queue_size = 64
+        self.recorder = None
+        self.pool = FramePool()
+        self.raw_shape = None
+        self.record = None
+        self.pixel_format = "rgb888"
+        self.controls = ControlState()
+        self.drops = DropDetector()
+        self.frame_count = 0
+        self.dropped_at_record = 0
 
     @abstractmethod
     def setup(self):
@@ -53,6 +109,61 @@ class Camera():
     def set_param_default(self):
         pass
 
+    def set_parameters(self, values: dict, func=None) -> dict:
+        """Writes several control values.
+
+        Cameras which can write controls together override this method. By
+        default, each value is written by set_parameter.
+
+        Args:
+            values (dict): Value of each control name
+            func (Callable, optional): Function writing an error message. Defaults
+                to write_text of the window.
+
+        Returns:
+            dict: Error message of each control which is not set.
+        """
+        failures = {}
+        for param, value in values.items():
+            errors = []
+            self.set_parameter(param, value, lambda text, **kwargs: errors.append(text))
+            if errors:
+                failures[param] = errors[0]
+                (func or self.parent.write_text)(errors[0], level="err", color="red")
+        return failures
+
+    def subscribe_controls(self) -> list:
+        """Subscribes to the events of control changes.
+
+        Cameras whose driver reports changes of controls override this method,
+        together with wait_control_event, read_control_events and
+        unsubscribe_controls.
+
+        Returns:
+            list: The subscribed control names. Empty by default.
+        """
+        return []
+
+    def unsubscribe_controls(self):
+        pass
+
+    def wait_control_event(self, timeout: float) -> bool:
+        """Waits until a control event can be read.
+
+        Returns:
+            bool: False if timed out.
+        """
+        return False
+
+    def read_control_events(self) -> list:
+        """Reads the pending control events.
+
+        Returns:
+            list: (name, changes, value, flags) of each event. See
+                V4L2Controls.dequeue_events.
+        """
+        return []
+
     def open(self):
         """Creates an opencv VideoCapture object.
         """
@@ -60,6 +171,7 @@ class Camera():
         if not self.capture.isOpened():
             self.open_error()
         self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.init()
 
     def open_error(self):
         """Shows error meesage, finishes the all program.
@@ -70,6 +182,8 @@ class Camera():
         sys.exit(-1)
 
     def init(self):
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
         self.fps = self.capture.get(cv2.CAP_PROP_FPS)
         if self.fps:
             self.sec = 1 / self.fps
@@ -79,6 +193,9 @@ class Camera():
     def start_frame(self):
         """Start Reading frame
         """
+        with self.lock:
+            # The interval of the pause is not a gap between frames.
+            self.drops.reset()
         self.is_reading = True
         self.parent.write_text("Start Reading frame")
 
@@ -88,36 +205,92 @@ class Camera():
         self.is_reading = False
         self.parent.write_text("Stop Reading frame")
 
+    @property
+    def display_format(self) -> str:
+        """Pixel format of frames returned by read_frame.
+
+        Returns:
+            str: gray if the colorspace is gray, otherwise pixel_format.
+        """
+        return "gray" if self.colorspace == "gray" else self.pixel_format
+
+    def set_passthrough(self, enable: bool):
+        """Enables or disables the MJPEG pass-through mode.
+
+        While the camera is set to MJPG in this mode, frames are read as the compressed
+        JPEG payload (JpegFrame) and decoded only when the pixels are needed. Recording
+        writes the payload without decoding it.
+
+        Args:
+            enable (bool): True to enable the mode.
+        """
+        with self.lock:
+            self.passthrough = enable
+            self.update_passthrough()
+
+    def update_passthrough(self):
+        """Activates the pass-through mode if enabled and the current fourcc is MJPG.
+        """
+        fourcc = self.get_properties()[2]
+        self.is_passthrough = self.passthrough and fourcc == "MJPG"
+        self.capture.set(cv2.CAP_PROP_CONVERT_RGB, 0 if self.is_passthrough else 1)
+
     def start_recording(self, filename: str, codec: str):
         """Creates an opencv VideoWriter object to start recording.
+
+        Frames are written by a RecordWriter thread fed through a bounded queue. When
+        the queue is full, frames are handled according to record_policy.
         """
         self.create_videowriter(filename, codec)
-        self.is_recording = True
+        self.recorder = RecordWriter(
+            self.video_writer,
+            self.record_queue_size,
+            self.record_policy,
+            release=self.pool.release
+            )
+        self.recorder.start()
+        with self.lock:
+            self.dropped_at_record = self.drops.dropped
+            self.is_recording = True
         self.parent.write_text("Start Recording")
 
     def stop_recording(self):
         """Finishes recording to save the video file.
+
+        Waits until the queued frames are written, then shows the counters of the
+        recording. Frames dropped by the recorder or lost by the camera while
+        recording are reported in red.
         """
-        self.is_recording = False
-        self.video_writer.release()
+        with self.lock:
+            self.is_recording = False
+            lost = self.drops.dropped - self.dropped_at_record
+        self.recorder.close()
+        counters = self.recorder.get_counters()
         self.parent.write_text("Finish Recording")
+        text = "queued: {queued}, written: {written}, dropped: {dropped}".format(**counters)
+        text += ", lost by camera: {}".format(lost)
+        if counters["dropped"] or lost:
+            self.parent.write_text(text, level="warn", color="red")
+        else:
+            self.parent.write_text(text)
 
     def create_videowriter(self, filename: str, codec: str):
         """Creates an opencv VideoWriter object
 
         Args:
             filename (str): Filename of video
-            codec (str): Codec
+            codec (str): Codec. Ignored in the MJPEG pass-through mode.
         """
+        if self.is_passthrough:
+            self.video_writer = MjpegWriter(filename)
+            return
         fourcc = cv2.VideoWriter_fourcc(*codec)
+        width, height, _, fps = self.get_properties()
         self.video_writer = cv2.VideoWriter(
             filename,
             fourcc,
-            self.capture.get(cv2.CAP_PROP_FPS),
-            (
-                int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                )
+            fps,
+            (int(width), int(height))
             )
 
     def read_frame(self):
@@ -127,22 +300,222 @@ class Camera():
         the type of numpy.ndarray. To rearrange the channel's order, convert the
         frame from BRG to RGB if the colorspace is set to color (by default).
         If grayscale, the frame will be convertd to 1 channel grayscale.
+
+        In the MJPEG pass-through mode, the frame is returned as JpegFrame without
+        being decoded.
+
+        OpenCV doesn't give the sequence number of the driver, so frames are counted
+        by the camera and lost frames are detected from the timestamps.
+
+        This method is called from the capture worker, so it must not touch any widget.
+
+        Returns:
+            FrameRecord: The read frame. None if reading is paused.
+
+        Raises:
+            RuntimeError: The camera cannot read the next frame.
         """
-        if self.is_reading:
-            ret, cv_image = self.capture.read()
-            if not ret:
-                self.parent.write_text("cannot read the next frame.")
-                sys.exit(-1)
-            if self.is_recording:
-                self.video_writer.write(cv_image)
-            else:
-                # Convert the order of channel from BGR to RGB
-                if self.colorspace == "rgb":
-                    self.frame = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
-                elif self.colorspace == "gray":
-                    self.frame = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-                else:
-                    self.frame = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
+        if not self.is_reading:
+            return None
+        self.wait_frame()
+        with self.lock:
+            if not self.grab_frame():
+                return None
+            return self.retrieve_frame()
+
+    def wait_frame(self):
+        """Waits until the next frame is due.
+
+        Nothing to do for a real camera, whose grab blocks until the next frame arrives.
+        """
+        pass
+
+    def grab_frame(self) -> bool:
+        """Grabs the next frame without decoding it. Must be called with the lock held.
+
+        The capture time is taken when the grab returns. Grabbing is split from
+        retrieve_frame so that a CaptureGroup can grab all of its cameras back to back.
+
+        Returns:
+            bool: True if a frame is grabbed.
+
+        Raises:
+            RuntimeError: The camera cannot grab the next frame.
+        """
+        if not self.capture.grab():
+            raise RuntimeError("cannot read the next frame.")
+        self.grab_timestamp = time.monotonic()
+        return True
+
+    def retrieve_frame(self) -> FrameRecord:
+        """Decodes the grabbed frame. Must be called with the lock held.
+
+        Returns:
+            FrameRecord: The read frame.
+
+        Raises:
+            RuntimeError: The camera cannot decode the grabbed frame.
+        """
+        # The payload size of MJPG varies every frame, so it is not read into the pool.
+        raw = None if self.is_passthrough else self.pool.acquire(self.raw_shape)
+        ret, cv_image = self.capture.retrieve(raw)
+        if not ret:
+            self.pool.release(raw)
+            raise RuntimeError("cannot read the next frame.")
+        # The raw payload is returned as a 1 x N array when the conversion is disabled.
+        if self.is_passthrough and cv_image.ndim == 2 and cv_image.shape[0] == 1:
+            cv_image = JpegFrame(cv_image.reshape(-1), self.display_format)
+            frame = cv_image
+        else:
+            cv_image = self.pool.track(cv_image, raw)
+            self.raw_shape = cv_image.shape
+            frame = self.convert_color(cv_image)
+        if self.is_recording:
+            # The recorder releases the raw frame after writing it.
+            self.recorder.put(cv_image)
+        else:
+            self.pool.release(cv_image)
+        record = self.create_record(frame, self.grab_timestamp, self.frame_count, False)
+        self.frame_count += 1
+        self.set_frame(record)
+        return record
+
+    def create_record(self, frame, timestamp: float, sequence: int, is_driver_sequence: bool = True):
+        """Creates the record of a frame, checking whether frames were lost before it.
+
+        Must be called with the lock held.
+
+        Args:
+            frame: Pixels of the frame
+            timestamp (float): Monotonic capture time in seconds
+            sequence (int): Sequence number of the frame
+            is_driver_sequence (bool, optional): Whether the sequence number is given
+                by the driver. Defaults to True.
+
+        Returns:
+            FrameRecord: The record owning the frame
+        """
+        dropped = self.drops.check(timestamp, sequence, is_driver_sequence)
+        return FrameRecord(
+            frame, timestamp, sequence, self.display_format,
+            self.width, self.height, self.controls.snapshot(), dropped
+            )
+
+    def update_controls(self, values: dict):
+        """Updates the control values given to the records of next frames.
+
+        The records of frames already read keep the snapshot of the values active
+        at their capture time.
+
+        Args:
+            values (dict): Control names and values
+        """
+        self.controls.update(values)
+
+    def convert_color(self, cv_image):
+        """Converts a BGR frame into the pixel format displayed on the window.
+
+        The frame is converted only once, straight into the format the window paints
+        (see display_format). The converted frame is written into a buffer of the pool.
+
+        Args:
+            cv_image (numpy.ndarray): BGR frame
+
+        Returns:
+            numpy.ndarray: Converted frame owned by the caller
+        """
+        return self.convert_format(cv_image, bgr_codes, self.display_format)
+
+    def convert_format(self, src, codes: dict, pixel_format: str):
+        """Converts a frame into the pixel format with the table of conversion codes.
+
+        Args:
+            src (numpy.ndarray): Source frame
+            codes (dict): bgr_codes, gray_codes or yuyv_codes
+            pixel_format (str): Pixel format to convert into
+
+        Returns:
+            numpy.ndarray: Converted frame owned by the caller. src itself if no
+                conversion is needed.
+        """
+        code = codes[pixel_format]
+        if code is None:
+            self.pool.retain(src)
+            return src
+        return self.convert(src, code, frame_shape(src.shape[0], src.shape[1], pixel_format))
+
+    def convert(self, src, code: int, shape: tuple):
+        """Applies cv2.cvtColor writing into a buffer of the pool.
+
+        Args:
+            src (numpy.ndarray): Source frame
+            code (int): Conversion code
+            shape (tuple): Shape of the converted frame
+
+        Returns:
+            numpy.ndarray: Converted frame owned by the caller
+        """
+        dst = self.pool.acquire(shape)
+        return self.pool.track(cv2.cvtColor(src, code, dst=dst), dst)
+
+    def set_frame(self, record: FrameRecord):
+        """Replaces the latest frame kept for saving. Must be called with the lock held.
+
+        Args:
+            record (FrameRecord): The latest frame.
+        """
+        self.pool.retain(record.frame)
+        self.release_record(self.record)
+        self.record = record
+
+    def hold_frame(self) -> FrameRecord:
+        """Gets the latest frame for saving or analysis.
+
+        The frame must be given back with release_record() when it is no longer used.
+
+        Returns:
+            FrameRecord: The latest frame. None if no frame has been read.
+        """
+        with self.lock:
+            if self.record is not None:
+                self.pool.retain(self.record.frame)
+            return self.record
+
+    def release_record(self, record: FrameRecord):
+        """Gives the buffer of the frame back to the pool.
+
+        Args:
+            record (FrameRecord): The frame. None is ignored.
+        """
+        if record is not None:
+            self.pool.release(record.frame)
+
+    def get_capabilities(self) -> CapabilityIndex:
+        """Gets the index of the modes supported by the camera.
+
+        The modes are collected from get_supported_fourcc, size and fps.
+
+        Returns:
+            CapabilityIndex: The supported modes.
+        """
+        formats = []
+        for fourcc in self.get_supported_fourcc():
+            for size in self.get_supported_size(fourcc):
+                width, height = map(int, size.split("x"))
+                for fps in self.get_supported_fps(fourcc, width, height):
+                    formats.append((fourcc, width, height, float(fps)))
+        return CapabilityIndex(formats)
+
+    def get_identity(self) -> dict:
+        """Gets the identity of the camera, which names its stored profiles.
+
+        Cameras which can read the driver, card and serial number override this
+        method. By default, the camera is identified by its class and device number.
+
+        Returns:
+            dict: driver, card, bus_info and serial.
+        """
+        return {"driver": type(self).__name__, "card": "", "bus_info": str(self.device), "serial": ""}
 
     def get_properties(self) -> list:
         """Gets the current width, height, fps and fourcc of camera.
@@ -157,28 +530,73 @@ class Camera():
         lst.append(self.capture.get(cv2.CAP_PROP_FPS))
         return lst
 
-    def set_properties(self, fourcc: str, width: int, height: int, fps: float):
-        """Sets the current width, height, fps and fourcc of camera.
+    def set_properties(self, fourcc: str, width: int, height: int, fps: float) -> FormatChange:
+        """Switches the width, height, fps and fourcc of camera in one step.
+
+        The format is set by switch_format with the lock held, so no frame is
+        read meanwhile. Then the values negotiated by the driver are read back,
+        and written into the information window with the time taken. A mode
+        different from the requested one is reported as a warning.
 
         Args:
             fourcc (str): Fourcc
             width (int): Frame width
             height (int): Frame heigth
             fps (float): Frame FPS
+
+        Returns:
+            FormatChange: The requested and negotiated modes.
         """
-        self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
-        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.capture.set(cv2.CAP_PROP_FPS, fps)
-        self.size = "{}x{}".format(width, height)
+        requested = (fourcc, int(width), int(height), float(fps))
+        start = time.perf_counter()
+        with self.lock:
+            try:
+                self.switch_format(*requested)
+            except OSError as e:
+                self.parent.write_text("Cannot set the format: {}".format(e), level="err", color="red")
+            self.init()
+            self.update_passthrough()
+            # The driver counts the sequence from 0 again.
+            self.drops.reset()
+            actual_width, actual_height, actual_fourcc, actual_fps = self.get_properties()
+        change = FormatChange(
+            requested, (actual_fourcc, int(actual_width), int(actual_height), float(actual_fps)),
+            time.perf_counter() - start
+        )
+        self.size = "{}x{}".format(change.negotiated[1], change.negotiated[2])
 
-        self.parent.write_text("Change frame properties")
+        self.parent.write_text("Change frame properties ({:.1f} ms)".format(change.elapsed * 1000))
         self.parent.write_text("-" * 80)
-        self.parent.write_text("{:<10} : {}".format("fourcc", self.decode_fourcc(self.capture.get(cv2.CAP_PROP_FOURCC))))
-        self.parent.write_text("{:<10} : {}".format("width", width))
-        self.parent.write_text("{:<10} : {}".format("height", height))
-        self.parent.write_text("{:<10} : {}".format("FPS", fps))
+        for name, value in zip(("fourcc", "width", "height", "FPS"), change.negotiated):
+            self.parent.write_text("{:<10} : {}".format(name, value))
         self.parent.write_text("-" * 80)
+        if not change.matches:
+            self.parent.write_text(
+                "The camera runs {} instead of {}".format(
+                    FormatChange.describe(change.negotiated), FormatChange.describe(requested)),
+                level="warn", color="red"
+            )
+        return change
+
+    def switch_format(self, fourcc: str, width: int, height: int, fps: float):
+        """Sets the format of the VideoCapture. Must be called with the lock held.
+
+        The V4L backend of OpenCV restarts the stream for each property set, so
+        only the properties which differ are set: the fourcc, then the size (the
+        stream restarts once, when both width and height are set), then the FPS,
+        which the driver resets to the default of a new format.
+        """
+        current_width, current_height, current_fourcc, current_fps = self.get_properties()
+        format_changed = False
+        if fourcc != current_fourcc:
+            self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            format_changed = True
+        if (width, height) != (int(current_width), int(current_height)):
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            format_changed = True
+        if format_changed or abs(fps - current_fps) > 0.01:
+            self.capture.set(cv2.CAP_PROP_FPS, fps)
 
     def decode_fourcc(self, v: float) -> str:
         """Decode the return value.
@@ -197,36 +615,445 @@ class Camera():
         return "".join([chr((v >> 8 * i) & 0xFF) for i in range(4)])
 
 
-class LinuxCamera(Camera):
+class V4L2ControlCamera(Camera):
+    """Base class of the cameras whose controls and formats are read through V4L2Controls.
 
-    font_family = "Note Sans"
-    font_size = 14
+    The frames are read by the subclass, and everything else is delegated to the
+    control engine made by create_controls().
+    """
 
     def __init__(self, device: int, color: str = "rgb", parent=None):
         super().__init__(device, color, parent)
-        super().open()
+        self.open()
+        self.v4l2_ctl = self.create_controls()
+        self.v4l2_ctl.open()
+
+    def create_controls(self) -> V4L2Controls:
+        """Creates the ioctl control engine of the device.
+
+        The engine opens its own file descriptor of /dev/videoN, since the device of
+        cv2.VideoCapture is not accessible.
+        """
+        return V4L2Controls(self.device, cache=CapabilityCache())
 
     def get_supported_params(self) -> list:
-        return V4L2.get_supported_params(self.device)
+        return self.v4l2_ctl.get_supported_params()
 
-    def get_current_params(self, param_type: str, *plist: list) -> dict:
-        return V4L2.get_current_params(self.device, param_type, *plist)
+    def get_current_params(self, param_type: str, plist: list = None) -> dict:
+        return self.v4l2_ctl.get_current_params(param_type, plist)
 
     def get_supported_fourcc(self) -> list:
-        return V4L2.get_supported_fourcc(self.device)
+        return self.v4l2_ctl.get_supported_fourcc()
 
     def get_supported_size(self, fourcc: str) -> list:
-        return V4L2.get_supported_size(self.device, fourcc)
+        return self.v4l2_ctl.get_supported_size(fourcc)
 
     def get_supported_fps(self, fourcc: str, width: int, height: int) -> list:
-        return V4L2.get_supported_fps(self.device, fourcc, width, height)
+        return self.v4l2_ctl.get_supported_fps(fourcc, width, height)
+
+    def get_capabilities(self) -> CapabilityIndex:
+        return self.v4l2_ctl.get_index()
+
+    def get_identity(self) -> dict:
+        return self.v4l2_ctl.identity or super().get_identity()
+
+    def set_parameter(self, param: str, value: int, func=None):
+        """Writes a control value.
+
+        The value is written with one ioctl on the file descriptor of the control
+        engine (see create_controls), without the lock of the camera, so reading
+        frames goes on meanwhile.
+
+        Args:
+            param (str): Control name
+            value (int): Value to be set
+            func (Callable, optional): Function writing an error message. Defaults
+                to write_text of the window.
+
+        Returns:
+            int: The value set. None if the value is rejected.
+        """
+        if self.v4l2_ctl.change_param(param, value, func or self.parent.write_text):
+            return value
+
+    def set_parameters(self, values: dict, func=None) -> dict:
+        """Writes several control values in one round trip. See V4L2Controls.apply_controls.
+        """
+        return self.v4l2_ctl.apply_controls(values, func or self.parent.write_text)
+
+    def subscribe_controls(self) -> list:
+        return self.v4l2_ctl.subscribe_events()
+
+    def unsubscribe_controls(self):
+        self.v4l2_ctl.unsubscribe_events()
+
+    def wait_control_event(self, timeout: float) -> bool:
+        return self.v4l2_ctl.wait_event(timeout)
+
+    def read_control_events(self) -> list:
+        return self.v4l2_ctl.dequeue_events()
+
+
+class LinuxCamera(V4L2ControlCamera):
+
+    font_family = "Note Sans"
+    font_size = 14
+
+
+class V4L2StreamCamera(LinuxCamera):
+    """Linux camera reading frames through V4L2 mmap streaming.
+
+    Frames are dequeued by V4L2Stream instead of cv2.VideoCapture, so the driver
+    buffer is converted directly into the displayed frame without an intermediate
+    copy, and the sequence number and timestamp of the driver are kept in the
+    record of the frame.
+    """
+
+    def __init__(self, device: int, color: str = "rgb", parent=None, stream_device=None):
+        if stream_device is None:
+            stream_device = DeviceFile("/dev/video{}".format(device))
+        self.stream = V4L2Stream(stream_device)
+        self.grabbed = None
+        super().__init__(device, color, parent)
+
+    def open(self):
+        """Opens the device and starts streaming.
+        """
+        try:
+            self.stream.open()
+            self.stream.start()
+        except OSError:
+            self.open_error()
+        self.init()
+
+    def create_controls(self) -> V4L2Controls:
+        """Creates the ioctl control engine sharing the device of the stream.
 
-    def set_parameter(self, param: str, value: int):
+        The controls are written on the file descriptor of the stream, so the
+        values written by this application are not sent back as control events
+        (see V4L2Controls.subscribe_events).
+        """
+        return V4L2Controls(self.device, self.stream.device, cache=CapabilityCache())
+
+    def update_passthrough(self):
+        self.is_passthrough = self.passthrough and self.stream.fourcc == "MJPG"
+
+    def init(self):
+        self.width = self.stream.width
+        self.height = self.stream.height
+        self.fps = self.stream.get_fps()
+        if self.fps:
+            self.sec = 1 / self.fps
+        else:
+            self.sec = 1 / 30.0
+
+    def grab_frame(self) -> bool:
+        """Dequeues one buffer. Must be called with the lock held.
+
+        The buffer is kept in self.grabbed until retrieve_frame gives it back to the driver.
+
+        Returns:
+            bool: True if a buffer is dequeued. False if no buffer is ready.
+
+        Raises:
+            RuntimeError: The camera cannot read the next frame.
+        """
         try:
-            self.is_reading = False
-            V4L2.change_param(self.device, param, value, self.parent.write_text)
+            self.grabbed = self.stream.dequeue(self.sec * 2)
+        except OSError:
+            raise RuntimeError("cannot read the next frame.")
+        return self.grabbed is not None
+
+    def retrieve_frame(self) -> FrameRecord:
+        """Converts the dequeued buffer into the colorspace of the window, then queues it again.
+
+        Must be called with the lock held.
+
+        Returns:
+            FrameRecord: The read frame.
+        """
+        buffer, self.grabbed = self.grabbed, None
+        try:
+            if self.is_passthrough:
+                # The payload is copied since the buffer goes back to the driver.
+                frame = JpegFrame(buffer.data.copy(), self.display_format)
+                if self.is_recording:
+                    self.recorder.put(frame)
+            elif self.is_recording:
+                bgr = self.decode(buffer.data, "bgr")
+                frame = self.convert_color(bgr)
+                self.recorder.put(bgr)
+            else:
+                frame = self.decode(buffer.data, self.display_format)
+            record = self.create_record(frame, buffer.timestamp, buffer.sequence)
+            self.set_frame(record)
         finally:
-            self.is_reading = True
+            self.stream.queue(buffer)
+        return record
+
+    def decode(self, data, pixel_format: str):
+        """Converts the raw buffer into a frame.
+
+        Args:
+            data (numpy.ndarray): Bytes of the dequeued buffer
+            pixel_format (str): Pixel format of the frame. See frame.channels.
+
+        Returns:
+            numpy.ndarray: Converted frame owned by the caller
+        """
+        fourcc = self.stream.fourcc
+        if fourcc == "MJPG":
+            # imdecode cannot write into a given buffer.
+            if pixel_format == "gray":
+                return cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+            image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            return self.convert_format(image, bgr_codes, pixel_format)
+        elif fourcc == "GREY":
+            image = data.reshape(self.stream.height, self.stream.bytesperline)[:, :self.stream.width]
+            if pixel_format == "gray":
+                # The buffer goes back to the driver, so the pixels are copied.
+                dst = self.pool.acquire(image.shape)
+                np.copyto(dst, image)
+                return dst
+            return self.convert_format(image, gray_codes, pixel_format)
+        else:
+            image = data.reshape(self.stream.height, self.stream.bytesperline // 2, 2)
+            image = image[:, :self.stream.width]
+            return self.convert_format(image, yuyv_codes, pixel_format)
+
+    def get_properties(self) -> list:
+        """Gets the current width, height, fps and fourcc of camera.
+
+        Returns:
+            list: width, height, fps and fourcc of camera
+        """
+        return [self.stream.width, self.stream.height, self.stream.fourcc, self.fps]
+
+    def switch_format(self, fourcc: str, width: int, height: int, fps: float):
+        """Restarts streaming once with the new format and frame interval.
+
+        Raises:
+            OSError: The driver rejects the format. Streaming goes on in the
+                current format.
+        """
+        self.stream.switch_format(fourcc, width, height, fps)
+
+
+class SyntheticCamera(Camera):
+    """Camera generating moving test patterns without any device.
+
+    The pattern is a set of color bars scrolling by a few pixels every frame. The
+    frame number and the monotonic timestamp (in microseconds) at which the frame was
+    generated are drawn as black and white blocks on the top two block rows, and can
+    be read back with decode_stamp(). Frames are paced at the configured FPS like a
+    real camera.
+
+    Fourcc only changes how a frame is delivered: MJPG frames are encoded (and
+    decoded unless the pass-through mode is enabled), GREY frames have one channel.
+    """
+
+    font_family = "Note Sans"
+    font_size = 14
+
+    fourcc_list = ["YUYV", "MJPG", "GREY"]
+    size_list = ["320x240", "640x480", "1280x720", "1920x1080", "3840x2160"]
+    fps_list = ["5.0", "15.0", "30.0", "60.0", "120.0"]
+
+    frame_bits = 32
+    timestamp_bits = 64
+    scroll = 4
+
+    def __init__(self, device: int = 0, color: str = "rgb", parent=None, width: int = 640,
+        height: int = 480, fps: float = 30.0, fourcc: str = "YUYV"):
+        super().__init__(device, color, parent)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.frame_number = 0
+        self.sequence = 0
+        self.timestamp = 0.0
+        self.grabbed = None
+        self.params = {
+            "brightness": {"min": 0, "max": 255, "step": 1, "value": 128, "default": 128},
+            "contrast": {"min": 0, "max": 255, "step": 1, "value": 32, "default": 32},
+            "saturation": {"min": 0, "max": 255, "step": 1, "value": 32, "default": 32},
+            "gain": {"min": 0, "max": 255, "step": 1, "value": 64, "default": 64},
+        }
+        self.open()
+
+    def open(self):
+        """Creates the base pattern.
+        """
+        self.create_pattern()
+        self.init()
+
+    def init(self):
+        if self.fps:
+            self.sec = 1 / self.fps
+        else:
+            self.sec = 1 / 30.0
+        self.deadline = time.monotonic()
+
+    def create_pattern(self):
+        """Creates color bars twice as wide as the frame, which are scrolled by slicing.
+        """
+        colors = np.array([
+            [255, 255, 255], [0, 255, 255], [255, 255, 0], [0, 255, 0],
+            [255, 0, 255], [0, 0, 255], [255, 0, 0], [0, 0, 0]], dtype=np.uint8)
+        bar = max(1, self.width // len(colors))
+        index = (np.arange(2 * self.width) // bar) % len(colors)
+        row = colors[index]
+        self.pattern = np.ascontiguousarray(np.broadcast_to(row, (self.height, 2 * self.width, 3)))
+        self.block = max(1, self.width // self.timestamp_bits)
+
+    def generate(self) -> np.ndarray:
+        """Generates the next BGR frame with the frame number and timestamp drawn in it.
+
+        Returns:
+            numpy.ndarray: BGR frame owned by the caller
+        """
+        offset = (self.frame_number * self.scroll) % self.width
+        image = self.pool.acquire((self.height, self.width, 3))
+        np.copyto(image, self.pattern[:, offset:offset + self.width])
+        timestamp = int(time.monotonic() * 1e6)
+        self.draw_bits(image, 0, self.frame_number, self.frame_bits)
+        self.draw_bits(image, 1, timestamp, self.timestamp_bits)
+        self.timestamp = timestamp * 1e-6
+        self.frame_number += 1
+        return image
+
+    def draw_bits(self, image: np.ndarray, row: int, value: int, nbits: int):
+        block = self.block
+        top = row * block
+        for bit in range(nbits):
+            left = bit * block
+            image[top:top + block, left:left + block] = 255 if (value >> bit) & 1 else 0
+
+    @classmethod
+    def decode_stamp(cls, frame: np.ndarray) -> tuple:
+        """Reads the frame number and the timestamp drawn in a frame.
+
+        Args:
+            frame (numpy.ndarray): RGB, BGR or grayscale frame.
+
+        Returns:
+            tuple: Frame number and timestamp in seconds.
+        """
+        if frame.ndim == 3:
+            frame = frame[:, :, 0]
+        block = max(1, frame.shape[1] // cls.timestamp_bits)
+        values = []
+        for row, nbits in enumerate([cls.frame_bits, cls.timestamp_bits]):
+            center = row * block + block // 2
+            value = 0
+            for bit in range(nbits):
+                if frame[center, bit * block + block // 2] >= 128:
+                    value |= 1 << bit
+            values.append(value)
+        return values[0], values[1] * 1e-6
+
+    def wait_frame(self):
+        """Sleeps until the next frame is due.
+
+        Frames are due at multiples of the frame period of the monotonic clock, so
+        that synthetic cameras with the same FPS tick together like synchronized cameras.
+        """
+        now = time.monotonic()
+        if self.deadline > now:
+            time.sleep(self.deadline - now)
+        else:
+            # Late, the frame of the current period is generated now.
+            self.deadline = now - now % self.sec
+        self.deadline += self.sec
+
+    def grab_frame(self) -> bool:
+        """Generates the BGR frame. Must be called with the lock held.
+
+        The frame number drawn in the frame is used as the sequence number.
+
+        Returns:
+            bool: Always True.
+        """
+        self.sequence = self.frame_number
+        self.grabbed = self.generate()
+        return True
+
+    def retrieve_frame(self) -> FrameRecord:
+        """Delivers the generated frame according to the fourcc. Must be called with the lock held.
+
+        Returns:
+            FrameRecord: The generated frame.
+        """
+        bgr, self.grabbed = self.grabbed, None
+        if self.fourcc == "MJPG":
+            _, data = cv2.imencode(".jpg", bgr)
+            if self.is_passthrough:
+                image = JpegFrame(data.reshape(-1), self.display_format)
+            else:
+                image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            self.pool.release(bgr)
+        elif self.fourcc == "GREY":
+            image = self.convert(bgr, cv2.COLOR_BGR2GRAY, bgr.shape[:2])
+            self.pool.release(bgr)
+        else:
+            image = bgr
+
+        if self.is_recording:
+            if isinstance(image, np.ndarray) and image.ndim == 2:
+                self.recorder.put(self.convert(image, cv2.COLOR_GRAY2BGR, image.shape + (3,)))
+            else:
+                self.pool.retain(image)
+                self.recorder.put(image)
+
+        if isinstance(image, JpegFrame):
+            frame = image
+        elif image.ndim == 2:
+            frame = self.convert_format(image, gray_codes, self.display_format)
+            self.pool.release(image)
+        else:
+            frame = self.convert_color(image)
+            self.pool.release(image)
+        record = self.create_record(frame, self.timestamp, self.sequence)
+        self.set_frame(record)
+        return record
+
+    def update_passthrough(self):
+        self.is_passthrough = self.passthrough and self.fourcc == "MJPG"
+
+    def get_properties(self) -> list:
+        return [self.width, self.height, self.fourcc, self.fps]
+
+    def switch_format(self, fourcc: str, width: int, height: int, fps: float):
+        """Sets the width, height, fps and fourcc of generated frames.
+        """
+        self.fourcc = fourcc
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.create_pattern()
+
+    def get_supported_params(self) -> list:
+        return list(self.params.keys())
+
+    def get_current_params(self, param_type: str = "full", plist: list = None) -> dict:
+        if param_type == "full":
+            return {key: dict(value) for key, value in self.params.items()}
+        return {key: dict(self.params[key]) for key in plist if key in self.params}
+
+    def get_supported_fourcc(self) -> list:
+        return self.fourcc_list
+
+    def get_supported_size(self, fourcc: str) -> list:
+        return self.size_list
+
+    def get_supported_fps(self, fourcc: str, width: int, height: int) -> list:
+        return self.fps_list
+
+    def set_parameter(self, param: str, value: int, func=None) -> int:
+        if param in self.params:
+            self.params[param]["value"] = value
+        return value
 
 
 class WindowsCamera(Camera):
@@ -245,6 +1072,7 @@ class WindowsCamera(Camera):
             self.open_error()
         self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         self.color = "rgb"
+        self.init()
 
     def get_supported_params(self) -> list:
         return self.windows.get_supported_params(self.device)
@@ -261,43 +1089,15 @@ class WindowsCamera(Camera):
     def get_supported_fps(self, fourcc: str, width: int, height: int) -> list:
         return self.windows.get_supported_fps(self.device, fourcc, width, height)
 
-    def set_parameter(self, param: str, value: int) -> int:
-        try:
-            self.is_reading = False
-            propID = self.windows.get_propID(param)
+    def set_parameter(self, param: str, value: int, func=None) -> int:
+        propID = self.windows.get_propID(param)
+        with self.lock:
             ret = self.capture.set(propID, value)
-            if not ret:
-                self.parent.write_text("Input parameter is invalid !", level="err", color="red")
-            self.is_reading = True
-            return value
-        finally:
-            self.is_reading = True
-
-
-class RaspiCamera(Camera):
-
-    def __init__(self, device: int, color: str = "rgb", parent=None):
-        super().__init__(device, color, parent)
-        super().open()
-
-    def get_supported_params(self) -> list:
-        return V4L2.get_supported_params(self.device)
+        if not ret:
+            (func or self.parent.write_text)("Input parameter is invalid !", level="err", color="red")
+        return value
 
-    def get_current_params(self, param_type: str, plist: list) -> dict:
-        return V4L2.get_current_params(self.device, param_type, plist)
 
-    def get_supported_fourcc(self) -> list:
-        return V4L2.get_supported_fourcc(self.device)
-
-    def get_supported_size(self, fourcc: str) -> list:
-        return V4L2.get_supported_size(self.device, fourcc)
-
-    def get_supported_fps(self, fourcc: str, width: int, height: int) -> list:
-        return V4L2.get_supported_fps(self.device, fourcc, width, height)
-
-    def set_parameter(self, param: str, value: int):
-        try:
-            self.is_reading = False
-            V4L2.change_param(self.device, param, value, self.parent.write_text)
-        finally:
-            self.is_reading = True
+class RaspiCamera(V4L2ControlCamera):
+    """Raspberry Pi camera read by cv2.VideoCapture through its V4L2 driver.
+    """
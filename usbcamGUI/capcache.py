@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Cache of the capabilities of cameras stored on disk.
+
+The format table and the control descriptors of a camera are written into a JSON
+file under ~/.cache/usbcamGUI, so that they are not enumerated again on the next
+launch. A file is found by the identity of the camera (driver, card, bus_info and
+USB serial), and is ignored when the driver or firmware version has changed.
+"""
+import json
+from pathlib import Path
+
+from fileIO import FileIO
+
+
+def cache_dir() -> Path:
+    """Gets the default cache directory.
+
+    Returns:
+        Path: $XDG_CACHE_HOME/usbcamGUI, or ~/.cache/usbcamGUI.
+    """
+    return FileIO.user_dir("XDG_CACHE_HOME", ".cache")
+
+
+def read_sysfs(path: Path) -> str:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return ""
+
+
+def usb_attributes(device: int) -> dict:
+    """Reads the serial number and the firmware version of a USB camera from sysfs.
+
+    Args:
+        device (int): Device number N of /dev/videoN.
+
+    Returns:
+        dict: serial and firmware (bcdDevice). Empty strings if not found.
+    """
+    interface = Path("/sys/class/video4linux/video{}/device".format(device))
+    usb_device = interface.resolve().parent
+    return {
+        "serial": read_sysfs(usb_device / "serial"),
+        "firmware": read_sysfs(usb_device / "bcdDevice"),
+    }
+
+
+class CapabilityCache():
+    """Capabilities of cameras stored as JSON files.
+
+    Each file holds the identity of the camera, the format table and the control
+    descriptors::
+
+        {
+            "identity": {"driver": ..., "card": ..., "bus_info": ..., "serial": ...,
+                         "version": ..., "firmware": ...},
+            "formats": [[fourcc, width, height, fps], ...],
+            "controls": [[id, type, name, minimum, maximum, step, default, flags, menu], ...]
+        }
+
+    Args:
+        directory (Path, optional): Directory of the cache files. Defaults to cache_dir().
+    """
+
+    # Identity fields naming the file. The others invalidate the file when changed.
+    key_fields = ("driver", "card", "bus_info", "serial")
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory) if directory else cache_dir()
+
+    def path(self, identity: dict) -> Path:
+        return self.directory / FileIO.hashed_filename(identity.get(field, "") for field in self.key_fields)
+
+    def load(self, identity: dict) -> dict:
+        """Loads the capabilities of a camera.
+
+        Args:
+            identity (dict): Identity of the camera
+
+        Returns:
+            dict: formats and controls. None if the camera is not cached, or the
+                cached identity differs (e.g. firmware updated).
+        """
+        try:
+            with open(self.path(identity)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("identity") != identity:
+            return None
+        return entry
+
+    def save(self, identity: dict, formats: list, controls: list) -> bool:
+        """Stores the capabilities of a camera (see FileIO.write_json).
+
+        Args:
+            identity (dict): Identity of the camera
+            formats (list): (fourcc, width, height, fps) of each format
+            controls (list): Fields of each control descriptor
+
+        Returns:
+            bool: False if the file cannot be written.
+        """
+        entry = {
+            "identity": identity,
+            "formats": [list(item) for item in formats],
+            "controls": [list(item) for item in controls],
+        }
+        return FileIO.write_json(self.path(identity), entry)
+
+    def clear(self) -> int:
+        """Removes all cache files.
+
+        Returns:
+            int: The number of removed files.
+        """
+        count = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+                count += 1
+            except OSError:
+                pass
+        return count
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Index of the capture modes supported by a camera.
+
+A capture mode is a (fourcc, width, height, fps) tuple, as listed by
+`v4l2-ctl --list-formats-ext` or enumerated through ioctl. CapabilityIndex keeps
+the modes as nested maps, fourcc -> (width, height) -> fps, with sizes and FPS in
+ascending order, so that the lists shown by the properties dialog and the CLI are
+lookups instead of scans of the whole table.
+"""
+import math
+
+
+# Bits per pixel of each fourcc, used for the bandwidth estimates. H264 is a rough
+# average of webcam streams, and MJPEG is modeled by mjpeg_bits_per_pixel.
+bits_per_pixel = {
+    "YUYV": 16,
+    "YUY2": 16,
+    "UYVY": 16,
+    "YVYU": 16,
+    "Y16": 16,
+    "RGBP": 16,
+    "RGB3": 24,
+    "BGR3": 24,
+    "GREY": 8,
+    "NV12": 12,
+    "NV21": 12,
+    "YU12": 12,
+    "YV12": 12,
+    "H264": 1,
+}
+compressed_fourcc = ("MJPG", "JPEG", "H264")
+
+# Bits per pixel of a MJPEG frame at (pixels, bits) of a small and a large frame.
+# Larger frames compress better, so the rate falls between the two points.
+mjpeg_small = (320 * 240, 4.0)
+mjpeg_large = (1920 * 1080, 2.0)
+
+
+def mjpeg_bits_per_pixel(pixels: int) -> float:
+    """Estimates the bits per pixel of a MJPEG frame of a camera.
+
+    The rate is interpolated on the logarithm of the frame area between
+    mjpeg_small and mjpeg_large, and kept constant outside of them. The actual
+    size depends on the scene and the quality set by the camera.
+    """
+    (small, small_bits), (large, large_bits) = mjpeg_small, mjpeg_large
+    if pixels <= small:
+        return small_bits
+    if pixels >= large:
+        return large_bits
+    ratio = math.log(pixels / small) / math.log(large / small)
+    return small_bits + (large_bits - small_bits) * ratio
+
+
+def frame_bytes(fourcc: str, width: int, height: int) -> float:
+    """Estimates the size of a frame.
+
+    Unknown fourcc are counted as 16 bits per pixel.
+
+    Returns:
+        float: Bytes per frame.
+    """
+    pixels = width * height
+    if fourcc in ("MJPG", "JPEG"):
+        return pixels * mjpeg_bits_per_pixel(pixels) / 8
+    return pixels * bits_per_pixel.get(fourcc, 16) / 8
+
+
+def bandwidth(fourcc: str, width: int, height: int, fps: float) -> float:
+    """Estimates the data rate of a capture mode.
+
+    Returns:
+        float: Bytes per second.
+    """
+    return frame_bytes(fourcc, width, height) * fps
+
+
+class CapabilityIndex():
+    """Capture modes of a camera indexed by fourcc, size and FPS.
+
+    Args:
+        formats (list): (fourcc, width, height, fps) of each mode. The order of
+            fourcc is kept, sizes and FPS are sorted in ascending order.
+    """
+
+    def __init__(self, formats: list):
+        self.index = {}
+        for fourcc, width, height, fps in formats:
+            sizes = self.index.setdefault(fourcc, {})
+            sizes.setdefault((int(width), int(height)), set()).add(float(fps))
+        for fourcc, sizes in self.index.items():
+            self.index[fourcc] = {
+                size: sorted(sizes[size]) for size in sorted(sizes, key=lambda s: (s[0] * s[1], s))
+            }
+
+    def __len__(self) -> int:
+        return sum(len(fps) for sizes in self.index.values() for fps in sizes.values())
+
+    def __contains__(self, mode: tuple) -> bool:
+        fourcc, width, height, fps = mode
+        return float(fps) in self.index.get(fourcc, {}).get((int(width), int(height)), [])
+
+    def fourcc(self) -> list:
+        return list(self.index)
+
+    def sizes(self, fourcc: str) -> list:
+        """Gets the frame sizes of a fourcc.
+
+        Returns:
+            list: (width, height) in ascending order of area.
+        """
+        return list(self.index.get(fourcc, {}))
+
+    def fps(self, fourcc: str, width: int, height: int) -> list:
+        """Gets the FPS of a fourcc and frame size.
+
+        Returns:
+            list: FPS in ascending order.
+        """
+        return list(self.index.get(fourcc, {}).get((int(width), int(height)), []))
+
+    def size_list(self, fourcc: str) -> list:
+        """Gets the frame sizes of a fourcc as strings such as "640x480".
+        """
+        return ["{}x{}".format(width, height) for width, height in self.sizes(fourcc)]
+
+    def fps_list(self, fourcc: str, width: int, height: int) -> list:
+        """Gets the FPS of a fourcc and frame size as strings such as "30.000".
+        """
+        return ["{:.3f}".format(fps) for fps in self.fps(fourcc, width, height)]
+
+    def modes(self) -> list:
+        """Gets all modes.
+
+        Returns:
+            list: (fourcc, width, height, fps) ordered by fourcc, size and FPS.
+        """
+        return [
+            (fourcc, width, height, fps)
+            for fourcc, sizes in self.index.items()
+            for (width, height), rates in sizes.items()
+            for fps in rates
+        ]
+
+    def nearest(self, width: int, height: int, fps: float, fourcc: str = None) -> tuple:
+        """Finds the supported mode nearest to the requested one.
+
+        The size nearest in area (then in aspect ratio) is chosen first, then the
+        FPS nearest to the request, the higher one on a tie. If fourcc is not
+        supported or not given, the fourcc giving the nearest mode is used,
+        preferring uncompressed formats.
+
+        Args:
+            width (int): Requested width
+            height (int): Requested height
+            fps (float): Requested FPS
+            fourcc (str, optional): Requested fourcc. Defaults to None.
+
+        Returns:
+            tuple: (fourcc, width, height, fps). None if no mode is supported.
+        """
+        candidates = [fourcc] if fourcc in self.index else list(self.index)
+        best = None
+        best_key = None
+        for cc in candidates:
+            for (w, h), rates in self.index[cc].items():
+                size_error = abs(math.log((w * h) / max(width * height, 1)))
+                aspect_error = abs(w / h - width / max(height, 1))
+                for rate in rates:
+                    key = (size_error, aspect_error, abs(rate - fps), -rate, cc in compressed_fourcc)
+                    if best_key is None or key < best_key:
+                        best, best_key = (cc, w, h, rate), key
+        return best
+
+    def bandwidth(self, mode: tuple) -> float:
+        """Estimates the data rate of a mode in bytes per second. See bandwidth().
+        """
+        return bandwidth(*mode)
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Capture worker reading frames from the camera outside of the GUI thread.
+
+The worker owns the reading loop of the camera and publishes each frame into a
+FrameBuffer which holds only the latest frame. The GUI is notified by a Qt signal
+and takes the newest frame when it is ready to display.
+
+Cameras of a CaptureGroup are read together by one GroupCaptureWorker, which
+grabs every camera back to back before decoding any frame.
+"""
+import time
+import threading
+from collections import deque
+from contextlib import ExitStack
+
+from PySide2.QtCore import QThread, Signal
+
+from frame import FrameSet
+
+
+class DropDetector():
+    """Detects frames lost between two frames read from the camera.
+
+    A gap in the sequence numbers of the driver is counted as lost frames. When the
+    backend doesn't give the sequence number, lost frames are estimated from the
+    interval between timestamps instead: an interval longer than 1.5 times the
+    median of the recent intervals counts as round(interval / median) - 1 frames.
+    The median follows the actual frame rate, which may be lower than the nominal
+    one (e.g. under automatic exposure).
+
+    Args:
+        history (int, optional): The number of intervals to take the median from.
+            Defaults to 15.
+    """
+
+    def __init__(self, history: int = 15):
+        self.intervals = deque(maxlen=history)
+        self.dropped = 0
+        self.gaps = 0
+        self.last_sequence = None
+        self.last_timestamp = None
+
+    def check(self, timestamp: float, sequence: int = None, is_driver_sequence: bool = True) -> int:
+        """Checks the frame following the previous one.
+
+        Args:
+            timestamp (float): Monotonic capture time in seconds.
+            sequence (int, optional): Sequence number of the frame.
+            is_driver_sequence (bool, optional): Whether gaps in sequence mean lost
+                frames. If False, the timestamp is used. Defaults to True.
+
+        Returns:
+            int: The number of frames lost before this frame.
+        """
+        lost = 0
+        if is_driver_sequence and sequence is not None:
+            if self.last_sequence is not None:
+                lost = max(0, sequence - self.last_sequence - 1)
+        elif self.last_timestamp is not None:
+            interval = timestamp - self.last_timestamp
+            if len(self.intervals) == self.intervals.maxlen:
+                median = sorted(self.intervals)[len(self.intervals) // 2]
+                if median > 0 and interval > 1.5 * median:
+                    lost = int(round(interval / median)) - 1
+            if not lost:
+                self.intervals.append(interval)
+        self.last_sequence = sequence
+        self.last_timestamp = timestamp
+        if lost:
+            self.dropped += lost
+            self.gaps += 1
+        return lost
+
+    def reset(self):
+        """Forgets the previous frame, e.g. when reading is paused or the format changes.
+
+        The counters are kept.
+        """
+        self.intervals.clear()
+        self.last_sequence = None
+        self.last_timestamp = None
+
+
+class FrameBuffer():
+    """Double buffer holding only the latest frame.
+
+    The capture side writes into the back slot with publish(), the display side
+    takes it to the front with take(). A frame published before the previous one
+    has been taken overwrites it, which is counted as an overwritten frame.
+
+    Args:
+        release (callable, optional): Called with an overwritten or discarded frame,
+            to give a pooled buffer back.
+    """
+
+    def __init__(self, release=None):
+        self.release = release or (lambda frame: None)
+        self._lock = threading.Lock()
+        self._back = None
+        self._published = 0
+        self._taken = 0
+
+    def publish(self, frame):
+        """Stores the frame as the latest one.
+
+        Args:
+            frame: The frame read from the camera.
+        """
+        with self._lock:
+            overwritten, self._back = self._back, frame
+            self._published += 1
+        if overwritten is not None:
+            self.release(overwritten)
+
+    def take(self) -> tuple:
+        """Takes the latest frame.
+
+        The caller owns the returned frame and must give it back with release.
+
+        Returns:
+            tuple: The latest frame (None if no new frame has been published since
+                the last call) and the number of frames overwritten before it was taken.
+        """
+        with self._lock:
+            if self._back is None:
+                return None, 0
+            front, self._back = self._back, None
+            overwritten = self._published - self._taken - 1
+            self._taken = self._published
+        return front, overwritten
+
+    def clear(self):
+        """Discards the frame waiting in the buffer.
+        """
+        with self._lock:
+            discarded, self._back = self._back, None
+            self._taken = self._published
+        if discarded is not None:
+            self.release(discarded)
+
+
+class CaptureWorker(QThread):
+    """Thread reading frames from the camera.
+
+    The worker calls read_frame of the camera in a loop, and emits frame_ready
+    every time a new frame is published into the buffer. While the camera stops
+    reading (is_reading is False), the worker sleeps for one frame period instead.
+    frames_dropped is emitted with the number of lost frames and the sequence
+    number of the frame following them.
+    """
+
+    frame_ready = Signal()
+    frames_dropped = Signal(int, int)
+    read_error = Signal(str)
+
+    def __init__(self, camera, buffer: FrameBuffer = None, parent=None):
+        super().__init__(parent)
+        self.camera = camera
+        self.buffer = buffer or FrameBuffer(release=camera.release_record)
+        self.is_running = False
+
+    def run(self):
+        """Reads frames until stop() is called.
+        """
+        self.is_running = True
+        while self.is_running:
+            try:
+                record = self.camera.read_frame()
+            except RuntimeError as e:
+                self.is_running = False
+                self.read_error.emit(str(e))
+                break
+            if record is None:
+                if not self.camera.is_reading:
+                    time.sleep(self.camera.sec)
+                continue
+            if record.dropped:
+                self.frames_dropped.emit(record.dropped, record.sequence)
+            self.buffer.publish(record)
+            self.frame_ready.emit()
+
+    def stop(self):
+        """Finishes the reading loop and waits for the thread.
+        """
+        self.is_running = False
+        self.wait()
+
+
+class CaptureGroup():
+    """Cameras whose frames are grabbed together.
+
+    read_set() grabs a frame from every camera back to back, and only then
+    retrieves (decodes) them, so that the capture times are as close as the
+    cameras allow. The frames are returned as a FrameSet with the skew, the
+    spread of the capture times.
+
+    While recording, every set is written to the recorder of each camera, so the
+    n-th frame of each video belongs to the same set, and the capture times of
+    each set are written into a csv file.
+
+    Args:
+        cameras (list): Cameras of the group
+    """
+
+    def __init__(self, cameras: list):
+        self.cameras = cameras
+        self.lock = threading.Lock()
+        self.index = 0
+        self.frame_set = None
+        self.max_skew = 0.0
+        self.total_skew = 0.0
+        self.incomplete = 0
+        self.timestamp_file = None
+
+    @property
+    def is_reading(self) -> bool:
+        return all(camera.is_reading for camera in self.cameras)
+
+    def read_set(self) -> FrameSet:
+        """Reads one frame from every camera.
+
+        The caller owns the records of the returned set and must give each of them
+        back with release_record of its camera.
+
+        Returns:
+            FrameSet: The frames. None if reading is paused or a camera has no frame ready.
+
+        Raises:
+            RuntimeError: A camera cannot read the next frame.
+        """
+        if not self.is_reading:
+            return None
+        for camera in self.cameras:
+            camera.wait_frame()
+        with self.lock, ExitStack() as stack:
+            for camera in self.cameras:
+                stack.enter_context(camera.lock)
+            grabbed = [camera.grab_frame() for camera in self.cameras]
+            records = [
+                camera.retrieve_frame() if ok else None
+                for camera, ok in zip(self.cameras, grabbed)
+                ]
+            if not all(grabbed):
+                self.incomplete += 1
+                for camera, record in zip(self.cameras, records):
+                    camera.release_record(record)
+                return None
+            frame_set = FrameSet(self.index, records)
+            self.index += 1
+            self.max_skew = max(self.max_skew, frame_set.skew)
+            self.total_skew += frame_set.skew
+            if self.timestamp_file is not None:
+                self.write_timestamps(frame_set)
+            self.set_frame_set(frame_set)
+        return frame_set
+
+    def set_frame_set(self, frame_set: FrameSet):
+        """Replaces the latest set kept for saving. Must be called with the lock held.
+        """
+        for camera, record in zip(self.cameras, frame_set.records):
+            camera.pool.retain(record.frame)
+        self.release_set(self.frame_set)
+        self.frame_set = frame_set
+
+    def hold_set(self) -> FrameSet:
+        """Gets the latest set for saving.
+
+        The set must be given back with release_set() when it is no longer used.
+
+        Returns:
+            FrameSet: The latest set. None if no set has been read.
+        """
+        with self.lock:
+            if self.frame_set is not None:
+                for camera, record in zip(self.cameras, self.frame_set.records):
+                    camera.pool.retain(record.frame)
+            return self.frame_set
+
+    def release_set(self, frame_set: FrameSet):
+        """Gives the buffers of the set back to the pools.
+
+        Args:
+            frame_set (FrameSet): The set. None is ignored.
+        """
+        if frame_set is not None:
+            for camera, record in zip(self.cameras, frame_set.records):
+                camera.release_record(record)
+
+    def start_recording(self, filenames: list, codec: str, timestamp_filename: str):
+        """Starts recording all cameras from the same set.
+
+        Args:
+            filenames (list): Filename of the video of each camera
+            codec (str): Codec
+            timestamp_filename (str): Filename of the csv of the capture times
+        """
+        with self.lock:
+            for camera, filename in zip(self.cameras, filenames):
+                camera.start_recording(filename, codec)
+            self.timestamp_file = open(timestamp_filename, "w")
+            header = ["set"]
+            header.extend("video{}".format(camera.device) for camera in self.cameras)
+            header.append("skew")
+            self.timestamp_file.write(",".join(header) + "\n")
+
+    def stop_recording(self):
+        """Stops recording all cameras after the same set.
+        """
+        with self.lock:
+            for camera in self.cameras:
+                camera.stop_recording()
+            self.timestamp_file.close()
+            self.timestamp_file = None
+
+    def write_timestamps(self, frame_set: FrameSet):
+        values = [str(frame_set.index)]
+        values.extend("{:.6f}".format(record.timestamp) for record in frame_set.records)
+        values.append("{:.6f}".format(frame_set.skew))
+        self.timestamp_file.write(",".join(values) + "\n")
+
+    def get_counters(self) -> dict:
+        """Gets the statistics of the group.
+
+        Returns:
+            dict: The number of sets, incomplete sets, the mean and max skew in msec.
+        """
+        with self.lock:
+            return {
+                "sets": self.index,
+                "incomplete sets": self.incomplete,
+                "mean skew [ms]": "{:.3f}".format(self.total_skew / self.index * 1000 if self.index else 0),
+                "max skew [ms]": "{:.3f}".format(self.max_skew * 1000),
+            }
+
+
+class GroupCaptureWorker(QThread):
+    """Thread reading the cameras of a CaptureGroup.
+
+    The record of each camera in a set is published into the buffer of the camera,
+    so the sets are displayed like frames read by CaptureWorker. frames_dropped is
+    emitted with the index of the camera, the number of lost frames and the sequence
+    number of the frame following them.
+
+    Args:
+        group (CaptureGroup): The cameras to read
+        buffers (list): FrameBuffer of each camera
+    """
+
+    frame_ready = Signal()
+    frames_dropped = Signal(int, int, int)
+    read_error = Signal(str)
+
+    def __init__(self, group: CaptureGroup, buffers: list, parent=None):
+        super().__init__(parent)
+        self.group = group
+        self.buffers = buffers
+        self.is_running = False
+
+    def run(self):
+        """Reads sets until stop() is called.
+        """
+        self.is_running = True
+        while self.is_running:
+            try:
+                frame_set = self.group.read_set()
+            except RuntimeError as e:
+                self.is_running = False
+                self.read_error.emit(str(e))
+                break
+            if frame_set is None:
+                if not self.group.is_reading:
+                    time.sleep(min(camera.sec for camera in self.group.cameras))
+                continue
+            for index, (record, buffer) in enumerate(zip(frame_set.records, self.buffers)):
+                if record.dropped:
+                    self.frames_dropped.emit(index, record.dropped, record.sequence)
+                buffer.publish(record)
+            self.frame_ready.emit()
+
+    def stop(self):
+        """Finishes the reading loop and waits for the thread.
+        """
+        self.is_running = False
+        self.wait()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Values of the camera controls, separated from the widgets showing them.
+
+A ControlState holds the controls of a camera: the description of each control
+(ControlSpec), and its value and flags in small arrays. Every change increments
+the version of the state, and snapshot() returns the values of the current
+version as an immutable ControlSnapshot, which is created once per version and
+shared by all frames captured while the values do not change.
+"""
+import threading
+from array import array
+
+from ctrlinfo import parse_flags
+
+
+def control_value(value):
+    """Converts a control value into an int.
+
+    Returns:
+        int: The value. None if the control has no integer value (e.g. a button,
+            or a string control).
+    """
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(str(value), 0)
+    except ValueError:
+        return None
+
+
+class ControlSpec():
+    """Description of a control, which does not change while the camera is open.
+
+    Args:
+        name (str): Control name
+        minimum (int): Minimum value
+        maximum (int): Maximum value
+        step (int): Step of the value
+        default (int): Default value
+        menu (dict, optional): Label of each menu index. Defaults to None.
+    """
+
+    __slots__ = ("name", "minimum", "maximum", "step", "default", "menu")
+
+    def __init__(self, name: str, minimum: int, maximum: int, step: int, default: int, menu: dict = None):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.default = default
+        self.menu = menu
+
+    @classmethod
+    def from_params(cls, name: str, params: dict):
+        """Creates the spec of a control in the shape of Camera.get_current_params.
+        """
+        return cls(
+            name, control_value(params.get("min")), control_value(params.get("max")),
+            control_value(params.get("step")), control_value(params.get("default")),
+            params.get("menu") or None
+        )
+
+
+class ControlSnapshot():
+    """Control values at one version of a ControlState. Never modified.
+
+    Args:
+        version (int): Version of the state
+        names (tuple): Control names
+        values (tuple): Value of each control. None if the control has no value.
+    """
+
+    __slots__ = ("version", "names", "values")
+
+    def __init__(self, version: int, names: tuple, values: tuple):
+        self.version = version
+        self.names = names
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get(self, name: str, default=None):
+        try:
+            value = self.values[self.names.index(name)]
+        except ValueError:
+            return default
+        return default if value is None else value
+
+    def items(self) -> list:
+        """Gets the controls which have a value.
+
+        Returns:
+            list: (name, value) of each control.
+        """
+        return [(name, value) for name, value in zip(self.names, self.values) if value is not None]
+
+    def as_dict(self) -> dict:
+        return dict(self.items())
+
+
+class ControlState():
+    """Controls of a camera and their current values and flags.
+
+    The values are updated from the threads of the ControlWriter and the
+    ControlWatcher, and read from the capture worker through snapshot(), so the
+    state is guarded by a lock.
+
+    Args:
+        params (dict, optional): Controls in the shape of Camera.get_current_params.
+            Defaults to None.
+    """
+
+    def __init__(self, params: dict = None):
+        self.lock = threading.Lock()
+        self.specs = []
+        self.index = {}
+        self.values = array("q")
+        self.valid = bytearray()
+        self.flags = array("L")
+        self.version = 0
+        self.names = ()
+        self.last_snapshot = ControlSnapshot(0, (), ())
+        if params:
+            self.load(params)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def load(self, params: dict):
+        """Adds controls, or replaces the specs, values and flags of known controls.
+
+        Args:
+            params (dict): Controls in the shape of Camera.get_current_params
+        """
+        with self.lock:
+            for name, values in params.items():
+                spec = ControlSpec.from_params(name, values)
+                value = control_value(values.get("value"))
+                flags = parse_flags(values.get("flags") or "")
+                slot = self.index.get(name)
+                if slot is None:
+                    slot = len(self.specs)
+                    self.index[name] = slot
+                    self.specs.append(spec)
+                    self.values.append(0)
+                    self.valid.append(0)
+                    self.flags.append(0)
+                else:
+                    self.specs[slot] = spec
+                self.values[slot] = value or 0
+                self.valid[slot] = value is not None
+                self.flags[slot] = flags
+            self.names = tuple(spec.name for spec in self.specs)
+            self.version += 1
+
+    def spec(self, name: str) -> ControlSpec:
+        return self.specs[self.index[name]]
+
+    def value(self, name: str) -> int:
+        """Gets the value of a control.
+
+        Returns:
+            int: The value. None if the control has no value or is unknown.
+        """
+        slot = self.index.get(name)
+        if slot is None or not self.valid[slot]:
+            return None
+        return self.values[slot]
+
+    def get_flags(self, name: str) -> int:
+        slot = self.index.get(name)
+        return 0 if slot is None else self.flags[slot]
+
+    def update(self, values: dict) -> bool:
+        """Sets the values of controls. Unknown controls are ignored.
+
+        Args:
+            values (dict): Value of each control name
+
+        Returns:
+            bool: True if any value has changed.
+        """
+        changed = False
+        with self.lock:
+            for name, value in values.items():
+                slot = self.index.get(name)
+                value = control_value(value)
+                if slot is None or value is None:
+                    continue
+                if not self.valid[slot] or self.values[slot] != value:
+                    self.values[slot] = value
+                    self.valid[slot] = 1
+                    changed = True
+            if changed:
+                self.version += 1
+        return changed
+
+    def set_flags(self, name: str, flags: int) -> bool:
+        """Sets the flags (V4L2_CTRL_FLAG_*) of a control.
+
+        Returns:
+            bool: True if the flags have changed.
+        """
+        with self.lock:
+            slot = self.index.get(name)
+            if slot is None or self.flags[slot] == flags:
+                return False
+            self.flags[slot] = flags
+            self.version += 1
+        return True
+
+    def snapshot(self) -> ControlSnapshot:
+        """Gets the values of the current version.
+
+        The snapshot is created only when the version has changed since the last
+        call, so that the frames captured with the same values share it.
+
+        Returns:
+            ControlSnapshot: The values.
+        """
+        snapshot = self.last_snapshot
+        if snapshot.version == self.version:
+            # Called for every frame, so the lock is taken only when the values have changed.
+            return snapshot
+        with self.lock:
+            if self.last_snapshot.version != self.version:
+                values = tuple(
+                    value if valid else None for value, valid in zip(self.values, self.valid))
+                self.last_snapshot = ControlSnapshot(self.version, self.names, values)
+            return self.last_snapshot
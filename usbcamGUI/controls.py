@@ -0,0 +1,721 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""V4L2 controls and format enumeration through ioctl.
+
+V4L2Controls keeps the device node open and queries, reads and writes controls
+with VIDIOC_QUERY_EXT_CTRL, G_EXT_CTRLS/S_EXT_CTRLS and G_CTRL/S_CTRL, so that
+changing a control costs one ioctl instead of running v4l2-ctl. The results have
+the same shape as the v4l2-ctl based methods of v4l.V4L2, which are still used
+when ioctl is not available (no fcntl, or the device cannot be opened).
+"""
+import ctypes
+import errno
+from typing import Callable
+
+import v4l2_api as v4l2
+import stream
+from stream import DeviceFile
+from capcache import usb_attributes
+from capindex import CapabilityIndex
+from ctrlinfo import ControlInfo, control_name, vidcap_classes
+from v4l import V4L2
+
+
+# Controls which make other controls inactive or read-only, such as manual exposure
+# while auto exposure is on. They are written first when several controls are set.
+# Both the current names and the names of older kernels are listed.
+mode_controls = (
+    "auto_exposure",
+    "exposure_auto",
+    "exposure_dynamic_framerate",
+    "exposure_auto_priority",
+    "white_balance_automatic",
+    "white_balance_temperature_auto",
+    "white_balance_auto_preset",
+    "focus_automatic_continuous",
+    "focus_auto",
+    "gain_automatic",
+    "autogain",
+    "hue_automatic",
+    "hue_auto",
+    "iso_sensitivity_auto",
+)
+
+
+def order_controls(values: dict) -> dict:
+    """Orders control values so that mode controls are written first.
+
+    Switching auto exposure to manual must come before writing the exposure time,
+    which the driver rejects while it is inactive. The order of the other
+    controls is kept.
+
+    Args:
+        values (dict): Value of each control name
+
+    Returns:
+        dict: The values in the order to be written.
+    """
+    modes = [name for name in mode_controls if name in values]
+    ordered = {name: values[name] for name in modes}
+    ordered.update((name, value) for name, value in values.items() if name not in ordered)
+    return ordered
+
+
+class V4L2Controls():
+    """Controls and formats of a V4L2 device accessed through ioctl.
+
+    The controls are enumerated once when the device is opened, then looked up by
+    name. When ioctl cannot be used, every method runs the v4l2-ctl based method
+    of V4L2 instead.
+
+    With a CapabilityCache, the control descriptors and the format table of a known
+    camera are loaded from the cache instead of being enumerated. Only the current
+    control values and flags are read from the device.
+
+    Args:
+        device (int): Device number N of /dev/videoN.
+        device_file (optional): Opened device layer (DeviceFile or FakeDevice) to
+            share, such as the device of a V4L2Stream. By default /dev/videoN is
+            opened by this object.
+        cache (CapabilityCache, optional): Cache of the capabilities. Defaults to
+            None, which enumerates the capabilities every time.
+    """
+
+    def __init__(self, device: int, device_file=None, cache=None):
+        self.device = device
+        self.device_file = device_file
+        self.owns_device = device_file is None
+        self.cache = cache
+        self.identity = None
+        self.infos = {}
+        self.formats = None
+        self.index = None
+        self.is_ioctl = False
+        self.is_cached = False
+        self.subscribed = {}
+
+    def open(self) -> bool:
+        """Opens the device and gets its controls, from the cache if possible.
+
+        Returns:
+            bool: True if ioctl is used, False if v4l2-ctl is used.
+        """
+        if self.owns_device:
+            if stream.fcntl is None:
+                return False
+            self.device_file = DeviceFile("/dev/video{}".format(self.device))
+            try:
+                self.device_file.open()
+            except OSError:
+                self.device_file = None
+                return False
+        try:
+            self.identity = self.get_identity()
+            self.is_ioctl = True
+            if not self.load_cache():
+                self.infos = self.query_controls()
+                self.save_cache()
+        except OSError:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self.owns_device and self.device_file is not None:
+            self.device_file.close()
+        self.device_file = None
+        self.is_ioctl = False
+
+    def get_identity(self) -> dict:
+        """Gets the identity of the camera from VIDIOC_QUERYCAP and sysfs.
+
+        Returns:
+            dict: driver, card, bus_info, serial, version (of the driver) and
+                firmware (bcdDevice of a USB camera).
+        """
+        cap = self.ioctl(v4l2.VIDIOC_QUERYCAP, v4l2.v4l2_capability())
+        identity = {
+            "driver": cap.driver.decode(errors="replace"),
+            "card": cap.card.decode(errors="replace"),
+            "bus_info": cap.bus_info.decode(errors="replace"),
+            "serial": "",
+            "version": "{}.{}.{}".format(cap.version >> 16, (cap.version >> 8) & 0xFF, cap.version & 0xFF),
+            "firmware": "",
+        }
+        if identity["bus_info"].startswith("usb"):
+            identity.update(usb_attributes(self.device))
+        return identity
+
+    def load_cache(self) -> bool:
+        """Loads the control descriptors and the format table from the cache.
+
+        The current flags of the controls are read from the device (see read_flags).
+
+        Returns:
+            bool: False if the camera is not cached, or a cached control is not
+                found on the device.
+        """
+        if self.cache is None:
+            return False
+        entry = self.cache.load(self.identity)
+        if entry is None:
+            return False
+        try:
+            infos = [ControlInfo.from_list(item) for item in entry["controls"]]
+            formats = [tuple(item) for item in entry["formats"]]
+        except (KeyError, TypeError, ValueError):
+            return False
+        try:
+            self.read_flags(infos)
+        except OSError:
+            return False
+        self.infos = {info.name: info for info in infos}
+        self.formats = formats
+        self.is_cached = True
+        return True
+
+    def save_cache(self):
+        """Stores the control descriptors and the format table into the cache.
+
+        The format table is enumerated here, so that the next launch skips it.
+        Nothing is stored if the formats cannot be enumerated through ioctl.
+        """
+        if self.cache is None:
+            return
+        try:
+            self.formats = self.enum_all_formats()
+        except OSError:
+            return
+        controls = [info.to_list() for info in self.infos.values()]
+        self.cache.save(self.identity, self.formats, controls)
+
+    def ioctl(self, request: int, arg):
+        return self.device_file.ioctl(request, arg)
+
+    def read_flags(self, infos: list):
+        """Reads the current flags of controls with one VIDIOC_QUERY_EXT_CTRL each.
+
+        VIDIOC_QUERYCTRL is used on older kernels.
+
+        Args:
+            infos (list): ControlInfo of the controls, whose flags are updated.
+
+        Raises:
+            OSError: A control is not found on the device.
+        """
+        query = v4l2.v4l2_query_ext_ctrl()
+        request = v4l2.VIDIOC_QUERY_EXT_CTRL
+        for info in infos:
+            query.id = info.id
+            try:
+                self.ioctl(request, query)
+            except OSError as e:
+                if e.errno != errno.ENOTTY or request == v4l2.VIDIOC_QUERYCTRL:
+                    raise
+                query = v4l2.v4l2_queryctrl(info.id)
+                request = v4l2.VIDIOC_QUERYCTRL
+                self.ioctl(request, query)
+            info.flags = query.flags
+
+    def query_controls(self) -> dict:
+        """Enumerates the controls of the device.
+
+        VIDIOC_QUERY_EXT_CTRL is used, or VIDIOC_QUERYCTRL on older kernels.
+        Disabled controls and control class headers are skipped. The items of
+        menu controls are queried with VIDIOC_QUERYMENU.
+
+        Returns:
+            dict: ControlInfo of each control name in the order of the driver.
+        """
+        try:
+            controls = self.query_ext_controls()
+        except OSError as e:
+            if e.errno not in (errno.ENOTTY, errno.EINVAL):
+                raise
+            controls = self.query_std_controls()
+        infos = {}
+        for info in controls:
+            if info.type == v4l2.V4L2_CTRL_TYPE_CTRL_CLASS or info.flags & v4l2.V4L2_CTRL_FLAG_DISABLED:
+                continue
+            if info.is_menu:
+                info.menu = self.query_menu(info)
+            infos[info.name] = info
+        return infos
+
+    def query_ext_controls(self) -> list:
+        controls = []
+        query = v4l2.v4l2_query_ext_ctrl()
+        query.id = v4l2.V4L2_CTRL_FLAG_NEXT_CTRL
+        while True:
+            try:
+                self.ioctl(v4l2.VIDIOC_QUERY_EXT_CTRL, query)
+            except OSError as e:
+                if e.errno == errno.EINVAL and controls:
+                    break
+                raise
+            controls.append(self.new_info(query))
+            query.id |= v4l2.V4L2_CTRL_FLAG_NEXT_CTRL
+        return controls
+
+    def query_std_controls(self) -> list:
+        controls = []
+        query = v4l2.v4l2_queryctrl()
+        query.id = v4l2.V4L2_CTRL_FLAG_NEXT_CTRL
+        while True:
+            try:
+                self.ioctl(v4l2.VIDIOC_QUERYCTRL, query)
+            except OSError as e:
+                if e.errno == errno.EINVAL:
+                    break
+                raise
+            controls.append(self.new_info(query))
+            query.id |= v4l2.V4L2_CTRL_FLAG_NEXT_CTRL
+        return controls
+
+    @staticmethod
+    def new_info(query) -> ControlInfo:
+        return ControlInfo(
+            query.id,
+            query.type,
+            control_name(query.name.decode(errors="replace")),
+            query.minimum,
+            query.maximum,
+            query.step,
+            query.default_value,
+            query.flags
+        )
+
+    def read_values(self, infos: list) -> list:
+        """Reads the current values of controls with one VIDIOC_G_EXT_CTRLS.
+
+        Falls back to VIDIOC_G_CTRL for each control if the driver rejects the
+        request.
+
+        Args:
+            infos (list): ControlInfo of the controls
+
+        Returns:
+            list: Value of each control. None for controls which cannot be read.
+        """
+        readable = [info for info in infos if info.is_readable]
+        values = {}
+        if readable:
+            array = (v4l2.v4l2_ext_control * len(readable))()
+            for ctrl, info in zip(array, readable):
+                ctrl.id = info.id
+            ext = v4l2.v4l2_ext_controls()
+            ext.which = v4l2.V4L2_CTRL_WHICH_CUR_VAL
+            ext.count = len(readable)
+            ext.controls = ctypes.cast(array, ctypes.POINTER(v4l2.v4l2_ext_control))
+            try:
+                self.ioctl(v4l2.VIDIOC_G_EXT_CTRLS, ext)
+                for ctrl, info in zip(array, readable):
+                    is_64 = info.type == v4l2.V4L2_CTRL_TYPE_INTEGER64
+                    values[info.id] = ctrl.u.value64 if is_64 else ctrl.u.value
+            except OSError:
+                for info in readable:
+                    try:
+                        values[info.id] = self.get_control(info.id)
+                    except OSError:
+                        pass
+        return [values.get(info.id) for info in infos]
+
+    def get_control(self, id_: int) -> int:
+        ctrl = v4l2.v4l2_control(id_, 0)
+        self.ioctl(v4l2.VIDIOC_G_CTRL, ctrl)
+        return ctrl.value
+
+    def set_control(self, info: ControlInfo, value: int):
+        """Writes a control value.
+
+        64 bit controls are written with VIDIOC_S_EXT_CTRLS, others with VIDIOC_S_CTRL.
+
+        Raises:
+            OSError: The value is rejected by the driver.
+        """
+        if info.type == v4l2.V4L2_CTRL_TYPE_INTEGER64:
+            self.set_controls({info.name: value})
+            return
+        self.ioctl(v4l2.VIDIOC_S_CTRL, v4l2.v4l2_control(info.id, int(value)))
+
+    def set_controls(self, values: dict):
+        """Writes several control values with one VIDIOC_S_EXT_CTRLS.
+
+        The driver applies all values or none of them.
+
+        Args:
+            values (dict): Value of each control name.
+
+        Raises:
+            KeyError: Unknown control name.
+            OSError: The values are rejected by the driver.
+        """
+        infos = [self.infos[name] for name in values]
+        array = (v4l2.v4l2_ext_control * len(infos))()
+        for ctrl, info, value in zip(array, infos, values.values()):
+            ctrl.id = info.id
+            if info.type == v4l2.V4L2_CTRL_TYPE_INTEGER64:
+                ctrl.u.value64 = int(value)
+            else:
+                ctrl.u.value = int(value)
+        ext = v4l2.v4l2_ext_controls()
+        ext.which = v4l2.V4L2_CTRL_WHICH_CUR_VAL
+        ext.count = len(infos)
+        ext.controls = ctypes.cast(array, ctypes.POINTER(v4l2.v4l2_ext_control))
+        self.ioctl(v4l2.VIDIOC_S_EXT_CTRLS, ext)
+
+    def get_menu(self, param: str) -> dict:
+        """Gets the items of a menu control.
+
+        Args:
+            param (str): Control name
+
+        Returns:
+            dict: Name (or value for an integer menu) of each menu index. Empty if
+                the control is not a menu.
+        """
+        if not self.is_ioctl:
+            info = V4L2.list_controls(self.device).infos.get(param)
+        else:
+            info = self.infos.get(param)
+        if info is None or not info.menu:
+            return {}
+        return dict(info.menu)
+
+    def query_menu(self, info: ControlInfo) -> dict:
+        """Queries the items of a menu control with VIDIOC_QUERYMENU.
+
+        Returns:
+            dict: Name (or value for an integer menu) of each menu index.
+        """
+        menu = {}
+        query = v4l2.v4l2_querymenu()
+        for index in range(info.minimum, info.maximum + 1):
+            query.id = info.id
+            query.index = index
+            try:
+                self.ioctl(v4l2.VIDIOC_QUERYMENU, query)
+            except OSError:
+                # Indexes which are not supported by the driver are skipped.
+                continue
+            if info.type == v4l2.V4L2_CTRL_TYPE_MENU:
+                menu[index] = query.menu.name.decode(errors="replace")
+            else:
+                menu[index] = query.menu.value
+        return menu
+
+    def get_supported_params(self) -> list:
+        if not self.is_ioctl:
+            return V4L2.get_supported_params(self.device)
+        return [name for name, info in self.infos.items() if v4l2.ctrl_id2class(info.id) in vidcap_classes]
+
+    def get_current_params(self, param_type: str, plist: list = None) -> dict:
+        """Gets the controls and their current values.
+
+        Args:
+            param_type (str): "full" for all controls of the user and camera classes,
+                otherwise the controls in plist.
+            plist (list, optional): Control names. Defaults to None.
+
+        Returns:
+            dict: Dict of each control name in the shape of V4L2.get_current_params.
+        """
+        if not self.is_ioctl:
+            return V4L2.get_current_params(self.device, param_type, plist)
+        if param_type == "full":
+            names = self.get_supported_params()
+        else:
+            names = [name for name in (plist or []) if name in self.infos]
+        infos = [self.infos[name] for name in names]
+        try:
+            values = self.read_values(infos)
+        except OSError:
+            return V4L2.get_current_params(self.device, param_type, plist)
+        return {info.name: info.as_dict(value) for info, value in zip(infos, values)}
+
+    def change_param(self, param: str, value: int, func: Callable) -> bool:
+        """Changes a control value.
+
+        Args:
+            param (str): Control name
+            value (int): Value to be set.
+            func (Callable): Function writing an error message.
+
+        Returns:
+            bool: True if the value is set.
+        """
+        info = self.infos.get(param)
+        if not self.is_ioctl or info is None:
+            return V4L2.change_param(self.device, param, value, func)
+        try:
+            self.set_control(info, value)
+        except OSError as e:
+            func("Input parameter ({}) is invalid ! {}".format(param, e.strerror), level="err", color="red")
+            return False
+        return True
+
+    def apply_controls(self, values: dict, func: Callable) -> dict:
+        """Writes several control values in one round trip.
+
+        The values are ordered with order_controls() and written with one
+        VIDIOC_S_EXT_CTRLS. If the driver rejects the request, each control is
+        written alone in the same order, to find which values are rejected.
+
+        Args:
+            values (dict): Value of each control name
+            func (Callable): Function writing an error message.
+
+        Returns:
+            dict: Error message of each control which is not set.
+        """
+        values = order_controls(values)
+        if not self.is_ioctl:
+            return V4L2.change_params(self.device, values, func)
+        failures = {name: "unknown control" for name in values if name not in self.infos}
+        known = {name: value for name, value in values.items() if name not in failures}
+        try:
+            if known:
+                self.set_controls(known)
+        except OSError:
+            for name, value in known.items():
+                try:
+                    self.set_control(self.infos[name], value)
+                except OSError as e:
+                    failures[name] = e.strerror
+        for name, text in failures.items():
+            func("Input parameter ({}) is invalid ! {}".format(name, text), level="err", color="red")
+        return failures
+
+    def set_param_default(self, current_param: dict, func: Callable):
+        """Sets the controls in current_param to their default values.
+
+        Returns:
+            dict: current_param with slider_val updated. -1 if a value is rejected.
+        """
+        defaults = {param: val["default"] for param, val in current_param.items() if val["default"] is not None}
+        if self.apply_controls(defaults, func):
+            return -1
+        for param, default in defaults.items():
+            current_param[param]["slider_val"] = default
+        return current_param
+
+    def subscribe_events(self, names: list = None) -> list:
+        """Subscribes to V4L2_EVENT_CTRL of controls.
+
+        Changes of value made through this device are not sent back, since
+        V4L2_EVENT_SUB_FL_ALLOW_FEEDBACK is not set. Changes of flags, such as the
+        exposure time becoming inactive when auto exposure is set, are always sent.
+
+        Args:
+            names (list, optional): Control names. Defaults to None, which
+                subscribes to all controls.
+
+        Returns:
+            list: The subscribed control names. Empty if the driver has no events.
+        """
+        if not self.is_ioctl:
+            return []
+        sub = v4l2.v4l2_event_subscription()
+        sub.type = v4l2.V4L2_EVENT_CTRL
+        for name in self.infos if names is None else names:
+            info = self.infos.get(name)
+            if info is None or name in self.subscribed.values():
+                continue
+            sub.id = info.id
+            try:
+                self.ioctl(v4l2.VIDIOC_SUBSCRIBE_EVENT, sub)
+            except OSError as e:
+                if e.errno == errno.ENOTTY:
+                    break
+                continue
+            self.subscribed[info.id] = name
+        return list(self.subscribed.values())
+
+    def unsubscribe_events(self):
+        sub = v4l2.v4l2_event_subscription()
+        sub.type = v4l2.V4L2_EVENT_CTRL
+        for id_ in self.subscribed:
+            sub.id = id_
+            try:
+                self.ioctl(v4l2.VIDIOC_UNSUBSCRIBE_EVENT, sub)
+            except OSError:
+                pass
+        self.subscribed = {}
+
+    def wait_event(self, timeout: float) -> bool:
+        """Waits until an event can be dequeued.
+
+        Returns:
+            bool: False if timed out.
+        """
+        return self.device_file.wait_event(timeout)
+
+    def dequeue_events(self) -> list:
+        """Dequeues the pending control events with VIDIOC_DQEVENT.
+
+        The flags and the range of the control descriptors are updated with the
+        events. The driver merges the events of a control which are not dequeued
+        yet, so each control appears once with the latest value and flags.
+
+        Returns:
+            list: (name, changes, value, flags) of each event. changes is a mask of
+                V4L2_EVENT_CTRL_CH_VALUE, CH_FLAGS and CH_RANGE.
+        """
+        events = []
+        event = v4l2.v4l2_event()
+        while True:
+            try:
+                self.ioctl(v4l2.VIDIOC_DQEVENT, event)
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    break
+                raise
+            name = self.subscribed.get(event.id)
+            if event.type == v4l2.V4L2_EVENT_CTRL and name is not None:
+                ctrl = event.u.ctrl
+                info = self.infos[name]
+                info.flags = ctrl.flags
+                if ctrl.changes & v4l2.V4L2_EVENT_CTRL_CH_RANGE:
+                    info.minimum, info.maximum = ctrl.minimum, ctrl.maximum
+                    info.step, info.default = ctrl.step, ctrl.default_value
+                is_64 = ctrl.type == v4l2.V4L2_CTRL_TYPE_INTEGER64
+                value = ctrl.u.value64 if is_64 else ctrl.u.value
+                events.append((name, ctrl.changes, value, ctrl.flags))
+            if not event.pending:
+                break
+        return events
+
+    def enum_formats(self) -> list:
+        """Enumerates the pixel formats with VIDIOC_ENUM_FMT.
+
+        Returns:
+            list: Fourcc of each pixel format.
+        """
+        formats = []
+        desc = v4l2.v4l2_fmtdesc()
+        desc.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        while True:
+            desc.index = len(formats)
+            try:
+                self.ioctl(v4l2.VIDIOC_ENUM_FMT, desc)
+            except OSError as e:
+                if e.errno == errno.EINVAL:
+                    break
+                raise
+            formats.append(v4l2.fourcc_string(desc.pixelformat))
+        return formats
+
+    def enum_framesizes(self, fourcc: str) -> list:
+        """Enumerates the frame sizes of a pixel format with VIDIOC_ENUM_FRAMESIZES.
+
+        A stepwise or continuous range gives its minimum and maximum size, like
+        v4l2-ctl prints it.
+
+        Returns:
+            list: (width, height) of each frame size.
+        """
+        sizes = []
+        frmsize = v4l2.v4l2_frmsizeenum()
+        index = 0
+        while True:
+            frmsize.index = index
+            frmsize.pixel_format = v4l2.fourcc_code(fourcc)
+            try:
+                self.ioctl(v4l2.VIDIOC_ENUM_FRAMESIZES, frmsize)
+            except OSError as e:
+                if e.errno == errno.EINVAL:
+                    break
+                raise
+            if frmsize.type == v4l2.V4L2_FRMSIZE_TYPE_DISCRETE:
+                sizes.append((frmsize.size.discrete.width, frmsize.size.discrete.height))
+            else:
+                step = frmsize.size.stepwise
+                sizes.append((step.min_width, step.min_height))
+                sizes.append((step.max_width, step.max_height))
+                break
+            index += 1
+        return sizes
+
+    def enum_frameintervals(self, fourcc: str, width: int, height: int) -> list:
+        """Enumerates the frame rates of a frame size with VIDIOC_ENUM_FRAMEINTERVALS.
+
+        A stepwise or continuous range gives its maximum and minimum FPS.
+
+        Returns:
+            list: FPS of each frame interval.
+        """
+        rates = []
+        frmival = v4l2.v4l2_frmivalenum()
+        index = 0
+        while True:
+            frmival.index = index
+            frmival.pixel_format = v4l2.fourcc_code(fourcc)
+            frmival.width = width
+            frmival.height = height
+            try:
+                self.ioctl(v4l2.VIDIOC_ENUM_FRAMEINTERVALS, frmival)
+            except OSError as e:
+                if e.errno == errno.EINVAL:
+                    break
+                raise
+            if frmival.type == v4l2.V4L2_FRMIVAL_TYPE_DISCRETE:
+                fractions = [frmival.interval.discrete]
+            else:
+                fractions = [frmival.interval.stepwise.min, frmival.interval.stepwise.max]
+            for fract in fractions:
+                if fract.numerator:
+                    rates.append(fract.denominator / fract.numerator)
+            if frmival.type != v4l2.V4L2_FRMIVAL_TYPE_DISCRETE:
+                break
+            index += 1
+        return rates
+
+    def enum_all_formats(self) -> list:
+        """Enumerates every fourcc, frame size and frame rate through ioctl.
+
+        Returns:
+            list: (fourcc, width, height, fps) of each format.
+        """
+        formats = []
+        for fourcc in self.enum_formats():
+            for width, height in self.enum_framesizes(fourcc):
+                for fps in self.enum_frameintervals(fourcc, width, height):
+                    formats.append((fourcc, width, height, fps))
+        return formats
+
+    def get_formats(self) -> list:
+        """Gets the table of formats supported by the device.
+
+        The table is built in one pass the first time, through ioctl or from one
+        `v4l2-ctl --list-formats-ext`, then kept.
+
+        Returns:
+            list: (fourcc, width, height, fps) of each format.
+        """
+        if self.formats is None:
+            formats = None
+            if self.is_ioctl:
+                try:
+                    formats = self.enum_all_formats()
+                except OSError:
+                    pass
+            if formats is None:
+                formats = V4L2.list_formats(self.device)
+            self.formats = formats
+        return self.formats
+
+    def get_index(self) -> CapabilityIndex:
+        """Gets the index of the format table.
+        """
+        if self.index is None:
+            self.index = CapabilityIndex(self.get_formats())
+        return self.index
+
+    def get_supported_fourcc(self) -> list:
+        return self.get_index().fourcc()
+
+    def get_supported_size(self, fourcc: str) -> list:
+        return self.get_index().size_list(fourcc)
+
+    def get_supported_fps(self, fourcc: str, width: int, height: int) -> list:
+        return self.get_index().fps_list(fourcc, width, height)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Watching changes of camera controls made outside of the window.
+
+A control can be changed by another application, or by the driver itself, such as
+the exposure time becoming inactive when auto exposure is set. ControlWatcher
+subscribes to V4L2_EVENT_CTRL and waits for the events in its own thread, so that
+the sliders follow the camera without reading the controls periodically.
+"""
+from PySide2.QtCore import QThread, Signal
+
+import v4l2_api as v4l2
+
+
+class ControlWatcher(QThread):
+    """Thread dequeuing the control events of a camera.
+
+    The camera must have subscribed to the events (see Camera.subscribe_controls).
+    value_changed is emitted with the control name and its new value, and
+    flags_changed with the control name and its new flags (V4L2_CTRL_FLAG_*).
+
+    Args:
+        camera (Camera): The camera whose controls are watched
+        timeout (float, optional): Seconds waiting for an event before checking
+            whether the thread is stopped. Defaults to 0.2.
+    """
+
+    value_changed = Signal(str, object)
+    flags_changed = Signal(str, int)
+    watch_failed = Signal(str)
+
+    def __init__(self, camera, timeout: float = 0.2, parent=None):
+        super().__init__(parent)
+        self.camera = camera
+        self.timeout = timeout
+        # Set before the thread starts, so that stop() is never missed.
+        self.is_running = True
+        self.events = 0
+
+    def run(self):
+        while self.is_running:
+            try:
+                if not self.camera.wait_control_event(self.timeout):
+                    continue
+                events = self.camera.read_control_events()
+            except OSError as e:
+                self.watch_failed.emit("control events stopped: {}".format(e.strerror))
+                return
+            self.events += len(events)
+            for param, changes, value, flags in events:
+                if changes & v4l2.V4L2_EVENT_CTRL_CH_VALUE:
+                    self.camera.update_controls({param: value})
+                    self.value_changed.emit(param, value)
+                if changes & v4l2.V4L2_EVENT_CTRL_CH_FLAGS:
+                    self.flags_changed.emit(param, flags)
+
+    def stop(self):
+        """Finishes the thread, then unsubscribes from the events.
+        """
+        self.is_running = False
+        self.wait()
+        self.camera.unsubscribe_controls()
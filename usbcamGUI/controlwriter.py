@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Writing camera controls off the GUI thread.
+
+While a slider is dragged, QSlider emits a value for every step. ControlWriter
+keeps only the latest pending value of each control, and writes each control at
+most `rate` times per second from its own thread, so that neither the GUI nor the
+preview waits for the camera.
+
+The other requests to the device, such as changing the format or reading the
+control values, are queued to the same thread as commands, so that all accesses
+of a device are made in order from one thread and the GUI never waits for them.
+"""
+import itertools
+import threading
+import time
+
+from PySide2.QtCore import QThread, Signal
+
+
+class Command():
+    """A request to the device run by ControlWriter, which is used as a future.
+
+    Args:
+        name (str): Name of the command, under which its latency is counted
+        func (Callable): Function called in the thread of the writer
+        args (tuple): Arguments of func
+        callback (Callable, optional): Called with the command in the GUI thread
+            when it is finished. Defaults to None.
+    """
+
+    __slots__ = ("id", "name", "func", "args", "callback", "result", "error",
+                 "queued", "started", "finished", "done")
+
+    ids = itertools.count(1)
+
+    def __init__(self, name: str, func, args: tuple, callback=None):
+        self.id = next(self.ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.result = None
+        self.error = None
+        self.queued = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def run(self):
+        self.started = time.monotonic()
+        try:
+            self.result = self.func(*self.args)
+        except Exception as e:
+            self.error = e
+        self.finished = time.monotonic()
+        self.done.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Waits until the command is finished. Not to be called from the GUI thread.
+
+        Returns:
+            bool: False if timed out.
+        """
+        return self.done.wait(timeout)
+
+    @property
+    def latency(self) -> float:
+        """Seconds from queueing the command to its end."""
+        return self.finished - self.queued
+
+    @property
+    def runtime(self) -> float:
+        """Seconds the command ran."""
+        return self.finished - self.started
+
+
+class LatencyStats():
+    """Latencies of the commands of one name.
+    """
+
+    __slots__ = ("count", "total", "maximum", "runtime")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.runtime = 0.0
+
+    def add(self, latency: float, runtime: float):
+        self.count += 1
+        self.total += latency
+        self.maximum = max(self.maximum, latency)
+        self.runtime += runtime
+
+    def __str__(self) -> str:
+        return "{} x, mean {:.1f} ms (run {:.1f} ms), max {:.1f} ms".format(
+            self.count, self.total / self.count * 1000, self.runtime / self.count * 1000,
+            self.maximum * 1000)
+
+
+class WriteItem():
+    """Values queued by ControlWriter: the value of one control set by a slider,
+    or a batch of values (param is None, value is the dict of the values).
+    """
+
+    __slots__ = ("param", "value", "urgent")
+
+    def __init__(self, param: str, value):
+        self.param = param
+        self.value = value
+        self.urgent = False
+
+    @property
+    def is_batch(self) -> bool:
+        return self.param is None
+
+
+class ControlWriter(QThread):
+    """Thread writing the control values of a camera.
+
+    The requests are kept in one queue and run in the order they are made: the
+    values of sliders (set_value), batches of values (set_values) and the other
+    requests to the device (submit).
+
+    set_value() only stores the value; a value replaced before being written is
+    never written. The value replaces the queued value of the same control
+    unless a batch or a command has been queued since, in which case it is
+    queued after them. A control written less than 1 / rate seconds ago waits
+    for its next slot, unless flush() is called (e.g. when the slider is
+    released), which writes the pending value right away. So the last value is
+    always applied. The slider values of different controls are written as their
+    slots come, but never after a batch or a command queued later.
+
+    set_values() requests several values which are written together at once, in
+    one round trip if the camera supports it (see Camera.set_parameters).
+
+    submit() queues any other request to the device as a Command.
+    command_done is emitted with the finished command, and its callback is then
+    called by the window in the GUI thread.
+
+    written is emitted with the control name and value after each successful
+    write, write_failed with the control name, value and error message, also
+    when the camera raises. The latency of each write and command is counted by
+    name (see get_latencies).
+
+    Args:
+        camera (Camera): The camera whose controls are written
+        rate (float, optional): Maximum writes per second of each control.
+            Defaults to 30.0. 0 disables the limit.
+    """
+
+    written = Signal(str, int)
+    write_failed = Signal(str, int, str)
+    command_done = Signal(object)
+
+    def __init__(self, camera, rate: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.camera = camera
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.condition = threading.Condition()
+        # WriteItem and Command in the order of the requests.
+        self.queue = []
+        # Slider values queued after the last batch or command, by control name.
+        self.tail = {}
+        self.last_write = {}
+        self.latencies = {}
+        # Set before the thread starts, so that stop() is never missed.
+        self.is_running = True
+        self.requested = 0
+        self.writes = 0
+
+    def set_value(self, param: str, value: int):
+        """Requests a control value. Called from the GUI thread.
+
+        Args:
+            param (str): Control name
+            value (int): Value to be set
+        """
+        with self.condition:
+            item = self.tail.get(param)
+            if item is None:
+                item = self.tail[param] = WriteItem(param, value)
+                self.queue.append(item)
+            else:
+                item.value = value
+            self.requested += 1
+            self.condition.notify()
+
+    def set_values(self, values: dict):
+        """Requests several values to be written together. Called from the GUI thread.
+
+        The values replace the slider values of the same controls queued since
+        the last batch or command, and are written without waiting for the rate
+        limit.
+
+        Args:
+            values (dict): Value of each control name
+        """
+        with self.condition:
+            for param in values:
+                item = self.tail.pop(param, None)
+                if item is not None:
+                    self.queue.remove(item)
+            last = self.queue[-1] if self.queue else None
+            if isinstance(last, WriteItem) and last.is_batch:
+                last.value.update(values)
+            else:
+                self.queue.append(WriteItem(None, dict(values)))
+                self.tail = {}
+            self.requested += len(values)
+            self.condition.notify()
+
+    def submit(self, name: str, func, *args, callback=None) -> Command:
+        """Queues a command. Called from the GUI thread.
+
+        The values requested before are written first, without waiting for the
+        rate limit, and the values requested after are written after the command.
+
+        Args:
+            name (str): Name of the command, such as "format"
+            func (Callable): Function called with args in the thread of the writer
+            callback (Callable, optional): Called with the command in the GUI thread
+                when it is finished. Defaults to None.
+
+        Returns:
+            Command: The queued command. result or error is set when it is done.
+        """
+        command = Command(name, func, args, callback)
+        with self.condition:
+            self.queue.append(command)
+            self.tail = {}
+            self.condition.notify()
+        return command
+
+    def flush(self, param: str = None):
+        """Writes the pending value of a control (all controls if None) without waiting for its slot.
+
+        A control without a pending value is left to the rate limit, so that its
+        next value waits for its slot.
+        """
+        with self.condition:
+            for name, item in self.tail.items():
+                if param is None or name == param:
+                    item.urgent = True
+            self.condition.notify()
+
+    def next_item(self) -> tuple:
+        """Takes the next request which can be run. Must be called with the condition held.
+
+        A batch or a command runs when every request before it has run. A slider
+        value followed by a batch or a command is written without waiting for
+        its slot, so that it is never overtaken.
+
+        Returns:
+            tuple: (item, None), or (None, seconds to wait) if every queued
+                slider value is waiting for its slot.
+        """
+        now = time.monotonic()
+        wait = None
+        for position, item in enumerate(self.queue):
+            if isinstance(item, Command) or item.is_batch:
+                if position == 0:
+                    return self.queue.pop(0), None
+                break
+            queued_last = self.tail.get(item.param) is item
+            if item.urgent or not queued_last or not self.is_running:
+                ready = now
+            else:
+                ready = self.last_write.get(item.param, 0.0) + self.interval
+            if ready <= now:
+                del self.queue[position]
+                if queued_last:
+                    del self.tail[item.param]
+                return item, None
+            wait = ready - now if wait is None else min(wait, ready - now)
+        return None, wait
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.queue:
+                        if not self.is_running:
+                            return
+                        self.condition.wait()
+                        continue
+                    item, wait = self.next_item()
+                    if item is not None:
+                        break
+                    self.condition.wait(wait)
+                if isinstance(item, WriteItem):
+                    now = time.monotonic()
+                    params = item.value if item.is_batch else [item.param]
+                    self.last_write.update((param, now) for param in params)
+                    self.writes += len(params)
+            if isinstance(item, Command):
+                self.run_command(item)
+                continue
+            values = item.value if item.is_batch else {item.param: item.value}
+            try:
+                if item.is_batch:
+                    self.write_batch(values)
+                else:
+                    self.write(item.param, item.value)
+            except Exception as e:
+                # The thread must survive, or every later request would never run.
+                for param, value in values.items():
+                    self.write_failed.emit(param, value, str(e))
+
+    def run_command(self, command: Command):
+        command.run()
+        self.count_latency(command.name, command.latency, command.runtime)
+        self.command_done.emit(command)
+
+    def count_latency(self, name: str, latency: float, runtime: float):
+        with self.condition:
+            if name not in self.latencies:
+                self.latencies[name] = LatencyStats()
+            self.latencies[name].add(latency, runtime)
+
+    def write(self, param: str, value: int):
+        errors = []
+        t0 = time.monotonic()
+        self.camera.set_parameter(param, value, lambda text, **kwargs: errors.append(text))
+        runtime = time.monotonic() - t0
+        self.count_latency("control", runtime, runtime)
+        if errors:
+            self.write_failed.emit(param, value, errors[0])
+        else:
+            self.camera.update_controls({param: value})
+            self.written.emit(param, value)
+
+    def write_batch(self, values: dict):
+        t0 = time.monotonic()
+        failures = self.camera.set_parameters(values, lambda text, **kwargs: None)
+        runtime = time.monotonic() - t0
+        self.count_latency("controls", runtime, runtime)
+        self.camera.update_controls({param: value for param, value in values.items() if param not in failures})
+        for param, value in values.items():
+            if param in failures:
+                self.write_failed.emit(param, value, failures[param])
+            else:
+                self.written.emit(param, value)
+
+    def stop(self):
+        """Writes the pending values and runs the queued commands, then finishes the thread.
+        """
+        with self.condition:
+            # The queued values are written without waiting for their slots.
+            self.is_running = False
+            self.condition.notify()
+        self.wait()
+
+    def get_counters(self) -> dict:
+        """Gets the number of requested and written values.
+
+        Returns:
+            dict: Counters.
+        """
+        with self.condition:
+            return {
+                "requested": self.requested,
+                "written": self.writes,
+                "coalesced": self.requested - self.writes - self.count_pending(),
+            }
+
+    def count_pending(self) -> int:
+        """Counts the queued values. Must be called with the condition held.
+        """
+        return sum(
+            len(item.value) if item.is_batch else 1
+            for item in self.queue if isinstance(item, WriteItem)
+        )
+
+    def get_latencies(self) -> dict:
+        """Gets the latency of the writes and commands.
+
+        The latency of a command is counted from submit(). The latency of a
+        control write is its runtime, since a slider value waits for the rate
+        limit on purpose.
+
+        Returns:
+            dict: LatencyStats of each name. "control" for a single value,
+                "controls" for a batch of values.
+        """
+        with self.condition:
+            return dict(self.latencies)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Descriptors of V4L2 controls, and the parser of v4l2-ctl control listings.
+
+ControlInfo describes a control as reported by VIDIOC_QUERY_EXT_CTRL. When ioctl
+is not available, the same descriptors are built from the output of
+`v4l2-ctl -l` or `v4l2-ctl -L` by parse_controls(), which reads the listing once,
+line by line, with precompiled patterns::
+
+    User Controls
+
+                         brightness 0x00980900 (int)    : min=0 max=255 step=1 default=128 value=128
+               power_line_frequency 0x00980918 (menu)   : min=0 max=2 default=2 value=2 (60 Hz)
+                    0: Disabled
+                    1: 50 Hz
+                    2: 60 Hz
+
+    Camera Controls
+
+                          pan_reset 0x009a0906 (button) : flags=write-only, execute-on-write
+"""
+import re
+
+import v4l2_api as v4l2
+
+
+# Type names printed by v4l2-ctl.
+type_names = {
+    v4l2.V4L2_CTRL_TYPE_INTEGER: "(int)",
+    v4l2.V4L2_CTRL_TYPE_BOOLEAN: "(bool)",
+    v4l2.V4L2_CTRL_TYPE_MENU: "(menu)",
+    v4l2.V4L2_CTRL_TYPE_BUTTON: "(button)",
+    v4l2.V4L2_CTRL_TYPE_INTEGER64: "(int64)",
+    v4l2.V4L2_CTRL_TYPE_STRING: "(str)",
+    v4l2.V4L2_CTRL_TYPE_BITMASK: "(bitmask)",
+    v4l2.V4L2_CTRL_TYPE_INTEGER_MENU: "(intmenu)",
+}
+
+# Flag names printed by v4l2-ctl.
+flag_names = [
+    (v4l2.V4L2_CTRL_FLAG_DISABLED, "disabled"),
+    (v4l2.V4L2_CTRL_FLAG_GRABBED, "grabbed"),
+    (v4l2.V4L2_CTRL_FLAG_READ_ONLY, "read-only"),
+    (v4l2.V4L2_CTRL_FLAG_UPDATE, "update"),
+    (v4l2.V4L2_CTRL_FLAG_INACTIVE, "inactive"),
+    (v4l2.V4L2_CTRL_FLAG_SLIDER, "slider"),
+    (v4l2.V4L2_CTRL_FLAG_WRITE_ONLY, "write-only"),
+    (v4l2.V4L2_CTRL_FLAG_VOLATILE, "volatile"),
+    (v4l2.V4L2_CTRL_FLAG_HAS_PAYLOAD, "has-payload"),
+    (v4l2.V4L2_CTRL_FLAG_EXECUTE_ON_WRITE, "execute-on-write"),
+    (v4l2.V4L2_CTRL_FLAG_MODIFY_LAYOUT, "modify-layout"),
+]
+
+# Flags which tell the current state of a control rather than what it can do.
+# They change at runtime (e.g. the exposure time is inactive while auto exposure
+# is on), so they are not cached but read from the device.
+state_flags = v4l2.V4L2_CTRL_FLAG_GRABBED | v4l2.V4L2_CTRL_FLAG_UPDATE | v4l2.V4L2_CTRL_FLAG_INACTIVE
+
+# Keys of the control dict filled for each type, following the output of `v4l2-ctl -l`.
+type_keys = {
+    v4l2.V4L2_CTRL_TYPE_INTEGER: ("min", "max", "step", "default", "value"),
+    v4l2.V4L2_CTRL_TYPE_INTEGER64: ("min", "max", "step", "default", "value"),
+    v4l2.V4L2_CTRL_TYPE_BOOLEAN: ("default", "value"),
+    v4l2.V4L2_CTRL_TYPE_MENU: ("min", "max", "default", "value"),
+    v4l2.V4L2_CTRL_TYPE_INTEGER_MENU: ("min", "max", "default", "value"),
+    v4l2.V4L2_CTRL_TYPE_BITMASK: ("max", "default", "value"),
+    v4l2.V4L2_CTRL_TYPE_STRING: ("min", "max", "step", "value"),
+}
+
+menu_types = (v4l2.V4L2_CTRL_TYPE_MENU, v4l2.V4L2_CTRL_TYPE_INTEGER_MENU)
+
+# Control classes shown as sliders, by the title printed by v4l2-ctl and by ID.
+vidcap_titles = ("User Controls", "Camera Controls")
+vidcap_classes = (v4l2.V4L2_CTRL_CLASS_USER, v4l2.V4L2_CTRL_CLASS_CAMERA)
+
+type_codes = {name.strip("()"): code for code, name in type_names.items()}
+flag_bits = {name: flag for flag, name in flag_names}
+
+# One token per control or class title of a listing:
+#   - a control: name, ID (not printed by old versions), type, the fields, then the
+#     lines of its menu items (-L only)
+#   - the title of a control class
+listing_token = re.compile(r"""
+    ^[ \t]*(?:
+        (?P<name>\w+)[ \t]+(?:(?P<id>0x[0-9a-fA-F]+)[ \t]+)?\((?P<type>[\w ]+)\)[ \t]*:(?P<fields>.*)
+        (?P<items>(?:\n[ \t]*\d+:[ ].*)*)
+      | (?P<title>\S.*?)
+    )[ \t]*$
+    """, re.MULTILINE | re.VERBOSE)
+# An item of a menu. The item of an integer menu is followed by its hex value.
+menu_item = re.compile(r"^[ \t]*(\d+): ([^\n]*)", re.MULTILINE)
+# The fields of a control in the order printed by v4l2-ctl, any of them omitted
+# depending on the type. The label of a menu value follows the value.
+control_fields = re.compile(r"""
+    (?:[ ]+min=(?P<min>\S+))?
+    (?:[ ]+max=(?P<max>\S+))?
+    (?:[ ]+step=(?P<step>\S+))?
+    (?:[ ]+default=(?P<default>\S+))?
+    (?:[ ]+value=(?P<value>'[^']*'|\S+)(?:[ ]\(.*?\))?)?
+    (?:[ ]+flags=(?P<flags>.*))?
+    [ \t]*
+    """, re.VERBOSE)
+field_keys = ("min", "max", "step", "default", "value", "flags")
+# A field such as min=0, value='text' or flags=write-only, execute-on-write, for
+# the lines which do not follow the order above (e.g. arrays with elems= and dims=).
+control_field = re.compile(r"(\w+)=('[^']*'|[^\s,]+(?:, [^\s,=]+)*)")
+
+def control_name(name: str) -> str:
+    """Converts the name given by the driver into the name used by v4l2-ctl.
+
+    Examples:
+        >>> control_name("White Balance, Automatic")
+        'white_balance_automatic'
+    """
+    return "_".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+def flags_string(flags: int) -> str:
+    """Converts control flags into the string printed by v4l2-ctl.
+
+    Returns:
+        str: Comma separated flag names. None if no flag is set.
+    """
+    if not flags:
+        return None
+    names = [name for flag, name in flag_names if flags & flag]
+    return ",".join(names) if names else None
+
+
+def is_adjustable(flags: int) -> bool:
+    """Checks that a control with the flags can be changed by the user.
+
+    Returns:
+        bool: False if the control is disabled, read-only or inactive.
+    """
+    return not flags & (v4l2.V4L2_CTRL_FLAG_DISABLED | v4l2.V4L2_CTRL_FLAG_READ_ONLY | v4l2.V4L2_CTRL_FLAG_INACTIVE)
+
+
+def parse_flags(text: str) -> int:
+    """Converts the flags printed by v4l2-ctl into control flags. Unknown names are ignored.
+    """
+    flags = 0
+    for name in text.split(","):
+        flags |= flag_bits.get(name.strip(), 0)
+    return flags
+
+
+def parse_value(text: str):
+    """Converts a field printed by v4l2-ctl.
+
+    Returns:
+        int or str: The number (decimal or hex), or the text without quotes.
+    """
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    if text.startswith("'"):
+        return text.strip("'")
+    try:
+        return int(text, 0)
+    except ValueError:
+        return text
+
+
+class ControlInfo():
+    """A control reported by the driver.
+
+    Args:
+        id (int): Control ID
+        type (int): enum v4l2_ctrl_type
+        name (str): Name in the style of v4l2-ctl
+        minimum (int): Minimum value
+        maximum (int): Maximum value
+        step (int): Step of the value
+        default (int): Default value
+        flags (int): Control flags
+        menu (dict, optional): Name (or value for an integer menu) of each menu
+            index of a menu control. Defaults to None.
+    """
+    __slots__ = ("id", "type", "name", "minimum", "maximum", "step", "default", "flags", "menu")
+
+    def __init__(self, id: int, type: int, name: str, minimum: int, maximum: int,
+                 step: int, default: int, flags: int, menu: dict = None):
+        self.id = id
+        self.type = type
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.default = default
+        self.flags = flags
+        self.menu = menu
+
+    @property
+    def is_readable(self) -> bool:
+        return self.type not in (v4l2.V4L2_CTRL_TYPE_BUTTON, v4l2.V4L2_CTRL_TYPE_STRING) \
+            and not self.flags & v4l2.V4L2_CTRL_FLAG_WRITE_ONLY
+
+    @property
+    def is_menu(self) -> bool:
+        return self.type in menu_types
+
+    def as_dict(self, value: int) -> dict:
+        """Gets the control in the shape of V4L2.get_current_params.
+
+        Returns:
+            dict: hex, type, min, max, step, value, default, flags and menu. Keys
+                which v4l2-ctl does not print for the type are None.
+        """
+        keys = type_keys.get(self.type, ())
+        values = {
+            "min": self.minimum,
+            "max": self.maximum,
+            "step": self.step,
+            "value": value,
+            "default": self.default,
+        }
+        params = {
+            "hex": "0x{:08x}".format(self.id),
+            "type": type_names.get(self.type, "(unknown)"),
+        }
+        for key, val in values.items():
+            params[key] = val if key in keys else None
+        params["flags"] = flags_string(self.flags)
+        params["menu"] = dict(self.menu) if self.menu else None
+        return params
+
+    def to_list(self) -> list:
+        """Gets the fields as a JSON serializable list. See from_list().
+
+        The state flags are left out, since they are only valid while the
+        device is open.
+        """
+        fields = [getattr(self, key) for key in self.__slots__]
+        fields[self.__slots__.index("flags")] &= ~state_flags
+        if self.menu is not None:
+            fields[-1] = [[index, label] for index, label in self.menu.items()]
+        return fields
+
+    @classmethod
+    def from_list(cls, fields: list):
+        """Creates a descriptor from the list made by to_list().
+
+        Raises:
+            ValueError: The number of fields differs, e.g. an older cache entry.
+        """
+        if len(fields) != len(cls.__slots__):
+            raise ValueError("{} fields, expected {}".format(len(fields), len(cls.__slots__)))
+        *fields, menu = fields
+        if menu is not None:
+            menu = {index: label for index, label in menu}
+        return cls(*fields, menu)
+
+
+class ControlListing():
+    """Controls parsed from `v4l2-ctl -l` or `v4l2-ctl -L`. See parse_controls().
+
+    Attributes:
+        infos (dict): ControlInfo of each control name in the order of the listing
+        values (dict): Current value of each control name. None if not printed.
+        classes (dict): Title of the control class of each control name, such as
+            "User Controls".
+    """
+
+    def __init__(self):
+        self.infos = {}
+        self.values = {}
+        self.classes = {}
+
+    def get_vidcap_names(self) -> list:
+        """Gets the names of the controls of the user and camera classes.
+
+        Old versions of v4l2-ctl print no class titles with -l. The class is then
+        taken from the control ID, and controls without ID are all included.
+        """
+        names = []
+        for name, title in self.classes.items():
+            if title:
+                if title in vidcap_titles:
+                    names.append(name)
+                continue
+            id_ = self.infos[name].id
+            if not id_ or v4l2.ctrl_id2class(id_) in vidcap_classes:
+                names.append(name)
+        return names
+
+    def get_params(self, names: list) -> dict:
+        """Gets controls in the shape of V4L2.get_current_params.
+
+        Args:
+            names (list): Control names. Unknown names are skipped.
+        """
+        return {
+            name: self.infos[name].as_dict(self.values[name])
+            for name in names if name in self.infos
+        }
+
+
+def parse_controls(output: str) -> ControlListing:
+    """Parses the control listing printed by `v4l2-ctl -l` or `v4l2-ctl -L`.
+
+    Each line is a control, an item of the menu above it (-L only), or the title
+    of a control class. The listing is read in one pass of listing_token.
+    Controls whose ID is not printed (old versions of v4l2-ctl) get the ID 0.
+    Unknown types get the type 0.
+
+    Args:
+        output (str): The output of v4l2-ctl
+
+    Returns:
+        ControlListing: The controls, their values and classes.
+    """
+    listing = ControlListing()
+    infos = listing.infos
+    title = ""
+    for m in listing_token.finditer(output):
+        name, id_, type_name, fields, items, title_ = m.groups()
+        if name is None:
+            title = title_
+            continue
+        f = control_fields.fullmatch(fields)
+        if f is not None:
+            min_, max_, step, default, value, flags = f.groups()
+        else:
+            found = dict(control_field.findall(fields))
+            min_, max_, step, default, value, flags = (found.get(key) for key in field_keys)
+        type_ = type_codes.get(type_name.strip(), 0)
+        info = ControlInfo(
+            int(id_, 16) if id_ else 0,
+            type_,
+            name,
+            parse_value(min_) if min_ else 0,
+            parse_value(max_) if max_ else 0,
+            parse_value(step) if step else 0,
+            parse_value(default) if default else 0,
+            parse_flags(flags) if flags else 0,
+        )
+        # -l does not list the menu items.
+        if items and type_ == v4l2.V4L2_CTRL_TYPE_MENU:
+            info.menu = {int(index): label for index, label in menu_item.findall(items)}
+        elif items and type_ == v4l2.V4L2_CTRL_TYPE_INTEGER_MENU:
+            info.menu = {
+                int(index): parse_value(label.partition(" (")[0]) for index, label in menu_item.findall(items)
+            }
+        infos[name] = info
+        listing.values[name] = parse_value(value) if value is not None else None
+        listing.classes[name] = title
+    return listing
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Finding the cameras connected to the PC.
+
+The video nodes are listed from /sys/class/video4linux, and each node is asked
+for its capabilities with one VIDIOC_QUERYCAP, without v4l2-ctl. Nodes which
+cannot capture frames, such as the metadata nodes of UVC cameras, are left out,
+and the remaining nodes are grouped by the physical device they belong to.
+"""
+import re
+from pathlib import Path
+
+import stream
+import v4l2_api as v4l2
+from stream import DeviceFile
+from capcache import read_sysfs
+
+
+sysfs_root = Path("/sys/class/video4linux")
+
+# Name of the sysfs directory of a USB interface, such as 1-1.2:1.0.
+usb_interface = re.compile(r"\d+-[\d.]+:\d+\.\d+")
+
+
+class VideoNode():
+    """A video node /dev/videoN and its capabilities.
+
+    Args:
+        device (int): Device number N of /dev/videoN
+        driver (str): Driver name
+        card (str): Device name
+        bus_info (str): Location of the device, such as usb-0000:00:14.0-1
+        caps (int): Capabilities of the node (V4L2_CAP_*)
+        parent (Path): sysfs directory of the physical device
+    """
+
+    __slots__ = ("device", "driver", "card", "bus_info", "caps", "parent")
+
+    def __init__(self, device: int, driver: str, card: str, bus_info: str, caps: int, parent: Path):
+        self.device = device
+        self.driver = driver
+        self.card = card
+        self.bus_info = bus_info
+        self.caps = caps
+        self.parent = parent
+
+    @property
+    def path(self) -> str:
+        return "/dev/video{}".format(self.device)
+
+    @property
+    def is_capture(self) -> bool:
+        return bool(self.caps & v4l2.V4L2_CAP_VIDEO_CAPTURE)
+
+
+class PhysicalDevice():
+    """A camera and its capture nodes.
+
+    Args:
+        name (str): Name of the camera
+        bus_info (str): Location of the camera
+        serial (str): USB serial number. Empty if none.
+        nodes (list): VideoNode of each capture node
+        bus (str, optional): USB bus number. Empty if not a USB camera.
+        speed (str, optional): USB speed in Mbit/s, such as 480. Empty if not a
+            USB camera.
+    """
+
+    __slots__ = ("name", "bus_info", "serial", "nodes", "bus", "speed")
+
+    def __init__(self, name: str, bus_info: str, serial: str, nodes: list, bus: str = "", speed: str = ""):
+        self.name = name
+        self.bus_info = bus_info
+        self.serial = serial
+        self.nodes = nodes
+        self.bus = bus
+        self.speed = speed
+
+    @property
+    def devices(self) -> list:
+        return [node.device for node in self.nodes]
+
+
+def node_number(entry: Path) -> int:
+    return int(entry.name[len("video"):])
+
+
+def physical_path(entry: Path) -> Path:
+    """Gets the sysfs directory of the physical device of a video node.
+
+    The nodes of a USB camera point at its interfaces, which are grouped by the
+    USB device above them.
+    """
+    link = entry / "device"
+    if not link.exists():
+        return entry
+    path = link.resolve()
+    if usb_interface.fullmatch(path.name):
+        return path.parent
+    return path
+
+
+def query_node(path: str, open_device=DeviceFile):
+    """Reads the capabilities of a video node.
+
+    Args:
+        path (str): Path of the node such as /dev/video0
+        open_device (Callable, optional): Creates the device layer of a path.
+            Defaults to DeviceFile.
+
+    Returns:
+        v4l2_capability: None if the node cannot be opened or queried.
+    """
+    device = open_device(path)
+    try:
+        device.open()
+    except OSError:
+        return None
+    try:
+        return device.ioctl(v4l2.VIDIOC_QUERYCAP, v4l2.v4l2_capability())
+    except OSError:
+        return None
+    finally:
+        device.close()
+
+
+def list_nodes(root: Path = sysfs_root, open_device=DeviceFile) -> list:
+    """Lists the video nodes in the order of their numbers.
+
+    Args:
+        root (Path, optional): sysfs directory of the video nodes. Defaults to
+            /sys/class/video4linux.
+        open_device (Callable, optional): Creates the device layer of a path.
+            Defaults to DeviceFile.
+
+    Returns:
+        list: VideoNode of each node which answers VIDIOC_QUERYCAP.
+    """
+    if open_device is DeviceFile and stream.fcntl is None:
+        return []
+    entries = [entry for entry in Path(root).glob("video*") if entry.name[len("video"):].isdigit()]
+    nodes = []
+    for entry in sorted(entries, key=node_number):
+        device = node_number(entry)
+        cap = query_node("/dev/video{}".format(device), open_device)
+        if cap is None:
+            continue
+        caps = cap.device_caps if cap.capabilities & v4l2.V4L2_CAP_DEVICE_CAPS else cap.capabilities
+        nodes.append(VideoNode(
+            device,
+            cap.driver.decode(errors="replace"),
+            cap.card.decode(errors="replace"),
+            cap.bus_info.decode(errors="replace"),
+            caps,
+            physical_path(entry)
+        ))
+    return nodes
+
+
+def discover(root: Path = sysfs_root, open_device=DeviceFile) -> list:
+    """Finds the cameras which can capture frames.
+
+    Args:
+        root (Path, optional): sysfs directory of the video nodes. Defaults to
+            /sys/class/video4linux.
+        open_device (Callable, optional): Creates the device layer of a path.
+            Defaults to DeviceFile.
+
+    Returns:
+        list: PhysicalDevice of each camera, in the order of their first nodes.
+    """
+    groups = {}
+    for node in list_nodes(root, open_device):
+        if node.is_capture:
+            groups.setdefault(node.parent, []).append(node)
+    devices = []
+    for parent, nodes in groups.items():
+        devices.append(PhysicalDevice(
+            nodes[0].card, nodes[0].bus_info, read_sysfs(parent / "serial"), nodes,
+            read_sysfs(parent / "busnum"), read_sysfs(parent / "speed")
+        ))
+    return devices
@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 """The utility class about file IO.
 """
+import hashlib
+import json
+import os
 from datetime import datetime
 from pathlib import Path
 from itertools import cycle
@@ -58,4 +61,68 @@ class FileIO():
         else:
             filename = None
 
-        return str(filename)
\ No newline at end of file
+        return str(filename)
+
+    @staticmethod
+    def user_dir(variable: str, default: str) -> Path:
+        """Gets the directory of usbcamGUI under an XDG base directory.
+
+        Args:
+            variable (str): Environment variable of the base directory, such as
+                XDG_CACHE_HOME.
+            default (str): The base directory under the home directory used when
+                the variable is not set, such as ".cache".
+
+        Returns:
+            Path: <base>/usbcamGUI
+        """
+        base = os.environ.get(variable) or Path.home() / default
+        return Path(base) / "usbcamGUI"
+
+    @staticmethod
+    def hashed_filename(fields) -> str:
+        """Gets the name of a JSON file found by some fields, such as the identity of a camera.
+
+        Args:
+            fields (Iterable): Values naming the file.
+
+        Returns:
+            str: The first 16 digits of the SHA-1 of the fields, with .json.
+        """
+        key = "\0".join(str(field) for field in fields)
+        return "{}.json".format(hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    @staticmethod
+    def write_json(path: Path, entry, indent: int = None) -> bool:
+        """Writes a JSON file, creating its directory.
+
+        The entry is written into a temporary file which then replaces the file,
+        so that a concurrent reader never sees a partial file. The temporary file
+        is removed if writing fails.
+
+        Args:
+            path (Path): The file to be written.
+            entry: JSON serializable object.
+            indent (int, optional): Indent of json.dump. Defaults to None.
+
+        Returns:
+            bool: False if the file cannot be written.
+        """
+        path = Path(path)
+        tmp = path.with_suffix(".tmp{}".format(os.getpid()))
+        is_written = False
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(entry, f, indent=indent)
+            os.replace(tmp, path)
+            is_written = True
+        except OSError:
+            pass
+        finally:
+            if not is_written:
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+        return is_written
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Frame types passed from the camera to the display, save and recording.
+"""
+import cv2
+import numpy as np
+
+
+# Pixel formats of frames, with the number of channels.
+#   gray: 8 bit grayscale
+#   rgb888: 24 bit RGB (QImage.Format_RGB888)
+#   bgrx: 32 bit B, G, R, 0xFF in memory (QImage.Format_RGB32), painted by Qt without conversion
+#   bgr888: 24 bit BGR (QImage.Format_BGR888, Qt >= 5.14), the capture buffer itself
+#   bgr: 24 bit BGR for cv2.VideoWriter
+channels = {
+    "gray": 1,
+    "rgb888": 3,
+    "bgrx": 4,
+    "bgr888": 3,
+    "bgr": 3,
+}
+
+# cv2.cvtColor codes converting a BGR, grayscale or YUYV frame into each pixel format.
+# None means the source frame is used as it is.
+bgr_codes = {
+    "gray": cv2.COLOR_BGR2GRAY,
+    "rgb888": cv2.COLOR_BGR2RGB,
+    "bgrx": cv2.COLOR_BGR2BGRA,
+    "bgr888": None,
+    "bgr": None,
+}
+gray_codes = {
+    "gray": None,
+    "rgb888": cv2.COLOR_GRAY2RGB,
+    "bgrx": cv2.COLOR_GRAY2BGRA,
+    "bgr888": cv2.COLOR_GRAY2BGR,
+    "bgr": cv2.COLOR_GRAY2BGR,
+}
+yuyv_codes = {
+    "gray": cv2.COLOR_YUV2GRAY_YUYV,
+    "rgb888": cv2.COLOR_YUV2RGB_YUYV,
+    "bgrx": cv2.COLOR_YUV2BGRA_YUYV,
+    "bgr888": cv2.COLOR_YUV2BGR_YUYV,
+    "bgr": cv2.COLOR_YUV2BGR_YUYV,
+}
+
+
+def frame_shape(height: int, width: int, pixel_format: str) -> tuple:
+    """Gets the shape of a frame in the pixel format.
+
+    Returns:
+        tuple: (height, width) or (height, width, channels)
+    """
+    n = channels[pixel_format]
+    return (height, width) if n == 1 else (height, width, n)
+
+
+def as_rgb(array: np.ndarray, pixel_format: str) -> np.ndarray:
+    """Converts the pixels of a frame into RGB (or grayscale) for saving.
+
+    Args:
+        array (numpy.ndarray): Pixels of the frame.
+        pixel_format (str): Pixel format of the frame.
+
+    Returns:
+        numpy.ndarray: RGB or grayscale pixels.
+    """
+    if array.ndim == 2 or pixel_format == "rgb888":
+        return array
+    elif array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_BGRA2RGB)
+    return cv2.cvtColor(array, cv2.COLOR_BGR2RGB)
+
+
+class JpegFrame():
+    """A frame kept as the compressed JPEG payload of a MJPG camera.
+
+    The payload is decoded only when a consumer asks for pixels with decode(),
+    and the result is kept so that the frame is decoded at most once.
+
+    Args:
+        data (numpy.ndarray): 1-D uint8 array of the JPEG payload.
+        pixel_format (str): Pixel format of the decoded frame. See channels.
+    """
+    __slots__ = ("data", "pixel_format", "_pixels")
+
+    def __init__(self, data: np.ndarray, pixel_format: str = "rgb888"):
+        self.data = data
+        self.pixel_format = pixel_format
+        self._pixels = None
+
+    def decode(self) -> np.ndarray:
+        """Decodes the payload.
+
+        Returns:
+            numpy.ndarray: Frame in the pixel format.
+        """
+        if self._pixels is None:
+            if self.pixel_format == "gray":
+                self._pixels = cv2.imdecode(self.data, cv2.IMREAD_GRAYSCALE)
+            else:
+                image = cv2.imdecode(self.data, cv2.IMREAD_COLOR)
+                code = bgr_codes[self.pixel_format]
+                self._pixels = image if code is None else cv2.cvtColor(image, code)
+        return self._pixels
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._pixels is not None
+
+    def tobytes(self) -> bytes:
+        return self.data.tobytes()
+
+
+class FrameRecord():
+    """A frame read from the camera with its capture metadata.
+
+    Args:
+        frame: Pixels of the frame, numpy.ndarray or JpegFrame.
+        timestamp (float): Monotonic time in seconds at which the frame was captured.
+        sequence (int): Sequence number of the frame. The number given by the driver
+            if the backend has it, otherwise counted by the camera.
+        pixel_format (str): Pixel format of the frame. See channels.
+        width (int): Frame width
+        height (int): Frame height
+        controls (ControlSnapshot): Control values active at capture time. The
+            snapshot is shared between records and never modified (see
+            ControlState.snapshot).
+        dropped (int, optional): The number of frames lost just before this one.
+            Defaults to 0.
+    """
+    __slots__ = ("frame", "timestamp", "sequence", "pixel_format", "width", "height", "controls", "dropped")
+
+    def __init__(self, frame, timestamp: float, sequence: int, pixel_format: str,
+                 width: int, height: int, controls, dropped: int = 0):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.pixel_format = pixel_format
+        self.width = width
+        self.height = height
+        self.controls = controls
+        self.dropped = dropped
+
+
+class FrameSet():
+    """Frames of several cameras grabbed together by a CaptureGroup.
+
+    Args:
+        index (int): Index of the set counted by the group.
+        records (list): FrameRecord of each camera in the order of the group.
+    """
+    __slots__ = ("index", "records", "skew")
+
+    def __init__(self, index: int, records: list):
+        self.index = index
+        self.records = records
+        timestamps = [record.timestamp for record in records]
+        # The spread of the capture times in seconds.
+        self.skew = max(timestamps) - min(timestamps)
+
+
+def as_array(frame) -> np.ndarray:
+    """Returns the pixels of a frame, decoding it if needed.
+
+    Args:
+        frame: numpy.ndarray or JpegFrame
+
+    Returns:
+        numpy.ndarray: The pixels of the frame.
+    """
+    if isinstance(frame, JpegFrame):
+        return frame.decode()
+    return frame
+
+
+class MjpegWriter():
+    """Writes JPEG payloads into a MJPEG stream file without decoding them.
+
+    The output is the concatenation of JPEG images, which can be played or
+    converted by ffmpeg (`ffmpeg -f mjpeg -i <file>`). The interface follows
+    cv2.VideoWriter so that it can replace it while recording.
+
+    Args:
+        filename (str): Filename of the video.
+    """
+
+    def __init__(self, filename: str):
+        self.file = open(filename, "wb")
+
+    def isOpened(self) -> bool:
+        return not self.file.closed
+
+    def write(self, frame):
+        """Writes a frame.
+
+        Args:
+            frame: JpegFrame, or BGR numpy.ndarray which is encoded into JPEG.
+        """
+        if isinstance(frame, JpegFrame):
+            self.file.write(frame.data)
+        else:
+            ret, data = cv2.imencode(".jpg", frame)
+            if ret:
+                self.file.write(data)
+
+    def release(self):
+        self.file.close()
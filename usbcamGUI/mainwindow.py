@@ -17,15 +17,26 @@ from PIL import Image
 from PySide2.QtWidgets import (
     QApplication, QMainWindow, QGraphicsView, QGraphicsScene, QWidget, QAction,
     QPushButton, QMenu, QMenuBar, QVBoxLayout, QHBoxLayout, QStatusBar, QGridLayout,
-    QMessageBox, QScrollArea, QLabel, QFrame, QTableWidget, QTableWidgetItem, QInputDialog, QDialog,
+    QMessageBox, QLabel, QFrame, QTableWidget, QTableWidgetItem, QInputDialog, QDialog,
     QAbstractItemView, QSizePolicy, QFileDialog, QAbstractScrollArea, QGroupBox,
-    QGraphicsPixmapItem, QSlider, QFontDialog, QDialogButtonBox, QToolBar, QSpinBox, QComboBox,
-    QFontComboBox, QRadioButton, QButtonGroup, QCheckBox, QTextEdit
+    QGraphicsPixmapItem, QFontDialog, QDialogButtonBox, QToolBar, QSpinBox, QComboBox,
+    QFontComboBox, QRadioButton, QButtonGroup, QCheckBox, QTextEdit, QStackedWidget
     )
-from PySide2.QtGui import QIcon, QPixmap, QImage
-from PySide2.QtCore import Qt, QTimer, QIODevice
-
-from camera import LinuxCamera, WindowsCamera, RaspiCamera
+from PySide2.QtGui import QIcon, QImage
+from PySide2.QtCore import Qt, QTimer, QIODevice, QThread, Signal
+
+from camera import LinuxCamera, V4L2StreamCamera, SyntheticCamera, WindowsCamera, RaspiCamera
+from capture import CaptureWorker, CaptureGroup, GroupCaptureWorker
+from frame import JpegFrame, as_array, as_rgb
+from tile import CameraTile, grid_shape
+from controlwriter import ControlWriter
+from controlwatcher import ControlWatcher
+from ctrlinfo import is_adjustable
+from widgets import ControlRow, ControlPanel
+from profiles import ProfileStore, create_profile, diff_profile
+from discovery import discover
+from modeplan import plan_bus, best_mode, camera_budget, default_speed
+from capindex import bandwidth
 from text import MessageText
 from icon import Icon
 from slot import Slot
@@ -43,13 +54,23 @@ class Window(QMainWindow):
     main window in the instance method of this class.
 
     """
+
+    # Messages written from other threads are passed to the GUI thread.
+    text_requested = Signal(str, str, object)
+
     def __init__(
-            self, device: int = 0, suffix: str = "png", camtype: str = "usb_cam",
+            self, device=0, suffix: str = "png", camtype: str = "usb_cam",
             color: str = "RGB", dst: str = ".", param: str = "full",
-            rule: str = "Sequential", parent=None):
+            rule: str = "Sequential", backend: str = "opencv", passthrough: bool = False,
+            record_policy: str = "drop-oldest", record_queue: int = 64,
+            display_format: str = "bgrx", sync: bool = False, control_rate: float = 30.0,
+            auto_mode: tuple = None, parent=None):
         super(Window, self).__init__(parent)
-        self.device = device
+        self.text_requested.connect(self.write_text)
+        self.devices = device if isinstance(device, (list, tuple)) else [device]
+        self.device = self.devices[0]
         self.camtype = camtype
+        self.backend = backend
         self.colorspace = color
         self.image_suffix = suffix
         self.video_codec = "AVC1"
@@ -62,13 +83,18 @@ class Window(QMainWindow):
 
         self.is_display = True
         self.param_separate = False
+        self.is_sync = sync
+        self.control_rate = control_rate
+        self.param_type = param
+        self.passthrough = passthrough
+        self.record_policy = record_policy
+        self.record_queue = record_queue
+        self.profiles = ProfileStore()
 
         self.slot = Slot(self)
 
-        cam = self.get_cam()
-        self.camera = cam(self.device, self.colorspace, parent=self)
-        self.support_params = self.camera.get_supported_params()
-        self.current_params = self.camera.get_current_params(param)
+        self.tiles = [self.create_tile(dev) for dev in self.devices]
+        self.select_tile(0)
 
         # List of camera properties with temporal initial values
         self.prop_table = [
@@ -77,28 +103,94 @@ class Window(QMainWindow):
             ["Height", 480],
             ["FPS", 30.0],
             ["Bit depth", 8],
-            ["File naming style", self.filename_rule]
+            ["File naming style", self.filename_rule],
+            ["Device", self.device]
         ]
         self.setup()
-        self.set_timer()
+        self.display_format = self.get_display_format(display_format)
+        for tile in self.tiles:
+            tile.camera.pixel_format = self.display_format
+        self.set_capture()
+        self.set_control_writers()
+        self.set_control_watchers()
+        if auto_mode is not None:
+            self.apply_auto_mode(*auto_mode)
+
+    def create_tile(self, device: int) -> CameraTile:
+        """Opens a camera and creates its tile.
+
+        Args:
+            device (int): Device number
+
+        Returns:
+            CameraTile: The tile of the camera
+        """
+        camera = self.get_cam()(device, self.colorspace, parent=self)
+        camera.set_passthrough(self.passthrough)
+        camera.record_policy = self.record_policy
+        camera.record_queue_size = self.record_queue
+        tile = CameraTile(camera)
+        tile.support_params = camera.get_supported_params()
+        params = camera.get_current_params(self.param_type)
+        camera.controls.load(params)
+        tile.param_names = list(params)
+        return tile
+
+    def select_tile(self, index: int):
+        """Makes the camera of the tile the target of sliders, properties, save and record.
+
+        Args:
+            index (int): Index of the tile
+        """
+        self.tile = self.tiles[index]
+        self.camera = self.tile.camera
+        self.device = self.camera.device
+        self.support_params = self.tile.support_params
+        self.controls = self.camera.controls
+        self.param_names = self.tile.param_names
+
+    def get_display_format(self, display_format: str) -> str:
+        """Checks the pixel format of the display is supported by Qt.
+
+        Format_BGR888 exists since Qt 5.14, bgrx is used instead on an older Qt.
+
+        Args:
+            display_format (str): rgb888, bgrx or bgr888
+
+        Returns:
+            str: The pixel format used for displaying
+        """
+        if display_format == "bgr888" and not hasattr(QImage, "Format_BGR888"):
+            self.write_text(
+                "QImage.Format_BGR888 is not supported by this Qt. Use bgrx instead.",
+                level="warn", color="yellow"
+            )
+            return "bgrx"
+        return display_format
 
     def get_cam(self) -> str:
         """Return camera object according to current OS.
 
         Detects what OS you are using, return camera objects  in order to function properly.
 
-            - Linux: LinuxCamera
+            - Linux: LinuxCamera (V4L2StreamCamera if the backend is v4l2)
             - RaspberryPi OS: RaspiCamera
             - Windows: WindowsCamera
 
+        SyntheticCamera is returned on any OS if the camera type is synthetic.
+
         Returns:
             Camera class
         """
         if self.camtype == "raspi":
             return RaspiCamera
+        elif self.camtype == "synthetic":
+            return SyntheticCamera
 
         self.system = platform.system()
         if re.search("linux", self.system, re.IGNORECASE):
+            if self.backend == "v4l2":
+                return V4L2StreamCamera
             return LinuxCamera
         elif re.search("windows", self.system, re.IGNORECASE):
             return WindowsCamera
@@ -121,14 +213,16 @@ class Window(QMainWindow):
         self.setWindowTitle("usbcamGUI")
         self.update_prop_table()
         self.adjust_windowsize()
+        self.layout_tiles()
         self.set_theme()
 
     def adjust_windowsize(self):
         """Adjusts the main window size
         """
         system = Utility.get_os()
-        if system == "linux":
-            w, h, _ = self.get_screensize()
+        screen = self.get_screensize() if system == "linux" else None
+        if screen:
+            w, h, _ = screen
             wscale = 0.5
             hscale = 0.7
             self.resize(wscale * w, hscale * h)
@@ -152,38 +246,202 @@ class Window(QMainWindow):
         """
         self.setStyleSheet('font-family: "{}"; font-size: {}px;'.format(family, size))
 
-    def set_timer(self):
-        """Set QTimer
+    def set_capture(self):
+        """Starts the capture workers.
+
+        Each camera has a CaptureWorker which reads frames in its own thread, so that
+        blocking reads never stall the GUI. A notification from any worker schedules
+        one refresh of the view area, which composites the newest frames of all tiles.
 
-        Creates a QTimer object to update frame on view area. The interval is set to the inverse
-        of camera FPS.
+        In the sync mode, all cameras are read together by one GroupCaptureWorker
+        instead, and save and record handle the frames of all cameras as a set.
         """
-        self.qtime_factor = 0.8
-        self.fps = 30.0
-        if self.fps:
-            self.msec = 1 / self.fps * 1000 * self.qtime_factor
+        self.is_refresh_pending = False
+        self.capture_workers = []
+        self.group = None
+        if self.is_sync:
+            self.group = CaptureGroup([tile.camera for tile in self.tiles])
+            worker = GroupCaptureWorker(self.group, [tile.buffer for tile in self.tiles])
+            worker.frames_dropped.connect(
+                lambda index, dropped, sequence: self.report_dropped_frames(self.tiles[index], dropped, sequence))
+            worker.read_error.connect(lambda text: self.capture_error(self.tiles[0], text))
+            self.capture_workers.append(worker)
         else:
-            self.msec = 1 / 30.0 * 1000 * self.qtime_factor
-        self.timer = QTimer()
-        self.timer.setInterval(self.msec)
-        self.timer.timeout.connect(self.next_frame)
-        self.timer.start()
+            for tile in self.tiles:
+                self.capture_workers.append(self.create_capture_worker(tile))
+        for worker in self.capture_workers:
+            worker.frame_ready.connect(self.schedule_refresh)
+            worker.start()
+
+    def create_capture_worker(self, tile: CameraTile) -> CaptureWorker:
+        """Creates the CaptureWorker reading the camera of a tile.
+        """
+        worker = CaptureWorker(tile.camera, tile.buffer)
+        worker.frames_dropped.connect(
+            lambda dropped, sequence, tile=tile: self.report_dropped_frames(tile, dropped, sequence))
+        worker.read_error.connect(lambda text, tile=tile: self.capture_error(tile, text))
+        return worker
+
+    def set_control_writers(self):
+        """Starts a ControlWriter of each camera.
+
+        Slider values are written by the writer of the camera, which coalesces the
+        values of a dragged slider and limits the writes to control_rate per second.
+        """
+        for tile in self.tiles:
+            self.start_control_writer(tile)
+
+    def start_control_writer(self, tile: CameraTile):
+        tile.writer = ControlWriter(tile.camera, self.control_rate)
+        tile.writer.write_failed.connect(
+            lambda param, value, text, tile=tile: self.control_failed(tile, param, value, text))
+        tile.writer.command_done.connect(
+            lambda command, tile=tile: self.command_finished(tile, command))
+        tile.writer.start()
+
+    def set_control_watchers(self):
+        """Starts a ControlWatcher of each camera reporting control events.
+
+        The sliders of the controls changed outside of the window are moved, and
+        the sliders of inactive controls are disabled.
+        """
+        for tile in self.tiles:
+            self.start_control_watcher(tile)
+            if tile.panel is not None:
+                for row in tile.panel.rows.values():
+                    self.update_slider_state(tile, row)
+
+    def start_control_watcher(self, tile: CameraTile):
+        if not tile.camera.subscribe_controls():
+            return
+        tile.watcher = ControlWatcher(tile.camera)
+        tile.watcher.value_changed.connect(
+            lambda param, value, tile=tile: self.control_changed(tile, param, value))
+        tile.watcher.flags_changed.connect(
+            lambda param, flags, tile=tile: self.control_flags_changed(tile, param, flags))
+        tile.watcher.watch_failed.connect(
+            lambda text, tile=tile: self.write_text("{}: {}".format(tile.name, text), level="warn"))
+        tile.watcher.start()
+
+    def control_changed(self, tile: CameraTile, param: str, value: int):
+        """Shows a value changed by another application or by the driver.
+
+        The value is already stored in the ControlState of the camera by the
+        watcher. The slider is moved with its signals blocked, so that the value
+        is not written again. A slider being dragged is left to the user. The
+        panels of the cameras which are not selected are kept up to date too.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            param (str): Control name
+            value (int): The new value
+        """
+        row = tile.panel.get(param) if tile.panel is not None else None
+        if row is None or row.is_dragged():
+            return
+        row.show_value(value)
+
+    def control_flags_changed(self, tile: CameraTile, param: str, flags: int):
+        """Enables or disables the slider of a control whose flags changed.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            param (str): Control name
+            flags (int): The new flags
+        """
+        if not tile.camera.controls.set_flags(param, flags) or tile.panel is None:
+            return
+        row = tile.panel.get(param)
+        if row is not None:
+            self.update_slider_state(tile, row)
+
+    def update_slider_state(self, tile: CameraTile, row: ControlRow):
+        """Enables the slider of a control unless it has no value, or the camera
+        reports the control as inactive or read-only.
+
+        The flags are trusted only when the camera reports control events, since
+        they would never be updated otherwise.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            row (ControlRow): The row of the control
+        """
+        controls = tile.camera.controls
+        enabled = controls.value(row.name) is not None
+        if tile.watcher is not None:
+            enabled = enabled and is_adjustable(controls.get_flags(row.name))
+        row.set_enabled(enabled)
+
+    def control_failed(self, tile: CameraTile, param: str, value: int, text: str):
+        """Shows the value rejected by the camera.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            param (str): Control name
+            value (int): The rejected value
+            text (str): Error message
+        """
+        self.write_text("{}: {} = {}: {}".format(tile.name, param, value, text), level="err", color="red")
+
+    def command_finished(self, tile: CameraTile, command):
+        """Calls the callback of a command run by the ControlWriter, or shows its error.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            command (Command): The finished command
+        """
+        if command.error is not None:
+            self.write_text(
+                "{}: {} failed: {}".format(tile.name, command.name, command.error), level="err", color="red")
+        elif command.callback is not None:
+            command.callback(command)
 
-    def stop_timer(self):
-        """Deactivate the Qtimer object.
+    def capture_error(self, tile: CameraTile, text: str):
+        """Shows the error raised in the capture worker.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            text (str): Error message
+        """
+        self.write_text("{}: {}".format(tile.name, text), level="err", color="red")
+
+    def report_dropped_frames(self, tile: CameraTile, dropped: int, sequence: int):
+        """Shows the frames lost by the camera.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            dropped (int): The number of lost frames
+            sequence (int): Sequence number of the frame following the lost frames
         """
-        self.timer.stop()
+        self.write_text(
+            "{}: {} frame(s) lost before sequence {}".format(tile.name, dropped, sequence),
+            level="warn", color="red"
+            )
 
-    def start_timer(self):
-        """Activate the Qtimer object.
+    def closeEvent(self, event):
+        """Finishes recording and stops the capture workers before closing the window.
         """
-        self.fps = 30.0
-        if self.fps:
-            self.msec = 1 / self.fps * 1000 * self.qtime_factor
+        if self.group is not None:
+            if self.camera.is_recording:
+                self.group.stop_recording()
         else:
-            self.msec = 1 / 30.0 * 1000 * self.qtime_factor
-        self.timer.setInterval(self.msec)
-        self.timer.start()
+            for tile in self.tiles:
+                if tile.camera.is_recording:
+                    tile.camera.stop_recording()
+        for worker in self.capture_workers:
+            worker.stop()
+        for tile in self.tiles:
+            if tile.watcher is not None:
+                tile.watcher.stop()
+            tile.writer.stop()
+        super().closeEvent(event)
+
+    def resizeEvent(self, event):
+        """Lays out the tiles again to fit the new size of the view area.
+        """
+        super().resizeEvent(event)
+        if self.tiles[0].pixmap_item is not None:
+            self.layout_tiles()
 
     def toolbar_setup(self):
         """Create toolbar
@@ -213,6 +471,16 @@ class Window(QMainWindow):
         self.toolbar.addWidget(self.help_button)
         self.toolbar.addWidget(self.fontsize_label)
         self.toolbar.addWidget(self.fontsize_combo)
+        self.camera_label = QLabel("Camera")
+        self.camera_label.setFrameShape(QFrame.Box)
+        self.camera_combo = QComboBox()
+        self.camera_combo.addItems([tile.name for tile in self.tiles])
+        self.camera_combo.currentIndexChanged.connect(self.switch_camera)
+        self.camera_label_act = self.toolbar.addWidget(self.camera_label)
+        self.camera_combo_act = self.toolbar.addWidget(self.camera_combo)
+        # The box is shown once a second camera is opened.
+        self.camera_label_act.setVisible(len(self.tiles) > 1)
+        self.camera_combo_act.setVisible(len(self.tiles) > 1)
         self.toolbar.setStyleSheet(
             """
             QToolBar {spacing:5px;}
@@ -247,24 +515,40 @@ class Window(QMainWindow):
         self.add_menubar()
         self.add_statusbar()
         self.button_block = self.add_buttons()
-        self.slider_group = self.add_params()
+        self.add_entry_buttons()
+        self.add_params()
         self.prop_block = self.add_prop_window()
         self.create_mainlayout()
 
     def image_setup(self):
-        """Creates a Qimage to assign frame, then initialize with an image which has zero in all pixels.
+        """Adds a pixmap item of each tile to the scene, initialized with an image which has zero in all pixels.
         """
-        self.frame = np.zeros((640, 480, 3), dtype=np.uint8)
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
         #cinit = np.ctypeslib.as_ctypes(self.frame)
         #self.frame.buffer = sharedctypes.RawArray(cinit._type_, cinit)
-        self.qimage = QImage(
-            self.frame.data,
-            640,
-            480,
-            640 * 3,
-            QImage.Format_RGB888
-            )
-        self.pixmap = QPixmap.fromImage(self.qimage)
+        for tile in self.tiles:
+            tile.convert_frame(self.frame)
+            tile.pixmap_item = self.scene.addPixmap(tile.pixmap)
+
+    def layout_tiles(self):
+        """Places the tiles in a grid on the scene.
+
+        A single camera is shown in its actual size. Several cameras are arranged in
+        the grid which shows them in the largest size, and scaled to fit the view area.
+        """
+        width = max(int(tile.camera.width) for tile in self.tiles)
+        height = max(int(tile.camera.height) for tile in self.tiles)
+        if len(self.tiles) == 1:
+            cols = 1
+        else:
+            size = self.view.viewport().size()
+            cols, _ = grid_shape(len(self.tiles), width, height, size.width(), size.height())
+        rows = (len(self.tiles) + cols - 1) // cols
+        for index, tile in enumerate(self.tiles):
+            tile.pixmap_item.setPos((index % cols) * width, (index // cols) * height)
+        self.scene.setSceneRect(0, 0, cols * width, rows * height)
+        if len(self.tiles) > 1:
+            self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
 
     def add_actions(self):
         """Add actions executed when press each item in the memu window.
@@ -279,6 +563,10 @@ class Window(QMainWindow):
         self.show_paramlist_act = self.create_action("Parameters &List", self.slot.show_paramlist, "Ctrl+l")
         self.show_shortcut_act = self.create_action("&Keybord shortcut", self.slot.show_shortcut, "Ctrl+k")
         self.font_act = self.create_action("&Font", self.slot.set_font, "Ctrl+f")
+        self.statistics_act = self.create_action("Capture &Statistics", self.show_statistics, "Ctrl+i")
+
+        self.save_profile_act = self.create_action("Save &Profile...", self.save_profile)
+        self.delete_profile_act = self.create_action("&Delete Profile...", self.delete_profile)
 
         self.usage_act = self.create_action("&Usage", self.slot.usage, "Ctrl+h")
         self.about_act = self.create_action("&About", self.slot.about, "Ctrl+a")
@@ -328,6 +616,18 @@ class Window(QMainWindow):
         self.view_tab.addAction(self.param_act)
         self.view_tab.addAction(self.show_shortcut_act)
         self.view_tab.addAction(self.show_paramlist_act)
+        self.view_tab.addAction(self.statistics_act)
+
+        self.device_tab = QMenu("&Device")
+        # The cameras are discovered each time the menu is opened.
+        self.device_tab.aboutToShow.connect(self.update_device_menu)
+
+        self.profile_tab = QMenu("&Profile")
+        self.profile_tab.addAction(self.save_profile_act)
+        self.apply_profile_menu = self.profile_tab.addMenu("&Apply Profile")
+        self.profile_tab.addAction(self.delete_profile_act)
+        # The profiles of the selected camera are listed each time the menu is opened.
+        self.profile_tab.aboutToShow.connect(self.update_profile_menu)
 
         self.help_tab = QMenu("&Help")
         self.help_tab.addAction(self.usage_act)
@@ -335,6 +635,8 @@ class Window(QMainWindow):
 
         self.menubar.addMenu(self.file_tab)
         self.menubar.addMenu(self.view_tab)
+        self.menubar.addMenu(self.device_tab)
+        self.menubar.addMenu(self.profile_tab)
         self.menubar.addMenu(self.help_tab)
         self.menubar.setStyleSheet(
             """
@@ -462,93 +764,206 @@ class Window(QMainWindow):
             button.setMinimumSize(80, 30)
         return button
 
-    def add_params(self) -> QGridLayout:
-        """Set the properties of camera parameter.
+    def add_entry_buttons(self) -> QGroupBox:
+        """Creates the group box of the buttons changing the properties, the naming
+        style and the parameters.
 
-        Set the properties of camera parameter, then add sliders to change each parameter.
-        When change value on the slider, the value of paramter also changes by the caller
-        function.
+        Returns:
+            QGroupBox: PySide2 QGroupBox
+        """
+        self.entry_box = QVBoxLayout()
+        self.entry_box.addWidget(self.frame_button)
+        self.entry_box.addWidget(self.filerule_button)
+        self.entry_box.addWidget(self.default_button)
+        self.entry_box.addStretch(1)
+        self.entry_box.setSpacing(20)
+        self.entry_box.setContentsMargins(20, 20, 20, 20)
+
+        self.button_group_box = QGroupBox("Buttons", self)
+        self.button_group_box.setLayout(self.entry_box)
+        self.button_group_box.setAlignment(Qt.AlignLeft)
+        return self.button_group_box
+
+    def add_params(self) -> QGroupBox:
+        """Creates the group box of the sliders.
+
+        Each camera has its own ControlPanel in the stack of the group box, created
+        when the camera is selected for the first time, so that selecting a camera
+        again only brings its panel to the front.
 
+        Returns:
+            QGroupBox: PySide2 QGroupBox
         """
-        lst = self.current_params
-        for key, value in lst.items():
-            self.add_slider(key)
+        self.slider_stack = QStackedWidget()
+        vbox = QVBoxLayout()
+        vbox.addWidget(self.slider_stack)
+        vbox.setContentsMargins(0, 0, 0, 0)
+        self.slider_group_box = QGroupBox("Parameters")
+        self.slider_group_box.setLayout(vbox)
+        self.slider_group_box.setContentsMargins(20, 20, 20, 20)
+        self.show_panel()
+        return self.slider_group_box
 
-        # add sliders
-        self.slider_table = QGridLayout()
-        self.slider_table.setSpacing(15)
-        self.slider_table.setContentsMargins(20, 20, 20, 20)
-        for row, param in enumerate(self.current_params):
-            self.slider_table.addWidget(self.current_params[param]["slider_label"], row, 0)
-            self.slider_table.addWidget(self.current_params[param]["slider"], row, 1)
-            self.slider_table.addWidget(self.current_params[param]["slider_value"], row, 2)
-        if len(self.current_params) > 15:
-            self.param_separate = True
-        else:
-            self.param_separate = False
-        return self.slider_table
+    def show_panel(self) -> bool:
+        """Shows the ControlPanel of the selected camera.
 
-    def update_params(self, plist: list) -> QGridLayout:
+        Returns:
+            bool: True if the sliders need the other arrangement of the information
+                part (see param_separate).
+        """
+        tile = self.tile
+        if tile.panel is None:
+            tile.panel = ControlPanel(lambda param, tile=tile: self.add_slider(tile, param))
+            tile.panel.set_names(tile.param_names)
+            self.slider_stack.addWidget(tile.panel)
+        self.slider_stack.setCurrentWidget(tile.panel)
+        self.control_rows = tile.panel.rows
+        separate = len(self.param_names) > 15
+        changed = separate != self.param_separate
+        self.param_separate = separate
+        return changed
+
+    def update_params(self, plist: list):
         """Update camera's paramters and sliders shown on the windows.
+
+        The values are read by the ControlWriter of the camera, then the sliders
+        are updated when they are read.
+
+        Args:
+            plist (list): Parameters to show
         """
-        #self.current_params.clear()
-        self.current_params = self.camera.get_current_params("selected", plist)
-        for key, value in self.current_params.items():
-            self.add_slider(key)
-
-        # add sliders
-        grid = QGridLayout()
-        grid.setSpacing(15)
-        grid.setContentsMargins(20, 20, 20, 20)
-        for row, param in enumerate(self.current_params):
-            grid.addWidget(self.current_params[param]["slider_label"], row, 0)
-            grid.addWidget(self.current_params[param]["slider"], row, 1)
-            grid.addWidget(self.current_params[param]["slider_value"], row, 2)
-        if len(self.current_params) > 15:
-            self.param_separate = True
-        else:
-            self.param_separate = False
-        self.slider_group = grid
-        self.update_mainlayout()
+        self.tile.writer.submit(
+            "read controls", self.camera.get_current_params, "selected", plist,
+            callback=lambda command, tile=self.tile: self.show_params(tile, command.result))
+
+    def show_params(self, tile: CameraTile, params: dict):
+        """Shows the sliders of the parameters read from a camera.
+
+        Only the rows of the added parameters are created and the rows of the
+        removed ones deleted. The kept rows show the values just read.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            params (dict): Parameters in the shape of Camera.get_current_params
+        """
+        tile.camera.controls.load(params)
+        tile.param_names = list(params)
+        if tile.panel is None:
+            return
+        kept, added, removed = tile.panel.set_names(tile.param_names)
+        for row in tile.panel.rows.values():
+            value = tile.camera.controls.value(row.name)
+            if value is not None:
+                row.show_value(value)
+            self.update_slider_state(tile, row)
+        if tile is not self.tile:
+            return
+        self.param_names = tile.param_names
+        if self.show_panel():
+            self.update_mainlayout()
         self.update_prop_table()
-        self.write_text("update sliders")
-        return grid
+        self.write_text("update sliders: {} kept, {} added, {} removed".format(kept, added, removed))
 
-    def add_slider(self, param: str):
-        """Creates slider, labels to show pamarater's name and its value.
+    def switch_camera(self, index: int):
+        """Shows the sliders and properties of the selected camera.
 
         Args:
-            param (str): A parameter to create slider.
+            index (int): Index of the tile
         """
-        min_ = self.current_params[param]["min"]
-        max_ = self.current_params[param]["max"]
-        step = self.current_params[param]["step"]
-        value = self.current_params[param]["value"]
+        self.select_tile(index)
+        if self.show_panel():
+            self.update_mainlayout()
+        self.update_prop_table()
+        self.write_text("select camera: {}".format(self.tile.name))
 
-        slider = QSlider(Qt.Horizontal)
-        if max_:
-            slider.setRange(min_, max_)
-        else:
-            slider.setRange(0, 1)
-        slider.setValue(int(value))
-        slider.setTickPosition(QSlider.TicksBelow)
-        slider.valueChanged.connect(lambda val, p=param: self.set_sliderval(p, val))
-
-        if step:
-            if max_ < 5:
-                slider.setTickInterval(step)
-            else:
-                slider.setTickInterval(10)
+    def update_device_menu(self):
+        """Lists the cameras which can capture frames in the Device menu.
+
+        The cameras already shown are checked, and choosing one of them selects
+        its tile. Choosing another camera opens it as a new tile.
+        """
+        self.device_tab.clear()
+        opened = [tile.camera.device for tile in self.tiles]
+        devices = discover()
+        for device in devices:
+            self.device_tab.addSection(device.name)
+            for node in device.nodes:
+                act = self.device_tab.addAction(node.path)
+                act.setCheckable(True)
+                act.setChecked(node.device in opened)
+                act.triggered.connect(lambda checked=False, dev=node.device: self.select_device(dev))
+        if not devices:
+            self.device_tab.addAction("No camera found").setEnabled(False)
+
+    def select_device(self, device: int):
+        """Selects the tile of a camera, opening the camera if it is not shown yet.
+
+        Args:
+            device (int): Device number
+        """
+        for index, tile in enumerate(self.tiles):
+            if tile.camera.device == device:
+                self.camera_combo.setCurrentIndex(index)
+                return
+        self.add_camera(device)
+
+    def add_camera(self, device: int):
+        """Opens a camera and shows it as a new tile.
+
+        Args:
+            device (int): Device number
+        """
+        if self.is_sync:
+            self.write_text("Cannot add a camera in the sync mode", level="err", color="red")
+            return
+        try:
+            tile = self.create_tile(device)
+        except SystemExit:
+            # Camera.open_error exits at startup, but a camera opened later is only reported.
+            self.write_text("Cannot open /dev/video{}".format(device), level="err", color="red")
+            return
+        tile.camera.pixel_format = self.display_format
+        tile.convert_frame(self.frame)
+        tile.pixmap_item = self.scene.addPixmap(tile.pixmap)
+        self.tiles.append(tile)
+        worker = self.create_capture_worker(tile)
+        worker.frame_ready.connect(self.schedule_refresh)
+        self.capture_workers.append(worker)
+        worker.start()
+        self.start_control_writer(tile)
+        self.start_control_watcher(tile)
+        self.camera_combo.addItem(tile.name)
+        self.camera_label_act.setVisible(True)
+        self.camera_combo_act.setVisible(True)
+        self.layout_tiles()
+        self.camera_combo.setCurrentIndex(len(self.tiles) - 1)
+        self.write_text("open camera: {}".format(tile.name))
+
+    def add_slider(self, tile: CameraTile, param: str) -> ControlRow:
+        """Creates slider, labels to show pamarater's name and its value.
 
-        slider_label = QLabel(param)
-        slider_value = QLabel(str(value))
+        A menu control gets a combo box of its menu labels instead of a slider.
+        Called by the ControlPanel of the camera when the row is shown.
 
-        slider_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        slider_value.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        Args:
+            tile (CameraTile): The tile of the camera
+            param (str): A parameter to create slider.
 
-        self.current_params[param]["slider"] = slider
-        self.current_params[param]["slider_label"] = slider_label
-        self.current_params[param]["slider_value"] = slider_value
+        Returns:
+            ControlRow: The widgets of the parameter
+        """
+        spec = tile.camera.controls.spec(param)
+        if spec.menu:
+            # A menu item is chosen at once, so it is written without waiting for the rate limit.
+            changed = lambda val, p=param: self.set_sliderval(p, val, flush=True)
+        else:
+            changed = lambda val, p=param: self.set_sliderval(p, val)
+        # The last value of a drag is written without waiting for the rate limit.
+        released = lambda p=param: tile.writer.flush(p)
+        row = ControlRow(spec, tile.camera.controls.value(param), changed, released)
+        # Write-only controls such as buttons have no value to show.
+        self.update_slider_state(tile, row)
+        return row
 
     def add_prop_window(self) -> QGridLayout:
         """Create a table to show the current properties of camera.
@@ -610,11 +1025,15 @@ class Window(QMainWindow):
         self.main_layout.addLayout(self.create_information_layout())
 
     def update_mainlayout(self):
-        """Recreate the main layout.
+        """Arranges the information part again after param_separate has changed.
+
+        The group boxes are moved into the new layout, not created again.
         """
-        self.delete_layout(self.information_layout)
-        self.delete_layout(self.upper_right)
-        self.add_prop_window()
+        for layout in (self.upper_right, self.information_layout):
+            while layout.count():
+                layout.takeAt(0)
+        self.main_layout.removeItem(self.information_layout)
+        self.information_layout.deleteLater()
         self.main_layout.addLayout(self.create_information_layout())
 
     def delete_layout(self, layout):
@@ -646,54 +1065,25 @@ class Window(QMainWindow):
         upper-left: current properties
         upper-right: buttons
         lower: sliders
+
+        With many sliders (param_separate), the sliders are placed on the right of
+        the properties and buttons instead.
         """
         if self.param_separate:
-            self.entry_box = QVBoxLayout()
-            self.entry_box.addWidget(self.frame_button)
-            self.entry_box.addWidget(self.filerule_button)
-            self.entry_box.addWidget(self.default_button)
-            self.entry_box.addStretch(1)
-            self.entry_box.setSpacing(20)
-            self.entry_box.setContentsMargins(20, 20, 20, 20)
-
-            self.button_group_box = QGroupBox("Buttons", self)
-            self.button_group_box.setLayout(self.entry_box)
-            self.button_group_box.setAlignment(Qt.AlignLeft)
-
             self.upper_right = QVBoxLayout()
             self.upper_right.addWidget(self.prop_group, 1)
             self.upper_right.addWidget(self.button_group_box, 1)
 
-            self.slider_group_box = QGroupBox("Parameters")
-            self.slider_group_box.setLayout(self.slider_group)
-            self.slider_group_box.setContentsMargins(20, 20, 20, 20)
-
             self.information_layout = QHBoxLayout()
             self.information_layout.addLayout(self.upper_right, 1)
             self.information_layout.addWidget(self.slider_group_box, 2)
             #self.information_layout.addStretch(1)
             return self.information_layout
         else:
-            self.entry_box = QVBoxLayout()
-            self.entry_box.addWidget(self.frame_button)
-            self.entry_box.addWidget(self.filerule_button)
-            self.entry_box.addWidget(self.default_button)
-            self.entry_box.addStretch(1)
-            self.entry_box.setSpacing(20)
-            self.entry_box.setContentsMargins(20, 20, 20, 20)
-
-            self.button_group_box = QGroupBox("Buttons", self)
-            self.button_group_box.setLayout(self.entry_box)
-            self.button_group_box.setAlignment(Qt.AlignLeft)
-
             self.upper_right = QHBoxLayout()
             self.upper_right.addWidget(self.prop_group)
             self.upper_right.addWidget(self.button_group_box)
 
-            self.slider_group_box = QGroupBox("Parameters")
-            self.slider_group_box.setLayout(self.slider_group)
-            self.slider_group_box.setContentsMargins(20, 20, 20, 20)
-
             self.information_layout = QVBoxLayout()
             self.information_layout.addLayout(self.upper_right)
             self.information_layout.addWidget(self.slider_group_box)
@@ -705,11 +1095,9 @@ class Window(QMainWindow):
         def wrapper(self, *args, **kwargs):
             try:
                 self.is_display = False
-                self.stop_timer()
                 func(self, *args, **kwargs)
             finally:
                 self.is_display = True
-                self.start_timer()
         return wrapper
 
     def stop_frame(self, checked: bool):
@@ -747,12 +1135,14 @@ class Window(QMainWindow):
 
         The status bar is updates by the obtained values.
         """
-        if self.item is self.view.itemAt(event.pos()):
+        item = self.view.itemAt(event.pos())
+        tile = next((tile for tile in self.tiles if tile.pixmap_item is item), None)
+        if tile is not None:
             sp = self.view.mapToScene(event.pos())
-            lp = self.item.mapFromScene(sp).toPoint()
+            lp = tile.pixmap_item.mapFromScene(sp).toPoint()
             (x, y) = lp.x(), lp.y()
             #color = self.frame.image.pixel(x, y)
-            color = self.qimage.pixelColor(x, y)
+            color = tile.qimage.pixelColor(x, y)
             if self.colorspace == "rgb":
                 value = color.getRgb()
             elif self.colorspace == "gray":
@@ -781,47 +1171,38 @@ class Window(QMainWindow):
             for statbar, stat in zip(self.statbar_list, status_list):
                 statbar.showMessage(stat)
 
-    def next_frame(self):
-        """Get next frame from the connected camera.
+    def schedule_refresh(self):
+        """Schedules a refresh of the view area.
 
-        Get next frame, set it to the view area and update.
+        Notifications from the capture workers arriving before the refresh runs are
+        merged, so that the frames of all cameras are composited in one refresh.
         """
-        #print("display :", self.is_display)
-        if self.is_display:
-            self.camera.read_frame()
-            self.convert_frame()
-            self.scene.clear()
-            self.scene.addPixmap(self.pixmap)
-            self.update()
-            #print("update")
+        if not self.is_refresh_pending:
+            self.is_refresh_pending = True
+            QTimer.singleShot(0, self.next_frame)
 
-    def convert_frame(self):
-        """Convert the class of frame
-
-        Create qimage, qpixmap objects from ndarray frame for displaying on the window.
+    def next_frame(self):
+        """Displays the newest frames read by the capture workers.
 
+        Takes the latest frame of each tile, set it to the view area and update once.
         """
-        if self.colorspace == "rgb":
-            self.qimage = QImage(
-                self.camera.frame.data,
-                self.camera.frame.shape[1],
-                self.camera.frame.shape[0],
-                self.camera.frame.shape[1] * 3,
-                QImage.Format_RGB888
-                )
-        elif self.colorspace == "gray":
-            self.qimage = QImage(
-                self.camera.frame.data,
-                self.camera.frame.shape[1],
-                self.camera.frame.shape[0],
-                self.camera.frame.shape[1] * 1,
-                QImage.Format_Grayscale8)
-
-        self.pixmap.convertFromImage(self.qimage)
+        self.is_refresh_pending = False
+        updated = False
+        for tile in self.tiles:
+            if self.is_display:
+                updated |= tile.take_frame()
+            else:
+                tile.discard_frame()
+        if updated:
+            self.update()
 
     def save_frame(self):
         """Save the frame on the window as an image.
+
+        In the sync mode, the frames of the latest set are saved together.
         """
+        if self.group is not None:
+            return self.save_frame_set()
         if self.filename_rule == "Manual":
             self.save_frame_manual()
             if not self.filename:
@@ -833,17 +1214,82 @@ class Window(QMainWindow):
 
         if not self.dst.exists():
             self.dst.mkdir(parents=True)
-        im = Image.fromarray(self.camera.frame)
-        im.save(self.filename)
-
-        # make a parameter file
-        with open(prm, "w") as f:
-            for name, key in self.current_params.items():
-                f.write("{},{}\n".format(name, self.current_params[name]["value"]))
+        record = self.camera.hold_frame()
+        if record is None:
+            return None
+        try:
+            self.write_image(record, str(self.filename))
+        finally:
+            self.camera.release_record(record)
+        self.write_params(record, prm)
 
         self.write_text("{:<10}: {}".format("save image", self.filename))
         self.write_text("{:<10}: {}".format("save param", prm))
 
+    def save_frame_set(self):
+        """Saves the frames of the latest set grabbed by the capture group.
+
+        Each frame is saved as <name>_video<X>.<ext> with its parameter file
+        <name>_video<X>.csv. <name>.csv lists the sequence number and capture time of
+        each frame and the skew of the set.
+        """
+        if self.filename_rule == "Manual":
+            self.save_frame_manual()
+            if not self.filename:
+                return None
+            base = re.sub(r"\.[^.]*$", "", str(self.filename))
+        else:
+            base = re.sub(r"\.csv$", "", FileIO.get_filename(self.filename_rule, "csv", self.parent_dir))
+
+        if not self.dst.exists():
+            self.dst.mkdir(parents=True)
+        frame_set = self.group.hold_set()
+        if frame_set is None:
+            return None
+        try:
+            for tile, record in zip(self.tiles, frame_set.records):
+                filename = "{}_{}.{}".format(base, tile.name, self.image_suffix)
+                self.write_image(record, filename)
+                self.write_params(record, "{}_{}.csv".format(base, tile.name))
+                self.write_text("{:<10}: {}".format("save image", filename))
+        finally:
+            self.group.release_set(frame_set)
+
+        prm = "{}.csv".format(base)
+        with open(prm, "w") as f:
+            f.write("device,sequence,timestamp\n")
+            for tile, record in zip(self.tiles, frame_set.records):
+                f.write("{},{},{:.6f}\n".format(tile.name, record.sequence, record.timestamp))
+            f.write("skew,,{:.6f}\n".format(frame_set.skew))
+        self.write_text("{:<10}: {}".format("save set", prm))
+
+    def write_image(self, record, filename: str):
+        """Writes the frame of the record into an image file.
+
+        Args:
+            record (FrameRecord): The frame
+            filename (str): Filename of the image
+        """
+        frame = record.frame
+        if isinstance(frame, JpegFrame) and re.search(r"\.jpe?g$", filename):
+            # Write the payload of the camera as it is without decoding.
+            with open(filename, "wb") as f:
+                f.write(frame.data)
+        else:
+            im = Image.fromarray(as_rgb(as_array(frame), record.pixel_format))
+            im.save(filename)
+
+    def write_params(self, record, filename: str):
+        """Writes the control values active when the frame was captured.
+
+        Args:
+            record (FrameRecord): The frame
+            filename (str): Filename of the parameter file
+        """
+        with open(filename, "w") as f:
+            for name, value in record.controls.items():
+                f.write("{},{}\n".format(name, value))
+
     def update_prop_table(self):
         """Updates the table that shows the camera properties.
         """
@@ -854,7 +1300,8 @@ class Window(QMainWindow):
             ["Height", int(h)],
             ["FPS", "{:.1f}".format(f)],
             ["Bit depth", 8],
-            ["Naming Style", self.filename_rule]
+            ["Naming Style", self.filename_rule],
+            ["Device", self.tile.name]
         ]
         col = 1
         for row in range(len(self.prop_table)):
@@ -863,15 +1310,29 @@ class Window(QMainWindow):
 
     def record(self):
         """Start or end recording
+
+        In the sync mode, all cameras are recorded from the same set into
+        <name>_video<X>.<ext>, and the capture times of each set are written into <name>.csv.
         """
         if self.camera.is_recording:
-            self.camera.stop_recording()
+            if self.group is not None:
+                self.group.stop_recording()
+            else:
+                self.camera.stop_recording()
             self.rec_button.setText('&Rec')
             self.rec_act.setText('&Record')
             self.write_text("save : {}".format(self.video_filename))
         else:
-            self.video_filename = FileIO.get_filename(self.filename_rule, self.video_suffix, self.parent_dir)
-            self.camera.start_recording(self.video_filename, self.video_codec)
+            # The JPEG payload is recorded as a MJPEG stream in the pass-through mode.
+            suffix = "mjpg" if self.camera.is_passthrough else self.video_suffix
+            if self.group is not None:
+                self.video_filename = FileIO.get_filename(self.filename_rule, "csv", self.parent_dir)
+                base = re.sub(r"\.csv$", "", self.video_filename)
+                filenames = ["{}_{}.{}".format(base, tile.name, suffix) for tile in self.tiles]
+                self.group.start_recording(filenames, self.video_codec, self.video_filename)
+            else:
+                self.video_filename = FileIO.get_filename(self.filename_rule, suffix, self.parent_dir)
+                self.camera.start_recording(self.video_filename, self.video_codec)
             self.rec_button.setText('Stop rec')
             self.rec_act.setText('Stop record')
 
@@ -904,7 +1365,10 @@ class Window(QMainWindow):
         """Get current screen size from the output of linux cmd `xrandr`.
         """
         cmd = ["xrandr"]
-        ret = subprocess.check_output(cmd)
+        try:
+            ret = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            return None
         output = ret.decode()
         pattern = r"current(\s+\d+\s+x\s+\d+)"
 
@@ -916,27 +1380,258 @@ class Window(QMainWindow):
         else:
             return None
 
-    def set_sliderval(self, param: str, value: int):
+    def set_sliderval(self, param: str, value: int, flush: bool = False):
         """Changes a camera parameter.
 
-        Updates the label on the right of the slider if input value is valid.
+        The value is passed to the ControlWriter of the camera, which writes it off
+        the GUI thread. Updates the label on the right of the slider.
 
         Args:
             param (str): A camera parameter
             value (int): its value
+            flush (bool, optional): Writes the value without waiting for the rate
+                limit. Defaults to False.
         """
-        val = self.camera.set_parameter(param, value)
-        self.current_params[param]["value"] = str(val)
-        self.current_params[param]["slider_value"].setText(str(value))
+        self.tile.writer.set_value(param, value)
+        if flush:
+            self.tile.writer.flush(param)
+        self.control_rows[param].value_label.setText(str(value))
 
     def set_param_default(self):
         """Sets all paramters to default.
+
+        The default values are written together in one batch by the ControlWriter.
+        The sliders are moved with their signals blocked, so that they do not
+        write the values again. Rejected values are reported by control_failed.
+        """
+        specs = [self.controls.spec(param) for param in self.param_names]
+        defaults = {spec.name: spec.default for spec in specs if spec.default is not None}
+        self.tile.writer.set_values(defaults)
+        self.move_sliders(self.tile, defaults)
+
+    def move_sliders(self, tile: CameraTile, values: dict):
+        """Moves the sliders of a camera without writing the values.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            values (dict): Value of each control name. Controls without a slider
+                are skipped.
+        """
+        if tile.panel is None:
+            return
+        for param, value in values.items():
+            row = tile.panel.get(param)
+            if row is not None:
+                row.show_value(value)
+
+    def update_profile_menu(self):
+        """Lists the profiles of the selected camera in the Apply Profile menu.
+        """
+        self.apply_profile_menu.clear()
+        names = self.profiles.names(self.camera.get_identity())
+        for name in names:
+            act = self.apply_profile_menu.addAction(name)
+            act.triggered.connect(lambda checked=False, name=name: self.apply_profile(name))
+        self.apply_profile_menu.setEnabled(bool(names))
+        self.delete_profile_act.setEnabled(bool(names))
+
+    def save_profile(self):
+        """Stores the frame properties and the control values of the selected camera as a profile.
+
+        The values are read by the ControlWriter of the camera.
+        """
+        name, ok = QInputDialog.getText(self, "Save profile", "Profile name")
+        name = name.strip()
+        if not ok or not name:
+            return
+        camera = self.camera
+        self.tile.writer.submit(
+            "read controls", lambda: create_profile(camera.get_properties(), camera.get_current_params("full")),
+            callback=lambda command: self.store_profile(camera, name, command.result))
+
+    def store_profile(self, camera, name: str, profile: dict):
+        if self.profiles.save(camera.get_identity(), name, profile):
+            self.write_text("save profile {}: {} controls".format(name, len(profile["controls"])))
+        else:
+            self.write_text("Cannot save the profile {}".format(name), level="err", color="red")
+
+    def apply_profile(self, name: str):
+        """Applies a profile to the selected camera.
+
+        The profile is compared with the current state read from the camera. Only
+        the controls whose values differ are written, together in one batch, and
+        the stream is restarted only if the fourcc, size or FPS differs. All of
+        them are done as one command of the ControlWriter of the camera.
+
+        Args:
+            name (str): Profile name
+        """
+        profile = self.profiles.load(self.camera.get_identity(), name)
+        if profile is None:
+            self.write_text("No profile {}".format(name), level="err", color="red")
+            return
+        tile = self.tile
+        tile.writer.submit(
+            "profile", self.run_profile, tile, profile,
+            callback=lambda command: self.profile_applied(tile, name, *command.result))
+
+    def run_profile(self, tile: CameraTile, profile: dict) -> tuple:
+        """Writes the differences of a profile. Runs in the thread of the ControlWriter.
+
+        Returns:
+            tuple: The changed properties (None if the format is kept) and controls.
+        """
+        camera = tile.camera
+        params = camera.get_current_params("selected", list(profile["controls"]))
+        properties, controls = diff_profile(profile, camera.get_properties(), params)
+        if properties is not None:
+            camera.set_properties(
+                properties["fourcc"], properties["width"], properties["height"], properties["fps"])
+        if controls:
+            tile.writer.write_batch(controls)
+        return properties, controls
+
+    def profile_applied(self, tile: CameraTile, name: str, properties: dict, controls: dict):
+        """Shows the state of a camera after applying a profile.
+        """
+        if properties is not None:
+            self.layout_tiles()
+        if tile is self.tile:
+            self.update_prop_table()
+        self.move_sliders(tile, controls)
+        self.write_text("apply profile {}: {} control(s) changed, format {}".format(
+            name, len(controls), "changed" if properties is not None else "unchanged"))
+
+    def change_properties(self, fourcc: str, width: int, height: int, fps: float, tile: CameraTile = None):
+        """Changes the format of a camera by its ControlWriter.
+
+        Args:
+            fourcc (str): Fourcc
+            width (int): Frame width
+            height (int): Frame heigth
+            fps (float): Frame FPS
+            tile (CameraTile, optional): The tile of the camera. Defaults to the
+                selected tile.
+        """
+        tile = tile or self.tile
+        tile.writer.submit(
+            "format", tile.camera.set_properties, fourcc, width, height, fps,
+            callback=lambda command: self.properties_changed(tile))
+
+    def properties_changed(self, tile: CameraTile):
+        self.layout_tiles()
+        if tile is self.tile:
+            self.update_prop_table()
+
+    def get_buses(self) -> dict:
+        """Finds the USB bus of each camera.
+
+        Returns:
+            dict: (bus, speed) of each tile. A camera which is not found on a USB
+                bus gets a bus of its own, planned as a high speed device.
         """
-        for param, values in self.current_params.items():
-            default = values["default"]
-            self.camera.set_parameter(param, default)
-            self.current_params[param]["slider"].setValue(int(default))
-            self.current_params[param]["slider_value"].setText(str(default))
+        nodes = {}
+        for device in discover():
+            for node in device.nodes:
+                nodes[node.device] = device
+        buses = {}
+        for tile in self.tiles:
+            device = nodes.get(tile.camera.device)
+            if device is not None and device.bus:
+                buses[tile] = (device.bus, device.speed)
+            else:
+                buses[tile] = (tile.name, default_speed)
+        return buses
+
+    def apply_auto_mode(self, width: int, height: int, fps: float):
+        """Switches every camera to the mode nearest to a target which fits its USB bus.
+
+        The bandwidth of a bus is shared by the cameras on it (see modeplan.plan_bus).
+
+        Args:
+            width (int): Target width
+            height (int): Target height
+            fps (float): Target FPS
+        """
+        groups = {}
+        for tile, (bus, speed) in self.get_buses().items():
+            groups.setdefault((bus, speed), []).append(tile)
+        for (bus, speed), tiles in groups.items():
+            indexes = [tile.camera.get_capabilities() for tile in tiles]
+            for tile, plan in zip(tiles, plan_bus(indexes, width, height, fps, speed)):
+                self.report_plan(tile, plan)
+                if plan is not None:
+                    self.change_properties(*plan.mode, tile=tile)
+
+    def plan_mode(self, tile: CameraTile, width: int, height: int, fps: float):
+        """Picks the mode of a camera nearest to a target within the bandwidth left
+        by the other cameras on its USB bus.
+
+        Args:
+            tile (CameraTile): The tile of the camera
+            width (int): Target width
+            height (int): Target height
+            fps (float): Target FPS
+
+        Returns:
+            ModePlan: The chosen mode. None if the camera has no mode.
+        """
+        buses = self.get_buses()
+        bus, speed = buses[tile]
+        used = 0.0
+        for other in self.tiles:
+            if other is not tile and buses[other][0] == bus:
+                other_width, other_height, other_fourcc, other_fps = other.camera.get_properties()
+                used += bandwidth(other_fourcc, int(other_width), int(other_height), float(other_fps))
+        plan = best_mode(tile.camera.get_capabilities(), width, height, fps, camera_budget(speed, used))
+        self.report_plan(tile, plan)
+        return plan
+
+    def report_plan(self, tile: CameraTile, plan):
+        if plan is None:
+            self.write_text("{}: no mode to choose".format(tile.name), level="err", color="red")
+        elif plan.fits:
+            self.write_text("auto mode {}: {}".format(tile.name, plan))
+        else:
+            self.write_text(
+                "auto mode {}: {}, exceeds the USB bandwidth".format(tile.name, plan), level="warn", color="red")
+
+    def delete_profile(self):
+        """Removes a profile of the selected camera.
+        """
+        identity = self.camera.get_identity()
+        names = self.profiles.names(identity)
+        if not names:
+            return
+        name, ok = QInputDialog.getItem(self, "Delete profile", "Profile name", names, 0, False)
+        if ok and self.profiles.delete(identity, name):
+            self.write_text("delete profile {}".format(name))
+
+    def show_statistics(self):
+        """Writes the statistics of capture and frame buffers into information window.
+        """
+        for tile in self.tiles:
+            camera = tile.camera
+            self.write_text("Capture statistics: {}".format(tile.name))
+            self.write_text("-" * 80)
+            self.write_text("{:<20} : {}".format("overwritten frames", tile.overwritten_frames))
+            self.write_text("{:<20} : {}".format("lost frames", camera.drops.dropped))
+            self.write_text("{:<20} : {}".format("gaps", camera.drops.gaps))
+            for key, value in camera.pool.get_counters().items():
+                self.write_text("{:<20} : {}".format("buffers " + key, value))
+            for key, value in tile.writer.get_counters().items():
+                self.write_text("{:<20} : {}".format("controls " + key, value))
+            if tile.watcher is not None:
+                self.write_text("{:<20} : {}".format("controls events", tile.watcher.events))
+            for name, stats in tile.writer.get_latencies().items():
+                self.write_text("{:<20} : {}".format("latency " + name, stats))
+            self.write_text("-" * 80)
+        if self.group is not None:
+            self.write_text("Capture group")
+            self.write_text("-" * 80)
+            for key, value in self.group.get_counters().items():
+                self.write_text("{:<20} : {}".format(key, value))
+            self.write_text("-" * 80)
 
     def get_properties(self) -> list:
         """Get the current camera properties.
@@ -952,11 +1647,17 @@ class Window(QMainWindow):
     def write_text(self, text: str, level: str = "info", color: str = None):
         """Writes the message into information window.
 
+        The message written from another thread, such as the thread of a
+        ControlWriter, is passed to the GUI thread.
+
         Args:
             text (str): A text to write.
             level (str, optional): Log lebel of the message. Defaults to "info".
             color (str, optional): Font color. Defaults to None.
         """
+        if QThread.currentThread() != self.thread():
+            self.text_requested.emit(text, level, color)
+            return
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
         now = now[:-3]
         if color == "red":
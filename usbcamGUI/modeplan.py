@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Choosing capture modes which fit the bandwidth of the USB bus.
+
+A USB camera streams through an isochronous endpoint, which reserves its data
+rate on the bus when streaming starts. A mode needing more than the endpoint or
+than what is left on the bus cannot be started, or runs slower than its FPS. The
+planner estimates the data rate of each mode of the capability table (see
+capindex.bandwidth), and picks the mode nearest to a target among the modes
+which fit, sharing the bus between the cameras on it.
+"""
+import math
+import re
+
+from capindex import bandwidth, compressed_fourcc
+
+
+# Bytes per second of a USB bus available to isochronous transfers, and of one
+# isochronous endpoint, by the speed of the device in sysfs (Mbit/s).
+usb_budgets = {
+    # full speed: 90% of each 1 ms frame, 1023 bytes per frame
+    12: (1350000, 1023000),
+    # high speed: 80% of each 125 us microframe, 3 x 1024 bytes per microframe
+    480: (48000000, 24576000),
+    # super speed: 90% of the link, 3 x 16 x 1024 bytes per 125 us
+    5000: (450000000, 393216000),
+}
+# Cameras whose speed cannot be read are planned as high speed devices.
+default_speed = 480
+
+target_format = re.compile(r"(\d+)x(\d+)@(\d+(?:\.\d+)?)")
+
+
+def parse_target(text: str) -> tuple:
+    """Parses a target mode such as "1280x720@30".
+
+    Returns:
+        tuple: width, height and fps.
+
+    Raises:
+        ValueError: The text is not in the shape of WxH@fps.
+    """
+    match = target_format.fullmatch(text.strip())
+    if match is None:
+        raise ValueError("invalid mode: {} (expected WxH@fps such as 1280x720@30)".format(text))
+    width, height, fps = int(match.group(1)), int(match.group(2)), float(match.group(3))
+    if not width or not height or not fps:
+        raise ValueError("invalid mode: {}".format(text))
+    return width, height, fps
+
+
+def usb_budget(speed) -> tuple:
+    """Gets the bandwidth of a USB bus and of one camera on it.
+
+    Args:
+        speed (str): USB speed in Mbit/s as read from sysfs. Faster buses than
+            the known ones get the budget of the fastest known speed below them.
+
+    Returns:
+        tuple: (bus, camera) bytes per second.
+    """
+    try:
+        speed = float(speed)
+    except (TypeError, ValueError):
+        speed = default_speed
+    known = [known for known in sorted(usb_budgets) if known <= speed]
+    return usb_budgets[known[-1] if known else min(usb_budgets)]
+
+
+def camera_budget(speed, used: float = 0.0) -> float:
+    """Gets the bandwidth left for a camera when other cameras on the bus use some.
+
+    Args:
+        speed (str): USB speed in Mbit/s
+        used (float, optional): Bytes per second used by the other cameras on
+            the bus. Defaults to 0.0.
+
+    Returns:
+        float: Bytes per second.
+    """
+    bus, endpoint = usb_budget(speed)
+    return max(0.0, min(endpoint, bus - used))
+
+
+class ModePlan():
+    """A mode chosen by the planner.
+
+    Args:
+        mode (tuple): fourcc, width, height and fps
+        bandwidth (float): Estimated bytes per second of the mode
+        budget (float): Bytes per second given to the camera. None if unlimited.
+    """
+
+    __slots__ = ("mode", "bandwidth", "budget")
+
+    def __init__(self, mode: tuple, bandwidth: float, budget: float = None):
+        self.mode = mode
+        self.bandwidth = bandwidth
+        self.budget = budget
+
+    @property
+    def fits(self) -> bool:
+        return self.budget is None or self.bandwidth <= self.budget
+
+    def __str__(self) -> str:
+        text = "{} {}x{} {:.2f} fps, {:.1f} MB/s".format(*self.mode, self.bandwidth / 1e6)
+        if self.budget is not None:
+            text += " of {:.1f} MB/s".format(self.budget / 1e6)
+        return text
+
+
+def best_mode(index, width: int, height: int, fps: float, budget: float = None) -> ModePlan:
+    """Picks the mode nearest to a target among the modes within a budget.
+
+    A mode reaching the target FPS is preferred, then the size nearest in area
+    and in aspect ratio, the FPS nearest to the target, an uncompressed format
+    (which needs no decoding) and the lower data rate. If no mode fits, the mode
+    with the lowest data rate is chosen, and the plan does not fit.
+
+    Args:
+        index (CapabilityIndex): Modes of the camera
+        width (int): Target width
+        height (int): Target height
+        fps (float): Target FPS
+        budget (float, optional): Bytes per second. Defaults to None (unlimited).
+
+    Returns:
+        ModePlan: The chosen mode. None if the camera has no mode.
+    """
+    best = None
+    best_key = None
+    cheapest = None
+    for mode in index.modes():
+        rate = bandwidth(*mode)
+        if cheapest is None or rate < cheapest.bandwidth:
+            cheapest = ModePlan(mode, rate, budget)
+        if budget is not None and rate > budget:
+            continue
+        cc, w, h, f = mode
+        key = (
+            f < fps - 0.01,
+            abs(math.log((w * h) / (width * height))),
+            abs(w / h - width / height),
+            abs(f - fps),
+            cc in compressed_fourcc,
+            rate
+        )
+        if best_key is None or key < best_key:
+            best, best_key = ModePlan(mode, rate, budget), key
+    return best or cheapest
+
+
+def plan_bus(indexes: list, width: int, height: int, fps: float, speed=default_speed) -> list:
+    """Picks the modes of the cameras on one bus.
+
+    Each camera gets an equal share of the bus left by the cameras planned
+    before it, up to the endpoint limit. The cameras needing less are planned
+    first, so that the bandwidth they leave goes to the others.
+
+    Args:
+        indexes (list): CapabilityIndex of each camera
+        width (int): Target width
+        height (int): Target height
+        fps (float): Target FPS
+        speed (str, optional): USB speed of the bus in Mbit/s. Defaults to 480.
+
+    Returns:
+        list: ModePlan of each camera in the order of indexes. None for a camera
+            without mode.
+    """
+    bus, endpoint = usb_budget(speed)
+    wanted = [best_mode(index, width, height, fps, endpoint) for index in indexes]
+    order = sorted(range(len(indexes)), key=lambda i: wanted[i].bandwidth if wanted[i] else 0.0)
+    plans = [None] * len(indexes)
+    left = bus
+    for count, i in enumerate(order):
+        share = min(endpoint, left / (len(order) - count))
+        plans[i] = best_mode(indexes[i], width, height, fps, share)
+        if plans[i] is not None:
+            left = max(0.0, left - plans[i].bandwidth)
+    return plans
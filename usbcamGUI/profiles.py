@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Named profiles of camera settings stored on disk.
+
+A profile holds the frame properties (fourcc, size and FPS) and the control values
+of a camera. The profiles of a camera are written into one JSON file under
+~/.config/usbcamGUI/profiles, found by the identity of the camera, so that a
+profile follows the camera to another USB port when it has a serial number.
+
+Applying a profile only changes what differs from the current state: the
+controls whose values differ are written in one batch, and the stream is
+restarted only if the format differs.
+"""
+import json
+from pathlib import Path
+
+from ctrlinfo import is_adjustable, parse_flags
+from fileIO import FileIO
+
+
+def config_dir() -> Path:
+    """Gets the default configuration directory.
+
+    Returns:
+        Path: $XDG_CONFIG_HOME/usbcamGUI, or ~/.config/usbcamGUI.
+    """
+    return FileIO.user_dir("XDG_CONFIG_HOME", ".config")
+
+
+def properties_dict(properties: list) -> dict:
+    """Converts the output of Camera.get_properties into the properties of a profile.
+
+    Args:
+        properties (list): width, height, fourcc and fps
+
+    Returns:
+        dict: fourcc, width, height and fps.
+    """
+    width, height, fourcc, fps = properties
+    return {"fourcc": str(fourcc), "width": int(width), "height": int(height), "fps": float(fps)}
+
+
+def create_profile(properties: list, params: dict) -> dict:
+    """Creates a profile from the current state of a camera.
+
+    Controls without a value (e.g. buttons), and controls which cannot be changed
+    now (read-only, or inactive such as the exposure time under auto exposure)
+    are left out, since writing them would fail or have no effect.
+
+    Args:
+        properties (list): Output of Camera.get_properties
+        params (dict): current_params of the camera
+
+    Returns:
+        dict: properties and controls of the profile.
+    """
+    controls = {}
+    for name, values in params.items():
+        if values["value"] is None:
+            continue
+        if not is_adjustable(parse_flags(values.get("flags") or "")):
+            continue
+        controls[name] = values["value"]
+    return {"properties": properties_dict(properties), "controls": controls}
+
+
+def diff_profile(profile: dict, properties: list, params: dict) -> tuple:
+    """Compares a profile with the current state of a camera.
+
+    Args:
+        profile (dict): The profile to be applied
+        properties (list): Output of Camera.get_properties
+        params (dict): Current value of each control name, in the shape of
+            Camera.get_current_params
+
+    Returns:
+        tuple: (properties, controls). properties is the dict of the profile if
+            the format differs, otherwise None. controls is the value of each
+            control which differs. Controls the camera does not have are skipped.
+    """
+    current = properties_dict(properties)
+    target = profile["properties"]
+    changed = None
+    if (target["fourcc"], target["width"], target["height"]) != \
+            (current["fourcc"], current["width"], current["height"]) \
+            or abs(target["fps"] - current["fps"]) > 0.01:
+        changed = target
+    controls = {
+        name: value for name, value in profile["controls"].items()
+        if name in params and params[name]["value"] != value
+    }
+    return changed, controls
+
+
+class ProfileStore():
+    """Profiles of cameras stored as JSON files.
+
+    Each file holds the identity of the camera and its profiles::
+
+        {
+            "identity": {"driver": ..., "card": ..., "bus_info": ..., "serial": ...},
+            "profiles": {
+                name: {
+                    "properties": {"fourcc": ..., "width": ..., "height": ..., "fps": ...},
+                    "controls": {control name: value, ...}
+                },
+                ...
+            }
+        }
+
+    Args:
+        directory (Path, optional): Directory of the profile files. Defaults to
+            config_dir() / "profiles".
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory) if directory else config_dir() / "profiles"
+
+    def key(self, identity: dict) -> tuple:
+        """Gets the fields naming the file of a camera.
+
+        The USB serial number identifies a camera on any port. Without a serial
+        number, the camera is identified by the port (bus_info). The driver and
+        firmware versions are not used, so that the profiles survive updates.
+        """
+        if identity.get("serial"):
+            return identity.get("driver", ""), identity.get("card", ""), identity["serial"]
+        return identity.get("driver", ""), identity.get("card", ""), identity.get("bus_info", "")
+
+    def path(self, identity: dict) -> Path:
+        return self.directory / FileIO.hashed_filename(self.key(identity))
+
+    def load_all(self, identity: dict) -> dict:
+        """Loads the profiles of a camera.
+
+        Returns:
+            dict: Profile of each name. Empty if the camera has no profile.
+        """
+        try:
+            with open(self.path(identity)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        profiles = entry.get("profiles")
+        return profiles if isinstance(profiles, dict) else {}
+
+    def names(self, identity: dict) -> list:
+        return sorted(self.load_all(identity))
+
+    def load(self, identity: dict, name: str) -> dict:
+        """Loads a profile.
+
+        Returns:
+            dict: properties and controls. None if the profile does not exist.
+        """
+        return self.load_all(identity).get(name)
+
+    def save(self, identity: dict, name: str, profile: dict) -> bool:
+        """Stores a profile, replacing the profile of the same name.
+
+        Args:
+            identity (dict): Identity of the camera
+            name (str): Profile name
+            profile (dict): properties and controls (see create_profile)
+
+        Returns:
+            bool: False if the file cannot be written.
+        """
+        profiles = self.load_all(identity)
+        profiles[name] = profile
+        return self.write(identity, profiles)
+
+    def delete(self, identity: dict, name: str) -> bool:
+        """Removes a profile.
+
+        Returns:
+            bool: False if the profile does not exist or the file cannot be written.
+        """
+        profiles = self.load_all(identity)
+        if profiles.pop(name, None) is None:
+            return False
+        return self.write(identity, profiles)
+
+    def write(self, identity: dict, profiles: dict) -> bool:
+        """Writes the profiles of a camera (see FileIO.write_json).
+        """
+        entry = {
+            "identity": {field: identity.get(field, "") for field in ("driver", "card", "bus_info", "serial")},
+            "profiles": profiles,
+        }
+        return FileIO.write_json(self.path(identity), entry, indent=2)
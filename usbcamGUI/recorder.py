@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Asynchronous video recording.
+
+Frames are passed to a writer thread through a bounded queue, so that a slow
+encoder never lowers the capture rate. What happens when the queue is full is
+decided by the drop policy.
+"""
+import queue
+import threading
+
+
+class RecordWriter(threading.Thread):
+    """Thread writing frames into a video writer.
+
+    Drop policies when the queue is full:
+        - block: Waits until the writer thread takes a frame. No frame is dropped,
+          but capture slows down to the encoding rate.
+        - drop-oldest: Drops the oldest frame in the queue to make room.
+        - drop-newest: Drops the frame being added.
+
+    Args:
+        writer: cv2.VideoWriter or an object with the same write/release interface.
+        maxsize (int, optional): Maximum number of queued frames. Defaults to 64.
+        policy (str, optional): Drop policy. Defaults to "drop-oldest".
+        release (callable, optional): Called with each frame once it is written or
+            dropped, to give a pooled buffer back.
+    """
+
+    policies = ["block", "drop-oldest", "drop-newest"]
+
+    def __init__(self, writer, maxsize: int = 64, policy: str = "drop-oldest", release=None):
+        super().__init__(daemon=True)
+        if policy not in self.policies:
+            raise ValueError("unknown drop policy: {}".format(policy))
+        self.writer = writer
+        self.policy = policy
+        self.release = release or (lambda frame: None)
+        self.queue = queue.Queue(maxsize)
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.end_of_stream = object()
+
+    def put(self, frame):
+        """Adds a frame to the queue according to the drop policy.
+
+        Args:
+            frame: The frame to write.
+        """
+        if self.policy == "block":
+            self.queue.put(frame)
+            with self.lock:
+                self.queued += 1
+            return
+
+        with self.lock:
+            try:
+                self.queue.put_nowait(frame)
+                self.queued += 1
+                return
+            except queue.Full:
+                pass
+            if self.policy == "drop-newest":
+                self.dropped += 1
+                self.release(frame)
+                return
+            try:
+                self.release(self.queue.get_nowait())
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(frame)
+                self.queued += 1
+            except queue.Full:
+                self.dropped += 1
+                self.release(frame)
+
+    def run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is self.end_of_stream:
+                break
+            self.writer.write(frame)
+            self.release(frame)
+            with self.lock:
+                self.written += 1
+
+    def close(self):
+        """Writes the remaining frames, then releases the video writer.
+        """
+        self.queue.put(self.end_of_stream)
+        self.join()
+        self.writer.release()
+
+    def get_counters(self) -> dict:
+        """Gets the number of frames queued, written and dropped.
+
+        Returns:
+            dict: Counters.
+        """
+        with self.lock:
+            return {
+                "queued": self.queued,
+                "written": self.written,
+                "dropped": self.dropped,
+            }
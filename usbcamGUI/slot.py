@@ -8,12 +8,13 @@ from PySide2.QtWidgets import (
     QMessageBox, QScrollArea, QLabel, QFrame, QTableWidget, QTableWidgetItem, QInputDialog, QDialog,
     QAbstractItemView, QSizePolicy, QFileDialog, QAbstractScrollArea, QGroupBox,
     QGraphicsPixmapItem, QSlider, QFontDialog, QDialogButtonBox, QToolBar, QSpinBox, QComboBox,
-    QFontComboBox, QRadioButton, QButtonGroup, QCheckBox
+    QFontComboBox, QRadioButton, QButtonGroup, QCheckBox, QLineEdit
     )
 from PySide2.QtGui import QIcon, QFont, QPixmap, QImage, QBitmap, QTextDocument
 from PySide2.QtCore import Qt, QTimer, QTextStream, QFile, QSize
 
 from text import MessageText
+from modeplan import parse_target
 
 
 class Slot():
@@ -24,16 +25,13 @@ class Slot():
 
     # decorator
     def display(func):
+        # The cameras keep reading, so that no gap is made by a dialog.
         def wrapper(self, *args, **kwargs):
             try:
                 self.parent.is_display = False
-                self.parent.camera.is_reading = False
-                self.parent.stop_timer()
                 func(self, *args, **kwargs)
             finally:
                 self.parent.is_display = True
-                self.parent.camera.is_reading = True
-                self.parent.start_timer()
         return wrapper
 
     def switch_theme(self):
@@ -103,7 +101,7 @@ class Slot():
         self.button_box.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         for label in self.parent.support_params:
             self.check_box = QCheckBox(label)
-            if label in self.parent.current_params.keys():
+            if label in self.parent.param_names:
                 self.check_box.setChecked(True)
             self.check_boxes.append(self.check_box)
             self.vbox2.addWidget(self.check_box)
@@ -256,6 +254,9 @@ class Slot():
         size_button.clicked.connect(self.select_size)
         fps_button = QPushButton("...")
         fps_button.clicked.connect(self.select_fps)
+        auto_button = QPushButton("Auto")
+        auto_button.setToolTip("Choose the mode nearest to a size and FPS which fits the USB bandwidth")
+        auto_button.clicked.connect(self.select_auto)
 
         grid = QGridLayout()
         grid.addWidget(self.parent.fourcc_label, 0, 0)
@@ -267,6 +268,7 @@ class Slot():
         grid.addWidget(self.parent.fps_label, 2, 0)
         grid.addWidget(self.parent.fps_result, 2, 1)
         grid.addWidget(fps_button, 2, 2)
+        grid.addWidget(auto_button, 3, 2)
         grid.setSpacing(5)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -309,7 +311,7 @@ class Slot():
             self.select_fourcc()
             return True
 
-        if self.parent.camtype == "usb_cam":
+        if self.parent.camtype in ("usb_cam", "synthetic"):
             items = self.parent.camera.get_supported_size(self.parent.fourcc_result.text())
         #elif self.camtype == "raspi":
         else:
@@ -337,7 +339,7 @@ class Slot():
             self.select_size()
             return True
 
-        if self.parent.camtype == "usb_cam":
+        if self.parent.camtype in ("usb_cam", "synthetic"):
             width, height = map(str, self.parent.size_result.text().split("x"))
             items = self.parent.camera.get_supported_fps(
                 self.parent.fourcc_result.text(),
@@ -360,40 +362,49 @@ class Slot():
             return None
 
     def search_size(self, *args):
-        lst = []
-        for fourcc in args:
-            lst.extend([i for i in self.parent.v4l2.vidcap_format if fourcc in i])
-
+        index = self.parent.camera.get_capabilities()
         size_lst = []
-        for i in lst:
-            size = "{}x{}".format(i[1], i[2])
-            if size not in size_lst:
-                size_lst.append(size)
-        return size_lst
+        for fourcc in args:
+            size_lst.extend(index.size_list(fourcc))
+        return list(dict.fromkeys(size_lst))
 
     def search_fps(self, fourcc, size):
         width, height = map(int, size.split("x"))
-        match = [fourcc, width, height]
-        fps_lst = []
-        for i in self.parent.v4l2.vidcap_format:
-            if set(i) >= set(match):
-                fps = i[-1]
-                if fps not in fps_lst:
-                    fps_lst.append(str(fps))
-        return fps_lst
+        return self.parent.camera.get_capabilities().fps_list(fourcc, width, height)
+
+    def select_auto(self):
+        """Fills the fourcc, size and FPS with the mode nearest to a target, which
+        fits the USB bandwidth left by the other cameras on the bus.
+        """
+        target = "{}@{}".format(self.parent.size_result.text(), self.parent.fps_result.text())
+        text, ok = QInputDialog.getText(
+            self.dialog,
+            "Auto",
+            "Target size and FPS (WxH@fps)",
+            QLineEdit.Normal,
+            target
+        )
+        if not ok:
+            return None
+        try:
+            width, height, fps = parse_target(text)
+        except ValueError as e:
+            self.parent.write_text(str(e), level="err", color="red")
+            return None
+        plan = self.parent.plan_mode(self.parent.tile, width, height, fps)
+        if plan is None:
+            return None
+        fourcc, width, height, fps = plan.mode
+        self.parent.fourcc_result.setText(fourcc)
+        self.parent.size_result.setText("{}x{}".format(width, height))
+        self.parent.fps_result.setText(str(fps))
 
     def set_param(self):
         fourcc = self.parent.fourcc_result.text()
         size = self.parent.size_result.text()
         width, height = map(int, size.split("x"))
         fps = self.parent.fps_result.text()
-        self.parent.camera.set_properties(fourcc, width, height, float(fps))
-        self.parent.scene.setSceneRect(0, 0, width, height)
-        if fps:
-            self.parent.msec = 1 / float(fps) * 1000
-        else:
-            self.parent.msec = 1 / 30.0 * 1000
-        self.parent.update_prop_table()
+        self.parent.change_properties(fourcc, width, height, float(fps))
 
     def close(self):
         """Close the dialog.
@@ -416,16 +427,12 @@ class Slot():
 
         header = ["param", "min", "max", "step", "default"]
         lst = []
-        for key, val in self.parent.current_params.items():
-            sub = []
-            sub.append(key)
-            for head in header:
-                if head in val:
-                    sub.append(val[head])
-            lst.append(sub)
+        for name in self.parent.param_names:
+            spec = self.parent.controls.spec(name)
+            lst.append([name, spec.minimum, spec.maximum, spec.step, spec.default])
 
         table.setColumnCount(len(header))
-        table.setRowCount(len(self.parent.current_params))
+        table.setRowCount(len(lst))
         table.setHorizontalHeaderLabels(header)
         table.verticalHeader().setVisible(False)
         table.setAlternatingRowColors(True)
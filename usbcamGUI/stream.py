@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""V4L2 mmap streaming without cv2.VideoCapture.
+
+V4L2Stream talks to /dev/videoN through ioctl (VIDIOC_REQBUFS/QBUF/DQBUF/STREAMON)
+and exposes each dequeued buffer as a numpy view of the mmap'd driver memory,
+together with the sequence number and timestamp set by the driver.
+
+The device itself is accessed through a small device layer (DeviceFile), so that
+FakeDevice can replace the real device when no camera is connected.
+"""
+import os
+import mmap
+import time
+import select
+import ctypes
+import errno
+import threading
+try:
+    import fcntl
+except ImportError:
+    # Not available on windows, where only FakeDevice can be used.
+    fcntl = None
+
+import numpy as np
+
+import v4l2_api as v4l2
+
+
+class DeviceFile():
+    """Device layer for a real V4L2 device node.
+
+    Args:
+        path (str): Path of the device node such as /dev/video0.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = None
+
+    def open(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def ioctl(self, request: int, arg):
+        """Issues an ioctl request on the device.
+
+        The argument (ctypes structure or c_int) is updated in place.
+        """
+        fcntl.ioctl(self.fd, request, arg)
+        return arg
+
+    def mmap(self, length: int, offset: int):
+        return mmap.mmap(self.fd, length, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE, offset=offset)
+
+    def wait(self, timeout: float) -> bool:
+        """Waits until a buffer can be dequeued.
+
+        Returns:
+            bool: False if timed out.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(readable)
+
+    def wait_event(self, timeout: float) -> bool:
+        """Waits until an event, such as a control change, can be dequeued.
+
+        The driver signals pending events as POLLPRI.
+
+        Returns:
+            bool: False if timed out.
+        """
+        poll = select.poll()
+        poll.register(self.fd, select.POLLPRI)
+        return bool(poll.poll(timeout * 1000))
+
+
+class FakeDevice():
+    """Device layer emulating a V4L2 capture device in memory.
+
+    The fake device answers the ioctl requests used by V4L2Stream and V4L2Controls,
+    with a few controls of a typical UVC camera. Every dequeued buffer is filled by
+    the pattern function, which receives the buffer as a numpy array and the
+    sequence number.
+
+    Control events are emulated like a driver with one file handle: the exposure
+    time is inactive unless auto exposure is manual, a change of flags is sent to
+    the subscribers, and a change of value only when it is made by another
+    application (see change_control). Events of the same control are merged.
+
+    Args:
+        width (int): Frame width.
+        height (int): Frame height.
+        fourcc (str): Pixel format. YUYV or GREY.
+        fps (float): Frame rate.
+        pattern (callable, optional): Function filling a buffer.
+    """
+
+    bytes_per_pixel = {
+        "YUYV": 2,
+        "GREY": 1,
+    }
+    frame_sizes = [(640, 480), (1280, 720)]
+    frame_rates = [30, 15]
+    # id, type, name, minimum, maximum, step, default
+    control_list = [
+        (0x00980900, v4l2.V4L2_CTRL_TYPE_INTEGER, b"Brightness", -64, 64, 1, 0),
+        (0x00980901, v4l2.V4L2_CTRL_TYPE_INTEGER, b"Contrast", 0, 95, 1, 32),
+        (0x0098090c, v4l2.V4L2_CTRL_TYPE_BOOLEAN, b"White Balance, Automatic", 0, 1, 1, 1),
+        (0x00980918, v4l2.V4L2_CTRL_TYPE_MENU, b"Power Line Frequency", 0, 2, 1, 1),
+        (0x009a0901, v4l2.V4L2_CTRL_TYPE_MENU, b"Auto Exposure", 0, 3, 1, 3),
+        (0x009a0902, v4l2.V4L2_CTRL_TYPE_INTEGER, b"Exposure Time, Absolute", 1, 5000, 1, 157),
+    ]
+    menus = {
+        0x00980918: {0: b"Disabled", 1: b"50 Hz", 2: b"60 Hz"},
+        0x009a0901: {1: b"Manual Mode", 3: b"Aperture Priority Mode"},
+    }
+
+    def __init__(self, width: int = 640, height: int = 480, fourcc: str = "YUYV",
+        fps: float = 30.0, pattern=None):
+        self.width = width
+        self.height = height
+        self.fourcc = fourcc
+        self.fps = fps
+        self.pattern = pattern or self.default_pattern
+        self.buffers = []
+        self.queued = []
+        self.streaming = False
+        self.sequence = 0
+        self.is_open = False
+        self.control_values = {ctrl[0]: ctrl[6] for ctrl in self.control_list}
+        self.control_flags = {}
+        self.subscribed = set()
+        self.events = {}
+        self.event_lock = threading.Lock()
+        self.event_ready = threading.Event()
+        self.event_sequence = 0
+        self.update_flags()
+
+    @staticmethod
+    def default_pattern(data: np.ndarray, sequence: int):
+        data[:] = sequence & 0xFF
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+        self.streaming = False
+
+    @property
+    def sizeimage(self) -> int:
+        return self.width * self.height * self.bytes_per_pixel.get(self.fourcc, 2)
+
+    def ioctl(self, request: int, arg):
+        if request == v4l2.VIDIOC_QUERYCAP:
+            arg.driver = b"fake"
+            arg.card = b"Fake Camera"
+            arg.bus_info = b"fake:0"
+            arg.capabilities = (
+                v4l2.V4L2_CAP_VIDEO_CAPTURE | v4l2.V4L2_CAP_STREAMING | v4l2.V4L2_CAP_DEVICE_CAPS
+            )
+            arg.device_caps = v4l2.V4L2_CAP_VIDEO_CAPTURE | v4l2.V4L2_CAP_STREAMING
+        elif request == v4l2.VIDIOC_G_FMT:
+            self.fill_format(arg.fmt.pix)
+        elif request == v4l2.VIDIOC_S_FMT:
+            if self.buffers:
+                raise OSError(errno.EBUSY, "buffers are allocated")
+            pix = arg.fmt.pix
+            fourcc = v4l2.fourcc_string(pix.pixelformat)
+            if fourcc in self.bytes_per_pixel:
+                self.fourcc = fourcc
+            self.width, self.height = pix.width, pix.height
+            self.fill_format(pix)
+        elif request == v4l2.VIDIOC_G_PARM:
+            self.fill_parm(arg.parm.capture)
+        elif request == v4l2.VIDIOC_S_PARM:
+            tpf = arg.parm.capture.timeperframe
+            if tpf.numerator:
+                self.fps = tpf.denominator / tpf.numerator
+            self.fill_parm(arg.parm.capture)
+        elif request == v4l2.VIDIOC_REQBUFS:
+            if self.streaming:
+                raise OSError(errno.EBUSY, "streaming")
+            self.buffers = [bytearray(self.sizeimage) for _ in range(arg.count)]
+            self.queued = []
+        elif request == v4l2.VIDIOC_QUERYBUF:
+            arg.length = len(self.buffers[arg.index])
+            arg.m.offset = arg.index * mmap.PAGESIZE
+        elif request == v4l2.VIDIOC_QBUF:
+            self.queued.append(arg.index)
+        elif request == v4l2.VIDIOC_DQBUF:
+            if not self.streaming or not self.queued:
+                raise OSError(errno.EAGAIN, "no buffer")
+            index = self.queued.pop(0)
+            data = np.frombuffer(self.buffers[index], dtype=np.uint8)
+            self.pattern(data, self.sequence)
+            now = time.monotonic()
+            arg.index = index
+            arg.bytesused = len(self.buffers[index])
+            arg.flags = v4l2.V4L2_BUF_FLAG_MAPPED | v4l2.V4L2_BUF_FLAG_DONE
+            arg.sequence = self.sequence
+            arg.timestamp.tv_sec = int(now)
+            arg.timestamp.tv_usec = int((now - int(now)) * 1e6)
+            self.sequence += 1
+        elif request == v4l2.VIDIOC_STREAMON:
+            self.streaming = True
+        elif request == v4l2.VIDIOC_STREAMOFF:
+            self.streaming = False
+            self.queued = []
+        elif request in (v4l2.VIDIOC_QUERYCTRL, v4l2.VIDIOC_QUERY_EXT_CTRL):
+            self.query_control(arg)
+        elif request == v4l2.VIDIOC_QUERYMENU:
+            try:
+                arg.menu.name = self.menus[arg.id][arg.index]
+            except KeyError:
+                raise OSError(errno.EINVAL, "invalid menu index")
+        elif request == v4l2.VIDIOC_G_CTRL:
+            arg.value = self.get_control(arg.id)
+        elif request == v4l2.VIDIOC_S_CTRL:
+            self.set_control(arg.id, arg.value)
+        elif request == v4l2.VIDIOC_G_EXT_CTRLS:
+            for i in range(arg.count):
+                arg.controls[i].u.value = self.get_control(arg.controls[i].id)
+        elif request == v4l2.VIDIOC_S_EXT_CTRLS:
+            values = [(arg.controls[i].id, arg.controls[i].u.value) for i in range(arg.count)]
+            for id_, value in values:
+                self.check_control(id_, value)
+            for id_, value in values:
+                self.control_values[id_] = value
+            self.update_flags()
+        elif request == v4l2.VIDIOC_SUBSCRIBE_EVENT:
+            if arg.type != v4l2.V4L2_EVENT_CTRL or arg.id not in self.control_values:
+                raise OSError(errno.EINVAL, "invalid event")
+            self.subscribed.add(arg.id)
+            if arg.flags & v4l2.V4L2_EVENT_SUB_FL_SEND_INITIAL:
+                self.queue_event(arg.id, v4l2.V4L2_EVENT_CTRL_CH_VALUE | v4l2.V4L2_EVENT_CTRL_CH_FLAGS)
+        elif request == v4l2.VIDIOC_UNSUBSCRIBE_EVENT:
+            self.subscribed.discard(arg.id)
+        elif request == v4l2.VIDIOC_DQEVENT:
+            self.dequeue_event(arg)
+        elif request == v4l2.VIDIOC_ENUM_FMT:
+            formats = list(self.bytes_per_pixel)
+            if arg.index >= len(formats):
+                raise OSError(errno.EINVAL, "invalid index")
+            arg.pixelformat = v4l2.fourcc_code(formats[arg.index])
+        elif request == v4l2.VIDIOC_ENUM_FRAMESIZES:
+            if arg.index >= len(self.frame_sizes):
+                raise OSError(errno.EINVAL, "invalid index")
+            arg.type = v4l2.V4L2_FRMSIZE_TYPE_DISCRETE
+            arg.size.discrete.width, arg.size.discrete.height = self.frame_sizes[arg.index]
+        elif request == v4l2.VIDIOC_ENUM_FRAMEINTERVALS:
+            if arg.index >= len(self.frame_rates):
+                raise OSError(errno.EINVAL, "invalid index")
+            arg.type = v4l2.V4L2_FRMIVAL_TYPE_DISCRETE
+            arg.interval.discrete.numerator = 1
+            arg.interval.discrete.denominator = self.frame_rates[arg.index]
+        else:
+            raise OSError(errno.ENOTTY, "unsupported ioctl")
+        return arg
+
+    def query_control(self, arg):
+        if arg.id & v4l2.V4L2_CTRL_FLAG_NEXT_CTRL:
+            id_ = arg.id & ~(v4l2.V4L2_CTRL_FLAG_NEXT_CTRL | v4l2.V4L2_CTRL_FLAG_NEXT_COMPOUND)
+            found = [ctrl for ctrl in self.control_list if ctrl[0] > id_]
+        else:
+            found = [ctrl for ctrl in self.control_list if ctrl[0] == arg.id]
+        if not found:
+            raise OSError(errno.EINVAL, "no more controls")
+        (arg.id, arg.type, arg.name, arg.minimum, arg.maximum,
+            arg.step, arg.default_value) = found[0]
+        arg.flags = self.control_flags.get(arg.id, 0)
+
+    def check_control(self, id_: int, value: int):
+        ctrl = [ctrl for ctrl in self.control_list if ctrl[0] == id_]
+        if not ctrl:
+            raise OSError(errno.EINVAL, "invalid control")
+        if not ctrl[0][3] <= value <= ctrl[0][4]:
+            raise OSError(errno.ERANGE, "out of range")
+
+    def get_control(self, id_: int) -> int:
+        if id_ not in self.control_values:
+            raise OSError(errno.EINVAL, "invalid control")
+        return self.control_values[id_]
+
+    def set_control(self, id_: int, value: int):
+        self.check_control(id_, value)
+        self.control_values[id_] = value
+        self.update_flags()
+
+    def change_control(self, id_: int, value: int):
+        """Changes a control as another application would, which sends a value event.
+        """
+        self.set_control(id_, value)
+        if id_ in self.subscribed:
+            self.queue_event(id_, v4l2.V4L2_EVENT_CTRL_CH_VALUE)
+
+    def update_flags(self):
+        """Updates the inactive flag of the exposure time, and sends the changes of flags.
+        """
+        manual = self.control_values.get(0x009a0901) == 1
+        flags = {0x009a0902: 0 if manual else v4l2.V4L2_CTRL_FLAG_INACTIVE}
+        for id_, flag in flags.items():
+            if self.control_flags.get(id_, 0) != flag:
+                self.control_flags[id_] = flag
+                if id_ in self.subscribed:
+                    self.queue_event(id_, v4l2.V4L2_EVENT_CTRL_CH_FLAGS)
+
+    def queue_event(self, id_: int, changes: int):
+        with self.event_lock:
+            if id_ in self.events:
+                changes |= self.events.pop(id_)[0]
+            self.events[id_] = (changes, self.control_values[id_], self.control_flags.get(id_, 0))
+            self.event_ready.set()
+
+    def dequeue_event(self, arg):
+        with self.event_lock:
+            if not self.events:
+                raise OSError(errno.ENOENT, "no event")
+            id_ = next(iter(self.events))
+            changes, value, flags = self.events.pop(id_)
+            if not self.events:
+                self.event_ready.clear()
+            arg.pending = len(self.events)
+        ctrl = [ctrl for ctrl in self.control_list if ctrl[0] == id_][0]
+        arg.type = v4l2.V4L2_EVENT_CTRL
+        arg.id = id_
+        arg.sequence = self.event_sequence
+        self.event_sequence += 1
+        event = arg.u.ctrl
+        event.changes = changes
+        event.type = ctrl[1]
+        event.u.value = value
+        event.flags = flags
+        event.minimum, event.maximum, event.step, event.default_value = ctrl[3:7]
+
+    def fill_format(self, pix):
+        pix.width = self.width
+        pix.height = self.height
+        pix.pixelformat = v4l2.fourcc_code(self.fourcc)
+        pix.field = v4l2.V4L2_FIELD_NONE
+        pix.bytesperline = self.width * self.bytes_per_pixel.get(self.fourcc, 2)
+        pix.sizeimage = self.sizeimage
+
+    def fill_parm(self, capture):
+        capture.capability = v4l2.V4L2_CAP_TIMEPERFRAME
+        capture.timeperframe.numerator = 1000
+        capture.timeperframe.denominator = int(self.fps * 1000)
+
+    def mmap(self, length: int, offset: int):
+        return self.buffers[offset // mmap.PAGESIZE]
+
+    def wait(self, timeout: float) -> bool:
+        if not self.streaming or not self.queued:
+            return False
+        time.sleep(1 / self.fps)
+        return True
+
+    def wait_event(self, timeout: float) -> bool:
+        return self.event_ready.wait(timeout)
+
+
+class StreamBuffer():
+    """A buffer dequeued from the driver.
+
+    Attributes:
+        index (int): Index of the buffer in the driver queue.
+        data (np.ndarray): Zero-copy view of the bytes used in the buffer.
+        sequence (int): Sequence number counted by the driver.
+        timestamp (float): Capture timestamp set by the driver in seconds.
+        flags (int): Buffer flags.
+    """
+    __slots__ = ("index", "data", "sequence", "timestamp", "flags")
+
+    def __init__(self, index: int, data: np.ndarray, sequence: int, timestamp: float, flags: int):
+        self.index = index
+        self.data = data
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.flags = flags
+
+
+class V4L2Stream():
+    """Streams frames from a V4L2 device with mmap'd buffers.
+
+    The dequeued buffer belongs to the caller until it is given back with queue().
+
+    Args:
+        device: Device layer such as DeviceFile or FakeDevice.
+        nbuffers (int, optional): The number of buffers requested. Defaults to 4.
+    """
+
+    def __init__(self, device, nbuffers: int = 4):
+        self.device = device
+        self.nbuffers = nbuffers
+        self.maps = []
+        self.views = []
+        self.is_streaming = False
+        self.width = 0
+        self.height = 0
+        self.fourcc = ""
+        self.bytesperline = 0
+
+    def open(self):
+        """Opens the device and reads its current format.
+
+        Raises:
+            OSError: The device cannot be opened or is not a streaming capture device.
+        """
+        self.device.open()
+        cap = self.device.ioctl(v4l2.VIDIOC_QUERYCAP, v4l2.v4l2_capability())
+        caps = cap.device_caps if cap.capabilities & v4l2.V4L2_CAP_DEVICE_CAPS else cap.capabilities
+        if not caps & v4l2.V4L2_CAP_VIDEO_CAPTURE or not caps & v4l2.V4L2_CAP_STREAMING:
+            self.device.close()
+            raise OSError(errno.ENODEV, "not a streaming capture device")
+        self.get_format()
+
+    def close(self):
+        try:
+            self.stop()
+        finally:
+            self.device.close()
+
+    def get_format(self) -> tuple:
+        """Gets the current format.
+
+        Returns:
+            tuple: fourcc, width, height.
+        """
+        fmt = v4l2.v4l2_format()
+        fmt.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        self.device.ioctl(v4l2.VIDIOC_G_FMT, fmt)
+        self.update_format(fmt.fmt.pix)
+        return self.fourcc, self.width, self.height
+
+    def set_format(self, fourcc: str, width: int, height: int) -> tuple:
+        """Sets the format. The stream must be stopped.
+
+        Returns:
+            tuple: fourcc, width, height negotiated by the driver.
+        """
+        fmt = v4l2.v4l2_format()
+        fmt.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        fmt.fmt.pix.width = width
+        fmt.fmt.pix.height = height
+        fmt.fmt.pix.pixelformat = v4l2.fourcc_code(fourcc)
+        fmt.fmt.pix.field = v4l2.V4L2_FIELD_ANY
+        self.device.ioctl(v4l2.VIDIOC_S_FMT, fmt)
+        self.update_format(fmt.fmt.pix)
+        return self.fourcc, self.width, self.height
+
+    def update_format(self, pix):
+        self.width = pix.width
+        self.height = pix.height
+        self.fourcc = v4l2.fourcc_string(pix.pixelformat)
+        self.bytesperline = pix.bytesperline
+
+    def get_fps(self) -> float:
+        parm = v4l2.v4l2_streamparm()
+        parm.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        self.device.ioctl(v4l2.VIDIOC_G_PARM, parm)
+        tpf = parm.parm.capture.timeperframe
+        if not tpf.numerator:
+            return 0.0
+        return tpf.denominator / tpf.numerator
+
+    def set_fps(self, fps: float) -> float:
+        """Sets the frame interval.
+
+        Returns:
+            float: FPS negotiated by the driver.
+        """
+        parm = v4l2.v4l2_streamparm()
+        parm.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        parm.parm.capture.timeperframe.numerator = 1000
+        parm.parm.capture.timeperframe.denominator = int(round(fps * 1000))
+        self.device.ioctl(v4l2.VIDIOC_S_PARM, parm)
+        tpf = parm.parm.capture.timeperframe
+        if not tpf.numerator:
+            return 0.0
+        return tpf.denominator / tpf.numerator
+
+    def switch_format(self, fourcc: str, width: int, height: int, fps: float) -> tuple:
+        """Stops streaming, sets the format and the frame interval, then starts again.
+
+        The frame interval is set after the format, since drivers reset it to the
+        default of the new format. Streaming starts again even if stopping fails
+        or the driver rejects the format.
+
+        Returns:
+            tuple: fourcc, width, height and fps negotiated by the driver.
+
+        Raises:
+            OSError: The driver rejects the format or the frame interval.
+        """
+        try:
+            self.stop()
+            self.set_format(fourcc, width, height)
+            fps = self.set_fps(fps)
+        finally:
+            self.start()
+        return self.fourcc, self.width, self.height, fps
+
+    def start(self):
+        """Requests and maps the buffers, queues them, then starts streaming.
+        """
+        if self.is_streaming:
+            return
+        if self.maps:
+            # The buffers held by a consumer when streaming stopped.
+            self.free_buffers()
+        req = v4l2.v4l2_requestbuffers()
+        req.count = self.nbuffers
+        req.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        req.memory = v4l2.V4L2_MEMORY_MMAP
+        self.device.ioctl(v4l2.VIDIOC_REQBUFS, req)
+
+        for index in range(req.count):
+            buf = self.new_buffer(index)
+            self.device.ioctl(v4l2.VIDIOC_QUERYBUF, buf)
+            mapped = self.device.mmap(buf.length, buf.m.offset)
+            self.maps.append(mapped)
+            self.views.append(np.frombuffer(mapped, dtype=np.uint8))
+            self.device.ioctl(v4l2.VIDIOC_QBUF, buf)
+
+        self.device.ioctl(v4l2.VIDIOC_STREAMON, ctypes.c_int(v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE))
+        self.is_streaming = True
+
+    def stop(self):
+        """Stops streaming, then unmaps and frees the buffers.
+
+        Raises:
+            OSError: A buffer is still used by a consumer (see free_buffers).
+        """
+        if not self.is_streaming:
+            return
+        self.device.ioctl(v4l2.VIDIOC_STREAMOFF, ctypes.c_int(v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE))
+        # Streaming has stopped even if freeing the buffers fails, so that start() works again.
+        self.is_streaming = False
+        self.free_buffers()
+
+    def free_buffers(self):
+        """Unmaps the buffers, then frees them with REQBUFS(0).
+
+        The driver cannot free a buffer which is still mapped, so the buffers are
+        kept if a consumer still holds a view of one of them, and freed by the
+        next start().
+
+        Raises:
+            OSError: EBUSY if a buffer is still used by a consumer.
+        """
+        self.views = []
+        held = []
+        for mapped in self.maps:
+            if isinstance(mapped, mmap.mmap):
+                try:
+                    mapped.close()
+                except BufferError:
+                    held.append(mapped)
+        self.maps = held
+        if held:
+            raise OSError(errno.EBUSY, "{} buffer(s) still used by a consumer".format(len(held)))
+        req = v4l2.v4l2_requestbuffers()
+        req.count = 0
+        req.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        req.memory = v4l2.V4L2_MEMORY_MMAP
+        self.device.ioctl(v4l2.VIDIOC_REQBUFS, req)
+
+    @staticmethod
+    def new_buffer(index: int = 0):
+        buf = v4l2.v4l2_buffer()
+        buf.index = index
+        buf.type = v4l2.V4L2_BUF_TYPE_VIDEO_CAPTURE
+        buf.memory = v4l2.V4L2_MEMORY_MMAP
+        return buf
+
+    def dequeue(self, timeout: float = 1.0) -> StreamBuffer:
+        """Dequeues the next filled buffer.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a buffer. Defaults to 1.0.
+
+        Returns:
+            StreamBuffer: The dequeued buffer. None if timed out.
+        """
+        if not self.device.wait(timeout):
+            return None
+        buf = self.new_buffer()
+        try:
+            self.device.ioctl(v4l2.VIDIOC_DQBUF, buf)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return None
+            raise
+        timestamp = buf.timestamp.tv_sec + buf.timestamp.tv_usec * 1e-6
+        data = self.views[buf.index][:buf.bytesused]
+        return StreamBuffer(buf.index, data, buf.sequence, timestamp, buf.flags)
+
+    def queue(self, buffer: StreamBuffer):
+        """Gives the buffer back to the driver.
+
+        The numpy view of the buffer must not be used after this call.
+        """
+        self.device.ioctl(v4l2.VIDIOC_QBUF, self.new_buffer(buffer.index))
@@ -59,6 +59,7 @@ class MessageText():
             ["Ctrl + d", "Set parameters to default value"],
             ["Ctrl + f", "Change font"],
             ["Ctrl + h", "Show usage"],
+            ["Ctrl + i", "Show capture statistics"],
             ["Ctrl + k", "Show the list of Keyboard shortcut"],
             ["Ctrl + l", "Show the list of paramaters supported by camera"],
             ["Ctrl + n", "Change naming convension of filename"],
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""A camera shown as one tile of the view area.
+
+Each tile owns the camera, the buffer where the latest frame is published, the
+pixmap item placed in the scene of the main window, the parameters shown by the
+sliders when the tile is selected and the ControlPanel holding those sliders,
+the ControlWriter writing their values and the ControlWatcher following their
+changes made outside of the window.
+"""
+import math
+
+import numpy as np
+from PySide2.QtGui import QImage, QPixmap
+
+from capture import FrameBuffer
+from frame import as_array
+
+
+class CameraTile():
+    """A camera, its frame buffer and its pixmap item.
+
+    The frames are published into the buffer by a CaptureWorker of the camera, or
+    by a GroupCaptureWorker reading all cameras together.
+
+    Args:
+        camera (Camera): The camera shown on the tile.
+    """
+
+    qimage_cache_size = 16
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.buffer = FrameBuffer(release=camera.release_record)
+        self.pixmap = QPixmap()
+        self.pixmap_item = None
+        self.qimage = None
+        self.qimages = {}
+        self.support_params = []
+        self.param_names = []
+        self.panel = None
+        self.writer = None
+        self.watcher = None
+        self.overwritten_frames = 0
+
+    @property
+    def name(self) -> str:
+        return "video{}".format(self.camera.device)
+
+    def take_frame(self) -> bool:
+        """Sets the newest frame in the buffer to the pixmap item.
+
+        Frames which have been overwritten in the buffer before being displayed are
+        counted in overwritten_frames. A JpegFrame is decoded only when displayed.
+
+        Returns:
+            bool: True if the pixmap is updated.
+        """
+        record, overwritten = self.buffer.take()
+        if record is None:
+            return False
+        self.overwritten_frames += overwritten
+        try:
+            self.convert_frame(as_array(record.frame))
+            self.pixmap_item.setPixmap(self.pixmap)
+        finally:
+            self.camera.release_record(record)
+        return True
+
+    def discard_frame(self):
+        """Discards the frame waiting in the buffer.
+        """
+        record, overwritten = self.buffer.take()
+        self.overwritten_frames += overwritten
+        self.camera.release_record(record)
+
+    def convert_frame(self, frame: np.ndarray):
+        """Convert the class of frame
+
+        Create qimage, qpixmap objects from ndarray frame for displaying on the window.
+        Frames come from recycled buffers of the pool, so the QImage wrapping each
+        buffer is created once and reused. The QImage format follows the pixel format
+        of the camera (see Camera.display_format), so that no conversion is done here.
+
+        Args:
+            frame (np.ndarray): The frame to display
+        """
+        entry = self.qimages.get(id(frame))
+        if entry is None or entry[0] is not frame:
+            if len(self.qimages) >= self.qimage_cache_size:
+                self.qimages.clear()
+            qimage = QImage(
+                frame.data,
+                frame.shape[1],
+                frame.shape[0],
+                frame.strides[0],
+                self.get_qimage_format(frame)
+                )
+            entry = (frame, qimage)
+            self.qimages[id(frame)] = entry
+        self.qimage = entry[1]
+        self.pixmap.convertFromImage(self.qimage)
+
+    def get_qimage_format(self, frame: np.ndarray):
+        """Gets the QImage format matching the pixel format of the frame.
+
+        Args:
+            frame (np.ndarray): The frame to display
+
+        Returns:
+            QImage.Format: Format_Grayscale8, Format_RGB32, Format_BGR888 or Format_RGB888
+        """
+        if frame.ndim == 2:
+            return QImage.Format_Grayscale8
+        elif frame.shape[2] == 4:
+            # B, G, R, X in memory is 0xffRRGGBB on little endian, painted without conversion.
+            return QImage.Format_RGB32
+        elif self.camera.pixel_format == "bgr888":
+            return QImage.Format_BGR888
+        return QImage.Format_RGB888
+
+
+def grid_shape(count: int, tile_width: int, tile_height: int, width: int, height: int) -> tuple:
+    """Gets the number of columns and rows which shows tiles in the largest size.
+
+    Args:
+        count (int): The number of tiles
+        tile_width (int): Width of a tile
+        tile_height (int): Height of a tile
+        width (int): Width of the area to fill
+        height (int): Height of the area to fill
+
+    Returns:
+        tuple: The number of columns and rows
+    """
+    best = (1, count)
+    best_scale = 0
+    for cols in range(1, count + 1):
+        rows = math.ceil(count / cols)
+        scale = min(width / (cols * tile_width), height / (rows * tile_height))
+        if scale > best_scale:
+            best, best_scale = (cols, rows), scale
+    return best
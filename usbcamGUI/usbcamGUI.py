@@ -10,6 +10,32 @@ from PySide2.QtWidgets import QApplication
 
 from mainwindow import Window
 from util import Utility
+from capcache import CapabilityCache
+from modeplan import parse_target
+
+
+def device_list(text: str) -> list:
+    """Converts comma separated device numbers into a list.
+
+    Args:
+        text (str): Device numbers such as "0" or "0,2,4"
+
+    Returns:
+        list: Device numbers
+    """
+    try:
+        return [int(dev) for dev in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid device list: {}".format(text))
+
+
+def target_mode(text: str) -> tuple:
+    """Converts a target mode such as "1280x720@30" into width, height and fps.
+    """
+    try:
+        return parse_target(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 class SignalHandle():
@@ -30,15 +56,32 @@ if __name__ == "__main__":
         '--camera',
         type=str,
         default="usb_cam",
-        help='The kind of camera connected to PC.',
-        choices=["usb_cam", "raspi"]
+        help='The kind of camera connected to PC.\n'
+             'synthetic: generated test patterns without any camera',
+        choices=["usb_cam", "raspi", "synthetic"]
+    )
+    parser.add_argument(
+        '-b',
+        '--backend',
+        type=str,
+        default="opencv",
+        help='The way to read frames on linux.\n'
+             'opencv: cv2.VideoCapture\n'
+             'v4l2: V4L2 mmap streaming without cv2.VideoCapture',
+        choices=["opencv", "v4l2"]
     )
     parser.add_argument(
         '-d',
         '--device',
-        type=int,
-        default=0,
-        help='Device number of connected camere (it means <X> in /dev/video<X>).'
+        type=device_list,
+        default=[0],
+        help='Device number of connected camere (it means <X> in /dev/video<X>).\n'
+             'Several cameras are shown as tiles with comma separated numbers (e.g. 0,2,4).'
+    )
+    parser.add_argument(
+        '--sync',
+        help="Grab frames of all cameras together, and save or record them as a set.",
+        action='store_true'
     )
     parser.add_argument(
         '--dir',
@@ -62,6 +105,51 @@ if __name__ == "__main__":
         help='The color format of read frame. Defaults to RGB.',
         choices=["rgb", "gray"]
     )
+    parser.add_argument(
+        '--mjpeg-passthrough',
+        help="Keep frames of a MJPG camera compressed and decode them only when needed.\n"
+             "The video is recorded as a MJPEG stream (.mjpg) without decoding.",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--record-policy',
+        type=str,
+        default="drop-oldest",
+        help="What to do with a frame when the recording queue is full.\n"
+             "block: wait for the writer (capture slows down)\n"
+             "drop-oldest: drop the oldest queued frame\n"
+             "drop-newest: drop the new frame",
+        choices=["block", "drop-oldest", "drop-newest"]
+    )
+    parser.add_argument(
+        '--record-queue',
+        type=int,
+        default=64,
+        help="The number of frames which can wait for the video writer while recording."
+    )
+    parser.add_argument(
+        '--control-rate',
+        type=float,
+        default=30.0,
+        help="The maximum number of writes per second of each camera control while a slider is dragged. "
+             "0 writes every value."
+    )
+    parser.add_argument(
+        '--display-format',
+        type=str,
+        default="bgrx",
+        help="Set the pixel format of frames painted on the window. "
+             "bgrx and bgr888 skip the conversion by Qt.",
+        choices=["rgb888", "bgrx", "bgr888"]
+    )
+    parser.add_argument(
+        '--auto-mode',
+        type=target_mode,
+        default=None,
+        metavar="WxH@fps",
+        help="Switch each camera to the mode nearest to the size and FPS (e.g. 1280x720@30)\n"
+             "which fits the USB bandwidth. Cameras on one bus share its bandwidth."
+    )
     parser.add_argument(
         '-p',
         '--param',
@@ -88,16 +176,31 @@ if __name__ == "__main__":
         help="Show a list of parameters supported by camera.",
         action='store_true'
     )
+    parser.add_argument(
+        '--list-devices',
+        help="Show the connected cameras and their device numbers.",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--refresh-cache',
+        help="Discard the cached formats and controls of cameras, and enumerate them again.",
+        action='store_true'
+    )
 
     args = parser.parse_args()
-    if args.show:
-        Utility.support_format_list(args.device)
+    if args.refresh_cache:
+        CapabilityCache().clear()
+    if args.list_devices:
+        Utility.list_devices()
+        parser.exit()
+    elif args.show:
+        Utility.support_format_list(args.device[0])
         parser.exit()
     elif args.show_all:
-        Utility.show_all(args.device)
+        Utility.show_all(args.device[0])
         parser.exit()
     elif args.show_param:
-        Utility.show_param(args.device)
+        Utility.show_param(args.device[0])
         parser.exit()
 
     SignalHandle.set_default_handler()
@@ -108,7 +211,15 @@ if __name__ == "__main__":
         args.camera,
         args.color,
         args.dir,
-        args.param
+        args.param,
+        backend=args.backend,
+        passthrough=args.mjpeg_passthrough,
+        record_policy=args.record_policy,
+        record_queue=args.record_queue,
+        display_format=args.display_format,
+        sync=args.sync,
+        control_rate=args.control_rate,
+        auto_mode=args.auto_mode
     )
     main_window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -2,10 +2,14 @@
 """Utility module.
 """
 import re
+import time
 import platform
 import cv2
 
 from v4l import V4L2
+from controls import V4L2Controls
+from capcache import CapabilityCache
+from discovery import discover
 
 
 class Utility():
@@ -14,7 +18,10 @@ class Utility():
     def support_format_list(device: int):
         system = Utility.get_os()
         if system == "linux" or system == "raspi":
-            V4L2(device).support_format_list()
+            controls = V4L2Controls(device, cache=CapabilityCache())
+            controls.open()
+            V4L2(device).support_format_list(controls.get_formats())
+            controls.close()
         else:
             WindowsUtil().support_format_list()
 
@@ -34,6 +41,21 @@ class Utility():
         else:
             WindowsUtil().support_format_list()
 
+    @staticmethod
+    def list_devices():
+        """Shows the cameras which can capture frames and their device nodes.
+        """
+        t0 = time.perf_counter()
+        devices = discover()
+        elapsed = (time.perf_counter() - t0) * 1000
+        for device in devices:
+            serial = ", serial {}".format(device.serial) if device.serial else ""
+            bus = ", bus {} at {} Mbit/s".format(device.bus, device.speed) if device.bus else ""
+            print("{} ({}{}{})".format(device.name, device.bus_info, serial, bus))
+            for node in device.nodes:
+                print("    {}".format(node.path))
+        print("{} camera(s) found in {:.1f} ms".format(len(devices), elapsed))
+
     @staticmethod
     def get_os() -> str:
         """Gets the type of current OS.
@@ -6,6 +6,9 @@ import re
 import sys
 from typing import Callable
 
+from capindex import CapabilityIndex
+from ctrlinfo import ControlListing, parse_controls
+
 
 class V4L2():
 
@@ -20,9 +23,7 @@ class V4L2():
 
         self.fourcc_list = []
         self.vidcap_format = []
-        #self.get_fourcc()
-        #for cc in self.fourcc_list:
-        #    self.get_fmt_size(cc)
+        self.index = CapabilityIndex([])
 
     def show_fourcc(self):
         cmd = ["v4l2-ctl", "-d", str(self.device), "--list-formats"]
@@ -49,143 +50,93 @@ class V4L2():
             return output
 
     @staticmethod
-    def get_supported_fourcc(device: int) -> list:
-        cmd = ["v4l2-ctl", "-d", str(device), "--list-formats"]
+    def list_formats(device: int) -> list:
+        """Gets all formats supported by the camera from one `v4l2-ctl --list-formats-ext`.
+
+        Args:
+            device (int): Device number
+
+        Returns:
+            list: (fourcc, width, height, fps) of each format.
+        """
+        cmd = ["v4l2-ctl", "-d", str(device), "--list-formats-ext"]
         ret = subprocess.run(cmd, stdout=subprocess.PIPE)
         if ret.returncode:
             print("An error occured while executing v4l2 command. \nCheck if /dev/video{} exists, then reconnect the camera to PC.".format(device),
                 file=sys.stderr)
             sys.exit(ret.returncode)
-        fmt = ret.stdout.decode()
-
-        lst = []
-        pixel_format = r"\s+'"
-        match = re.finditer(pixel_format, fmt)
-        for index, m in enumerate(match):
-            start = m.end()
-            end = m.end()
-            while end != len(fmt):
-                end += 1
-                if fmt[end] == "'":
-                    break
-            fourcc = fmt[start:end]
-            if fourcc not in lst:
-                lst.append(fmt[start:end])
-        return lst
+        return V4L2.parse_formats(ret.stdout.decode())
+
+    @staticmethod
+    def parse_formats(output: str) -> list:
+        """Parses the output of `v4l2-ctl --list-formats-ext`.
+
+        A stepwise size or interval gives its minimum and maximum.
+
+        Args:
+            output (str): Output of v4l2-ctl
+
+        Returns:
+            list: (fourcc, width, height, fps) of each format.
+        """
+        formats = []
+        fourcc = None
+        sizes = []
+        for line in output.splitlines():
+            m = re.search(r"'(.{1,4})'", line)
+            if m:
+                fourcc = m.group(1).strip()
+                continue
+            if fourcc is None:
+                continue
+            if re.search(r"Size:", line):
+                sizes = [tuple(map(int, size)) for size in re.findall(r"(\d+)x(\d+)", line)]
+            elif re.search(r"Interval:", line):
+                m = re.search(r"\(([0-9.]+)(?:-([0-9.]+))? fps\)", line)
+                if not m:
+                    continue
+                for fps in m.groups():
+                    if fps is None:
+                        continue
+                    for width, height in sizes:
+                        formats.append((fourcc, width, height, float(fps)))
+        return formats
+
+    @staticmethod
+    def get_supported_fourcc(device: int) -> list:
+        return CapabilityIndex(V4L2.list_formats(device)).fourcc()
 
     @staticmethod
     def get_supported_size(device: int, fourcc: str) -> list:
-        cmd = ["v4l2-ctl", "-d", str(device), "--list-framesize={}".format(fourcc)]
-        ret = subprocess.run(cmd, stdout=subprocess.PIPE)
-        if ret.returncode:
-            print("An error occured while executing v4l2 command. \nCheck if /dev/video{} exists, then reconnect the camera to PC.".format(device),
-                file=sys.stderr)
-            sys.exit(ret.returncode)
-        ret = ret.stdout.decode()
-
-        pattern = r"[0-9]+x[0-9]+"
-        match = re.findall(pattern, ret)
-        return match
-    """
-        lst = []
-        for m in match:
-            width, height = map(int, m.split("x"))
-            self.get_fps(name, width, height)
-"""
+        return CapabilityIndex(V4L2.list_formats(device)).size_list(fourcc)
 
     @staticmethod
     def get_supported_fps(device: int, fourcc: str, width: int, height: int) -> list:
-        cmd = [
-            "v4l2-ctl",
-            "-d",
-            str(device),
-            "--list-frameintervals=width={},height={},pixelformat={}".format(width, height, fourcc)
-        ]
-        ret = subprocess.run(cmd, stdout=subprocess.PIPE)
-        if ret.returncode:
-            print("An error occured while executing v4l2 command. \nCheck if /dev/video{} exists, then reconnect the camera to PC.".format(device),
-                file=sys.stderr)
-            sys.exit(ret.returncode)
-        ret = ret.stdout.decode()
+        return CapabilityIndex(V4L2.list_formats(device)).fps_list(fourcc, width, height)
 
-        fps = "[0-9]+.[0-9]+ fps"
-        lst = re.findall(fps, ret)
-        return ["{}".format(item[:-3]) for item in lst]
+    def support_format_list(self, formats: list = None):
+        """Prints the table of formats supported by the camera.
 
-    def support_format_list(self):
-        self.get_fourcc()
-        print("{:^10} | {:^10} | {:^10} | {:^10}".format("Fourcc", "Width", "Height", "FPS"))
-        print("-" * 60)
-        for i in self.vidcap_format:
-            #print("-" * 60)
-            print("{:^10} | {:^10} | {:^10} | {:^10}".format(*i))
+        The bandwidth is the estimated data rate of each format (see capindex.bandwidth).
 
+        Args:
+            formats (list, optional): (fourcc, width, height, fps) of each format.
+                Defaults to None, which reads the formats with v4l2-ctl.
         """
-        with open("test.csv", "w") as f:
-            for form in self.vidcap_format:
-                data = ",".join(str(i) for i in form)
-                f.write(data)
-                f.write("\n")
-        """
+        if formats is None:
+            self.get_fourcc()
+        else:
+            self.vidcap_format = list(formats)
+            self.index = CapabilityIndex(self.vidcap_format)
+        print("{:^10} | {:^10} | {:^10} | {:^10} | {:^12}".format("Fourcc", "Width", "Height", "FPS", "MB/s"))
+        print("-" * 66)
+        for mode in self.index.modes():
+            print("{:^10} | {:^10} | {:^10} | {:^10} | {:^12.1f}".format(*mode, self.index.bandwidth(mode) / 1e6))
 
     def get_fourcc(self):
-        cmd = ["v4l2-ctl", "-d", str(self.device), "--list-formats"]
-        ret = subprocess.run(cmd, stdout=subprocess.PIPE)
-        if ret.returncode:
-            print("An error occured while executing v4l2 command. \nCheck if /dev/video{} exists, then reconnect the camera to PC.".format(self.device),
-                file=sys.stderr)
-            sys.exit(ret.returncode)
-        fmt = ret.stdout.decode()
-        pixel_format = r"\s+'"
-        match = re.finditer(pixel_format, fmt)
-        for index, m in enumerate(match):
-            start = m.end()
-            end = m.end()
-            while end != len(fmt):
-                end += 1
-                if fmt[end] == "'":
-                    break
-            fourcc = fmt[start:end]
-            if fourcc not in self.fourcc_list:
-                self.fourcc_list.append(fmt[start:end])
-        for cc in self.fourcc_list:
-            self.get_fmt_size(cc)
-
-    def get_fmt_size(self, name: str):
-        cmd = ["v4l2-ctl", "-d", str(self.device), "--list-framesize={}".format(name)]
-        ret = subprocess.run(cmd, stdout=subprocess.PIPE)
-        if ret.returncode:
-            print("An error occured while executing v4l2 command. \nCheck if /dev/video{} exists, then reconnect the camera to PC.".format(self.device),
-                file=sys.stderr)
-            sys.exit(ret.returncode)
-        ret = ret.stdout.decode()
-
-        pattern = r"[0-9]+x[0-9]+"
-        match = re.findall(pattern, ret)
-        for m in match:
-            width, height = map(int, m.split("x"))
-            self.get_fps(name, width, height)
-
-    def get_fps(self, name: str, width: int, height: int):
-        cmd = [
-            "v4l2-ctl",
-            "-d",
-            str(self.device),
-            "--list-frameintervals=width={},height={},pixelformat={}".format(width, height, name)
-        ]
-        ret = subprocess.run(cmd, stdout=subprocess.PIPE)
-        if ret.returncode:
-            print("An error occured while executing v4l2 command. \nCheck if /dev/video{} exists, then reconnect the camera to PC.".format(self.device),
-                file=sys.stderr)
-            sys.exit(ret.returncode)
-        ret = ret.stdout.decode()
-
-        fps = "[0-9]+.[0-9]+ fps"
-        fps = re.findall(fps, ret)
-        for f in fps:
-            fmt = (name, width, height, float(f[:-3].strip()))
-            self.vidcap_format.append(fmt)
-        #print(self.vidcap_format)
+        self.vidcap_format = self.list_formats(self.device)
+        self.index = CapabilityIndex(self.vidcap_format)
+        self.fourcc_list = self.index.fourcc()
 
     def set_vidcap_format(self):
         cmd = [
@@ -209,94 +160,19 @@ class V4L2():
                 sys.exit(ret.returncode)
 
     def get_vidcap_format(self, data: str) -> list:
-        buf = []
+        modes = self.index.modes()
         if data == "fourcc":
-            for item in self.vidcap_format:
-                target = item[0]
-                if target not in buf:
-                    buf.append(target)
+            return self.index.fourcc()
         elif data == "size":
-            for item in self.vidcap_format:
-                width = item[1]
-                height = item[2]
-                target = "{}x{}".format(width, height)
-                if target not in buf:
-                    buf.append(target)
+            return list(dict.fromkeys("{}x{}".format(mode[1], mode[2]) for mode in modes))
         elif data == "fps":
-            for item in self.vidcap_format:
-                target = str(item[3])
-                if target not in buf:
-                    buf.append(str(target))
+            return list(dict.fromkeys(str(mode[3]) for mode in modes))
         else:
             return None
-        return buf
 
     def get_params(self, ptype: str = "full", *plist) -> dict:
-        cmd = ["v4l2-ctl", "-d", str(self.device), "-l"]
-        ret = subprocess.check_output(cmd)
-        v4l2_output = ret.decode()
-        v4l2_output = self.extract_vidcap_params(v4l2_output).strip().split("\n")
-        dict_ = {}
-        if ptype == "full":
-            for param in v4l2_output:
-                sub_dict = {}
-                tmp = param.split()
-                if len(tmp) > 3:
-                    pass
-                    name = tmp[0]
-                    hex_ = tmp[1]
-                    type_ = tmp[2]
-                    values = self.retreive(param)
-                    sub_dict["hex"] = hex_
-                    sub_dict["type"] = type_
-                    sub_dict.update(values)
-                    dict_.update({name: sub_dict})
-            return dict_
-        else:
-            for p in plist:
-                for param in v4l2_output:
-                    if re.search(p, param):
-                        sub_dict = {}
-                        tmp = param.split()
-                        name = tmp[0]
-                        hex_ = tmp[1]
-                        type_ = tmp[2]
-                        values = self.retreive(param)
-                        sub_dict["hex"] = hex_
-                        sub_dict["type"] = type_
-                        sub_dict.update(values)
-                        dict_.update({name: sub_dict})
-                        self.params = dict_
-            return dict_
-
-    @staticmethod
-    def retreive(target: str) -> dict:
-        value_list = {
-            "min": 0,
-            "max": 0,
-            "step": 0,
-            "value": 0,
-            "default": 0,
-            "flags": "init"
-        }
-        for key, value in value_list.items():
-            m = re.search(key, target)
-            if m:
-                start = m.start()
-                end = start
-                while end != len(target):
-                    if target[end] == " ":
-                        break
-                    end += 1
-                tmp = target[start:end]
-                tmp = tmp.split("=")
-                try:
-                    value_list[key] = int(tmp[1])
-                except:
-                    value_list[key] = str(tmp[1])
-            else:
-                value_list[key] = None
-        return value_list
+        self.params = self.get_current_params(self.device, ptype, list(plist))
+        return self.params
 
     def get_param_value(self, param: str, propID: int) -> dict:
         """Get properties of specified parameter.
@@ -311,40 +187,16 @@ class V4L2():
         Returns:
             dict: [description]
         """
-        # Make list of property. Each value set inital value ( = 0).
-        value_list = {
-            "max": 0,
-            "min": 0,
-            "step": 0,
-            "value": 0,
+        listing = self.list_controls(self.device)
+        info = listing.infos[param]
+        return {
+            "max": info.maximum,
+            "min": info.minimum,
+            "step": info.step,
+            "value": listing.values[param],
             "propID": propID
         }
 
-        cmd = ["v4l2-ctl", "-d", str(self.device), "-l"]
-        ret = subprocess.check_output(cmd)
-        v4l2_output = ret.decode().strip().split("\n")
-
-        index = 0
-        for v in v4l2_output:
-            if param in v:
-                break
-            index += 1
-
-        p_str = v4l2_output[index]
-        for key in value_list.keys():
-            m = re.search(key, p_str)
-            if m:
-                end = m.start()
-                while end != len(p_str):
-                    if not p_str[end] == " ":
-                        end += 1
-                    else:
-                        break
-                target = p_str[m.start():end]
-                v = target.split("=")
-                value_list[key] = int(v[1])
-        return value_list
-
     @staticmethod
     def change_param(device: int, param: str, value: int, func: Callable) -> bool:
         """Change a paramter value.
@@ -363,103 +215,67 @@ class V4L2():
             return True
 
 
+    @staticmethod
+    def change_params(device: int, values: dict, func: Callable) -> dict:
+        """Changes several parameter values with one v4l2-ctl command.
+
+        Args:
+            device (int): Device number
+            values (dict): Value of each parameter, in the order to be set.
+            func (Callable): Function writing an error message.
+
+        Returns:
+            dict: Error message of each parameter which is not set. v4l2-ctl does not
+                tell which value is rejected, so all parameters fail together.
+        """
+        if not values:
+            return {}
+        ctrls = ",".join("{}={}".format(param, value) for param, value in values.items())
+        cmd = ["v4l2-ctl", "-d", str(device), "--set-ctrl", ctrls]
+        ret = subprocess.call(cmd)
+        if ret:
+            func("Input parameters ({}) are invalid !".format(ctrls), color="red")
+            return {param: "v4l2-ctl exited with {}".format(ret) for param in values}
+        return {}
+
     @staticmethod
     def set_param_default(device: int, current_param: dict, func: Callable):
-        for param, val in current_param.items():
-            default = val["default"]
-            cmd = ["v4l2-ctl", "-d", str(device), "--set-ctrl", "{}={}".format(param, default)]
-            ret = subprocess.call(cmd)
-            if ret:
-                func("Input parameter is invalid !", color="red")
-                return -1
+        defaults = {param: val["default"] for param, val in current_param.items() if val["default"] is not None}
+        if V4L2.change_params(device, defaults, func):
+            return -1
+        for param, default in defaults.items():
             current_param[param]["slider_val"] = default
         return current_param
 
     @staticmethod
-    def get_supported_params(device: str) -> list:
-        cmd = ["v4l2-ctl", "-d", str(device), "-l"]
-        ret = subprocess.check_output(cmd)
-        v4l2_output = ret.decode()
-        v4l2_output = V4L2.extract_vidcap_params(v4l2_output).strip().split("\n")
-        lst = []
-        for param in v4l2_output:
-            tmp = param.split()
-            if len(tmp) > 3:
-                lst.append(tmp[0])
-        return lst
+    def list_controls(device: int) -> ControlListing:
+        """Lists the controls, their values and menu items with one `v4l2-ctl -L`.
+        """
+        cmd = ["v4l2-ctl", "-d", str(device), "-L"]
+        return parse_controls(subprocess.check_output(cmd).decode())
 
     @staticmethod
-    def extract_vidcap_params(string: str, pattern: str = "videocapture") -> str:
-        user = "User Controls"
-        codec = "Codec Controls"
-        camera = "Camera Controls"
-        jpeg = "JPEG Compression Controls"
-
-        # index
-        start, end = 0, 0
-
-        if pattern == "videocapture":
-            m1 = re.search(user, string)
-            if m1:
-                start = m1.end()
-            m2 = re.search(codec, string)
-            if m2:
-                end = m2.start()
-            else:
-                end = -1
-            s = string[start:end]
-            m3 = re.search(camera, string)
-            if m3:
-                start = m3.end()
-            else:
-                return s
-            m4 = re.search(jpeg, string)
-            if m4:
-                end = m4.start()
-            else:
-                return s
-            s += string[start:end]
-            return s
+    def get_supported_params(device: str) -> list:
+        return V4L2.list_controls(device).get_vidcap_names()
 
     @staticmethod
     def get_current_params(device: int, param_type: str, plist: list = None) -> dict:
-        cmd = ["v4l2-ctl", "-d", str(device), "-l"]
-        ret = subprocess.check_output(cmd)
-        v4l2_output = ret.decode()
-        v4l2_output = V4L2.extract_vidcap_params(v4l2_output).strip().split("\n")
-        dict_ = {}
-        if param_type == "full":
-            for param in v4l2_output:
-                sub_dict = {}
-                tmp = param.split()
-                if len(tmp) > 3:
-                    pass
-                    name = tmp[0]
-                    hex_ = tmp[1]
-                    type_ = tmp[2]
-                    values = V4L2.retreive(param)
-                    sub_dict["hex"] = hex_
-                    sub_dict["type"] = type_
-                    sub_dict.update(values)
-                    dict_.update({name: sub_dict})
-            return dict_
-        else:
-            for p in plist:
-                for param in v4l2_output:
-                    if re.search(p, param):
-                        sub_dict = {}
-                        tmp = param.split()
-                        name = tmp[0]
-                        hex_ = tmp[1]
-                        type_ = tmp[2]
-                        values = V4L2.retreive(param)
-                        sub_dict["hex"] = hex_
-                        sub_dict["type"] = type_
-                        sub_dict.update(values)
-                        dict_.update({name: sub_dict})
-                        #self.params = dict_
-            return dict_
+        """Gets the controls of the user and camera classes and their current values.
+
+        Args:
+            device (int): Device number
+            param_type (str): "full" for all controls, otherwise the controls in plist.
+            plist (list, optional): Control names. Defaults to None.
 
+        Returns:
+            dict: hex, type, min, max, step, value, default, flags and menu of each
+                control name.
+        """
+        listing = V4L2.list_controls(device)
+        names = listing.get_vidcap_names()
+        if param_type != "full":
+            names = [name for name in (plist or []) if name in names]
+        return listing.get_params(names)
 
 
 if __name__ == '__main__':
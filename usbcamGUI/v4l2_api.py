@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Definitions of the V4L2 kernel API used through ioctl.
+
+The structures and request codes follow linux/videodev2.h. Only the part of the
+API used by usbcamGUI is defined.
+"""
+import ctypes
+
+
+# ioctl request encoding (asm-generic/ioctl.h)
+_IOC_NRBITS = 8
+_IOC_TYPEBITS = 8
+_IOC_SIZEBITS = 14
+_IOC_NRSHIFT = 0
+_IOC_TYPESHIFT = _IOC_NRSHIFT + _IOC_NRBITS
+_IOC_SIZESHIFT = _IOC_TYPESHIFT + _IOC_TYPEBITS
+_IOC_DIRSHIFT = _IOC_SIZESHIFT + _IOC_SIZEBITS
+_IOC_NONE = 0
+_IOC_WRITE = 1
+_IOC_READ = 2
+
+
+def _IOC(dir_: int, type_: str, nr: int, size: int) -> int:
+    return (
+        (dir_ << _IOC_DIRSHIFT)
+        | (ord(type_) << _IOC_TYPESHIFT)
+        | (nr << _IOC_NRSHIFT)
+        | (size << _IOC_SIZESHIFT)
+    )
+
+
+def _IOR(type_: str, nr: int, struct) -> int:
+    return _IOC(_IOC_READ, type_, nr, ctypes.sizeof(struct))
+
+
+def _IOW(type_: str, nr: int, struct) -> int:
+    return _IOC(_IOC_WRITE, type_, nr, ctypes.sizeof(struct))
+
+
+def _IOWR(type_: str, nr: int, struct) -> int:
+    return _IOC(_IOC_READ | _IOC_WRITE, type_, nr, ctypes.sizeof(struct))
+
+
+def fourcc_code(fourcc: str) -> int:
+    """Converts a fourcc string into the V4L2 pixel format code.
+
+    Args:
+        fourcc (str): Fourcc such as YUYV, MJPG, etc.
+
+    Returns:
+        int: Pixel format code.
+    """
+    fourcc = fourcc.ljust(4)
+    return ord(fourcc[0]) | (ord(fourcc[1]) << 8) | (ord(fourcc[2]) << 16) | (ord(fourcc[3]) << 24)
+
+
+def fourcc_string(code: int) -> str:
+    """Converts the V4L2 pixel format code into a fourcc string.
+
+    Args:
+        code (int): Pixel format code.
+
+    Returns:
+        str: Fourcc such as YUYV, MJPG, etc.
+    """
+    return "".join([chr((code >> 8 * i) & 0xFF) for i in range(4)]).strip()
+
+
+# enum v4l2_buf_type
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+
+# enum v4l2_memory
+V4L2_MEMORY_MMAP = 1
+
+# enum v4l2_field
+V4L2_FIELD_ANY = 0
+V4L2_FIELD_NONE = 1
+
+# capabilities
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_META_CAPTURE = 0x00800000
+V4L2_CAP_STREAMING = 0x04000000
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+
+# buffer flags
+V4L2_BUF_FLAG_MAPPED = 0x00000001
+V4L2_BUF_FLAG_QUEUED = 0x00000002
+V4L2_BUF_FLAG_DONE = 0x00000004
+V4L2_BUF_FLAG_ERROR = 0x00000040
+
+# streaming parameter capability
+V4L2_CAP_TIMEPERFRAME = 0x1000
+
+# enum v4l2_ctrl_type
+V4L2_CTRL_TYPE_INTEGER = 1
+V4L2_CTRL_TYPE_BOOLEAN = 2
+V4L2_CTRL_TYPE_MENU = 3
+V4L2_CTRL_TYPE_BUTTON = 4
+V4L2_CTRL_TYPE_INTEGER64 = 5
+V4L2_CTRL_TYPE_CTRL_CLASS = 6
+V4L2_CTRL_TYPE_STRING = 7
+V4L2_CTRL_TYPE_BITMASK = 8
+V4L2_CTRL_TYPE_INTEGER_MENU = 9
+
+# control flags
+V4L2_CTRL_FLAG_DISABLED = 0x0001
+V4L2_CTRL_FLAG_GRABBED = 0x0002
+V4L2_CTRL_FLAG_READ_ONLY = 0x0004
+V4L2_CTRL_FLAG_UPDATE = 0x0008
+V4L2_CTRL_FLAG_INACTIVE = 0x0010
+V4L2_CTRL_FLAG_SLIDER = 0x0020
+V4L2_CTRL_FLAG_WRITE_ONLY = 0x0040
+V4L2_CTRL_FLAG_VOLATILE = 0x0080
+V4L2_CTRL_FLAG_HAS_PAYLOAD = 0x0100
+V4L2_CTRL_FLAG_EXECUTE_ON_WRITE = 0x0200
+V4L2_CTRL_FLAG_MODIFY_LAYOUT = 0x0400
+V4L2_CTRL_FLAG_NEXT_CTRL = 0x80000000
+V4L2_CTRL_FLAG_NEXT_COMPOUND = 0x40000000
+
+# control classes
+V4L2_CTRL_CLASS_USER = 0x00980000
+V4L2_CTRL_CLASS_CAMERA = 0x009a0000
+V4L2_CTRL_WHICH_CUR_VAL = 0
+V4L2_CTRL_WHICH_DEF_VAL = 0x0f000000
+
+
+def ctrl_id2class(id_: int) -> int:
+    return id_ & 0x0fff0000
+
+
+# control events
+V4L2_EVENT_CTRL = 3
+V4L2_EVENT_CTRL_CH_VALUE = 0x0001
+V4L2_EVENT_CTRL_CH_FLAGS = 0x0002
+V4L2_EVENT_CTRL_CH_RANGE = 0x0004
+V4L2_EVENT_SUB_FL_SEND_INITIAL = 0x0001
+V4L2_EVENT_SUB_FL_ALLOW_FEEDBACK = 0x0002
+
+
+# enum v4l2_frmsizetypes, v4l2_frmivaltypes
+V4L2_FRMSIZE_TYPE_DISCRETE = 1
+V4L2_FRMSIZE_TYPE_CONTINUOUS = 2
+V4L2_FRMSIZE_TYPE_STEPWISE = 3
+V4L2_FRMIVAL_TYPE_DISCRETE = 1
+V4L2_FRMIVAL_TYPE_CONTINUOUS = 2
+V4L2_FRMIVAL_TYPE_STEPWISE = 3
+
+
+class v4l2_capability(ctypes.Structure):
+    _fields_ = [
+        ("driver", ctypes.c_char * 16),
+        ("card", ctypes.c_char * 32),
+        ("bus_info", ctypes.c_char * 32),
+        ("version", ctypes.c_uint32),
+        ("capabilities", ctypes.c_uint32),
+        ("device_caps", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 3),
+    ]
+
+
+class v4l2_pix_format(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+        ("pixelformat", ctypes.c_uint32),
+        ("field", ctypes.c_uint32),
+        ("bytesperline", ctypes.c_uint32),
+        ("sizeimage", ctypes.c_uint32),
+        ("colorspace", ctypes.c_uint32),
+        ("priv", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("ycbcr_enc", ctypes.c_uint32),
+        ("quantization", ctypes.c_uint32),
+        ("xfer_func", ctypes.c_uint32),
+    ]
+
+
+class _v4l2_format_union(ctypes.Union):
+    # v4l2_window contains pointers, which aligns the union to the pointer size.
+    _fields_ = [
+        ("pix", v4l2_pix_format),
+        ("raw_data", ctypes.c_uint8 * 200),
+        ("_align", ctypes.c_void_p),
+    ]
+
+
+class v4l2_format(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("fmt", _v4l2_format_union),
+    ]
+
+
+class v4l2_requestbuffers(ctypes.Structure):
+    _fields_ = [
+        ("count", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("memory", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 2),
+    ]
+
+
+class timeval(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_long),
+        ("tv_usec", ctypes.c_long),
+    ]
+
+
+class v4l2_timecode(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("frames", ctypes.c_uint8),
+        ("seconds", ctypes.c_uint8),
+        ("minutes", ctypes.c_uint8),
+        ("hours", ctypes.c_uint8),
+        ("userbits", ctypes.c_uint8 * 4),
+    ]
+
+
+class _v4l2_buffer_m(ctypes.Union):
+    _fields_ = [
+        ("offset", ctypes.c_uint32),
+        ("userptr", ctypes.c_ulong),
+        ("planes", ctypes.c_void_p),
+        ("fd", ctypes.c_int32),
+    ]
+
+
+class v4l2_buffer(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("bytesused", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("field", ctypes.c_uint32),
+        ("timestamp", timeval),
+        ("timecode", v4l2_timecode),
+        ("sequence", ctypes.c_uint32),
+        ("memory", ctypes.c_uint32),
+        ("m", _v4l2_buffer_m),
+        ("length", ctypes.c_uint32),
+        ("reserved2", ctypes.c_uint32),
+        ("request_fd", ctypes.c_int32),
+    ]
+
+
+class v4l2_fract(ctypes.Structure):
+    _fields_ = [
+        ("numerator", ctypes.c_uint32),
+        ("denominator", ctypes.c_uint32),
+    ]
+
+
+class v4l2_captureparm(ctypes.Structure):
+    _fields_ = [
+        ("capability", ctypes.c_uint32),
+        ("capturemode", ctypes.c_uint32),
+        ("timeperframe", v4l2_fract),
+        ("extendedmode", ctypes.c_uint32),
+        ("readbuffers", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 4),
+    ]
+
+
+class _v4l2_streamparm_union(ctypes.Union):
+    _fields_ = [
+        ("capture", v4l2_captureparm),
+        ("raw_data", ctypes.c_uint8 * 200),
+    ]
+
+
+class v4l2_streamparm(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("parm", _v4l2_streamparm_union),
+    ]
+
+
+class v4l2_queryctrl(ctypes.Structure):
+    _fields_ = [
+        ("id", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("name", ctypes.c_char * 32),
+        ("minimum", ctypes.c_int32),
+        ("maximum", ctypes.c_int32),
+        ("step", ctypes.c_int32),
+        ("default_value", ctypes.c_int32),
+        ("flags", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 2),
+    ]
+
+
+class v4l2_query_ext_ctrl(ctypes.Structure):
+    _fields_ = [
+        ("id", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("name", ctypes.c_char * 32),
+        ("minimum", ctypes.c_int64),
+        ("maximum", ctypes.c_int64),
+        ("step", ctypes.c_uint64),
+        ("default_value", ctypes.c_int64),
+        ("flags", ctypes.c_uint32),
+        ("elem_size", ctypes.c_uint32),
+        ("elems", ctypes.c_uint32),
+        ("nr_of_dims", ctypes.c_uint32),
+        ("dims", ctypes.c_uint32 * 4),
+        ("reserved", ctypes.c_uint32 * 32),
+    ]
+
+
+class _v4l2_querymenu_union(ctypes.Union):
+    _pack_ = 1
+    _fields_ = [
+        ("name", ctypes.c_char * 32),
+        ("value", ctypes.c_int64),
+    ]
+
+
+class v4l2_querymenu(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [
+        ("id", ctypes.c_uint32),
+        ("index", ctypes.c_uint32),
+        ("menu", _v4l2_querymenu_union),
+        ("reserved", ctypes.c_uint32),
+    ]
+
+
+class v4l2_control(ctypes.Structure):
+    _fields_ = [
+        ("id", ctypes.c_uint32),
+        ("value", ctypes.c_int32),
+    ]
+
+
+class _v4l2_ext_control_union(ctypes.Union):
+    _pack_ = 1
+    _fields_ = [
+        ("value", ctypes.c_int32),
+        ("value64", ctypes.c_int64),
+        ("string", ctypes.c_char_p),
+        ("ptr", ctypes.c_void_p),
+    ]
+
+
+class v4l2_ext_control(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [
+        ("id", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("reserved2", ctypes.c_uint32 * 1),
+        ("u", _v4l2_ext_control_union),
+    ]
+
+
+class v4l2_ext_controls(ctypes.Structure):
+    _fields_ = [
+        ("which", ctypes.c_uint32),
+        ("count", ctypes.c_uint32),
+        ("error_idx", ctypes.c_uint32),
+        ("request_fd", ctypes.c_int32),
+        ("reserved", ctypes.c_uint32 * 1),
+        ("controls", ctypes.POINTER(v4l2_ext_control)),
+    ]
+
+
+class timespec(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_long),
+        ("tv_nsec", ctypes.c_long),
+    ]
+
+
+class v4l2_event_subscription(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("id", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 5),
+    ]
+
+
+class _v4l2_event_ctrl_union(ctypes.Union):
+    _fields_ = [
+        ("value", ctypes.c_int32),
+        ("value64", ctypes.c_int64),
+    ]
+
+
+class v4l2_event_ctrl(ctypes.Structure):
+    _fields_ = [
+        ("changes", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("u", _v4l2_event_ctrl_union),
+        ("flags", ctypes.c_uint32),
+        ("minimum", ctypes.c_int32),
+        ("maximum", ctypes.c_int32),
+        ("step", ctypes.c_int32),
+        ("default_value", ctypes.c_int32),
+    ]
+
+
+class _v4l2_event_union(ctypes.Union):
+    _fields_ = [
+        ("ctrl", v4l2_event_ctrl),
+        ("data", ctypes.c_uint8 * 64),
+    ]
+
+
+class v4l2_event(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("u", _v4l2_event_union),
+        ("pending", ctypes.c_uint32),
+        ("sequence", ctypes.c_uint32),
+        ("timestamp", timespec),
+        ("id", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 8),
+    ]
+
+
+class v4l2_fmtdesc(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("description", ctypes.c_char * 32),
+        ("pixelformat", ctypes.c_uint32),
+        ("mbus_code", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 3),
+    ]
+
+
+class v4l2_frmsize_discrete(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+    ]
+
+
+class v4l2_frmsize_stepwise(ctypes.Structure):
+    _fields_ = [
+        ("min_width", ctypes.c_uint32),
+        ("max_width", ctypes.c_uint32),
+        ("step_width", ctypes.c_uint32),
+        ("min_height", ctypes.c_uint32),
+        ("max_height", ctypes.c_uint32),
+        ("step_height", ctypes.c_uint32),
+    ]
+
+
+class _v4l2_frmsize_union(ctypes.Union):
+    _fields_ = [
+        ("discrete", v4l2_frmsize_discrete),
+        ("stepwise", v4l2_frmsize_stepwise),
+    ]
+
+
+class v4l2_frmsizeenum(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("pixel_format", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("size", _v4l2_frmsize_union),
+        ("reserved", ctypes.c_uint32 * 2),
+    ]
+
+
+class v4l2_frmival_stepwise(ctypes.Structure):
+    _fields_ = [
+        ("min", v4l2_fract),
+        ("max", v4l2_fract),
+        ("step", v4l2_fract),
+    ]
+
+
+class _v4l2_frmival_union(ctypes.Union):
+    _fields_ = [
+        ("discrete", v4l2_fract),
+        ("stepwise", v4l2_frmival_stepwise),
+    ]
+
+
+class v4l2_frmivalenum(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("pixel_format", ctypes.c_uint32),
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("interval", _v4l2_frmival_union),
+        ("reserved", ctypes.c_uint32 * 2),
+    ]
+
+
+VIDIOC_QUERYCAP = _IOR("V", 0, v4l2_capability)
+VIDIOC_G_FMT = _IOWR("V", 4, v4l2_format)
+VIDIOC_S_FMT = _IOWR("V", 5, v4l2_format)
+VIDIOC_REQBUFS = _IOWR("V", 8, v4l2_requestbuffers)
+VIDIOC_QUERYBUF = _IOWR("V", 9, v4l2_buffer)
+VIDIOC_QBUF = _IOWR("V", 15, v4l2_buffer)
+VIDIOC_DQBUF = _IOWR("V", 17, v4l2_buffer)
+VIDIOC_STREAMON = _IOW("V", 18, ctypes.c_int)
+VIDIOC_STREAMOFF = _IOW("V", 19, ctypes.c_int)
+VIDIOC_G_PARM = _IOWR("V", 21, v4l2_streamparm)
+VIDIOC_S_PARM = _IOWR("V", 22, v4l2_streamparm)
+VIDIOC_ENUM_FMT = _IOWR("V", 2, v4l2_fmtdesc)
+VIDIOC_G_CTRL = _IOWR("V", 27, v4l2_control)
+VIDIOC_S_CTRL = _IOWR("V", 28, v4l2_control)
+VIDIOC_QUERYCTRL = _IOWR("V", 36, v4l2_queryctrl)
+VIDIOC_QUERYMENU = _IOWR("V", 37, v4l2_querymenu)
+VIDIOC_G_EXT_CTRLS = _IOWR("V", 71, v4l2_ext_controls)
+VIDIOC_S_EXT_CTRLS = _IOWR("V", 72, v4l2_ext_controls)
+VIDIOC_ENUM_FRAMESIZES = _IOWR("V", 74, v4l2_frmsizeenum)
+VIDIOC_ENUM_FRAMEINTERVALS = _IOWR("V", 75, v4l2_frmivalenum)
+VIDIOC_DQEVENT = _IOR("V", 89, v4l2_event)
+VIDIOC_SUBSCRIBE_EVENT = _IOW("V", 90, v4l2_event_subscription)
+VIDIOC_UNSUBSCRIBE_EVENT = _IOW("V", 91, v4l2_event_subscription)
+VIDIOC_QUERY_EXT_CTRL = _IOWR("V", 103, v4l2_query_ext_ctrl)
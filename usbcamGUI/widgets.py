@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Widgets for camera controls.
+"""
+from PySide2.QtWidgets import QComboBox, QSlider, QLabel, QScrollArea, QWidget, QGridLayout, QFrame
+from PySide2.QtCore import Qt, Signal
+
+
+class MenuBox(QComboBox):
+    """Combo box of a menu control.
+
+    The items are the labels of the menu, and the value is the menu index, so that
+    the box is used like the QSlider of other controls: valueChanged, value() and
+    setValue().
+
+    Args:
+        menu (dict): Label (or value for an integer menu) of each menu index.
+    """
+
+    valueChanged = Signal(int)
+
+    def __init__(self, menu: dict, parent=None):
+        super().__init__(parent)
+        for index, label in menu.items():
+            self.addItem(str(label), index)
+        self.currentIndexChanged.connect(self.emit_value)
+
+    def emit_value(self, position: int):
+        if position >= 0:
+            self.valueChanged.emit(self.itemData(position))
+
+    def value(self) -> int:
+        return self.currentData()
+
+    def setValue(self, value: int):
+        """Selects the item of a menu index. Unknown indexes are ignored.
+        """
+        position = self.findData(int(value))
+        if position >= 0:
+            self.setCurrentIndex(position)
+
+
+class ControlRow():
+    """Widgets of one control: its name, its slider (or menu box) and its value.
+
+    The row only shows a control of a ControlState. The value chosen by the user
+    is passed to changed (and released when the slider is released), which
+    writes it to the camera.
+
+    Args:
+        spec (ControlSpec): The control
+        value (int): The current value. None if the control has no value.
+        changed (Callable): Called with the value chosen by the user
+        released (Callable): Called when the slider is released
+    """
+
+    def __init__(self, spec, value: int, changed, released):
+        self.name = spec.name
+        if spec.menu:
+            self.slider = MenuBox(spec.menu)
+            if value is not None:
+                self.slider.setValue(value)
+            self.slider.valueChanged.connect(changed)
+        else:
+            self.slider = QSlider(Qt.Horizontal)
+            if spec.maximum:
+                self.slider.setRange(spec.minimum, spec.maximum)
+            else:
+                self.slider.setRange(0, 1)
+            if value is not None:
+                self.slider.setValue(value)
+            self.slider.setTickPosition(QSlider.TicksBelow)
+            self.slider.valueChanged.connect(changed)
+            self.slider.sliderReleased.connect(released)
+            if spec.step:
+                if spec.maximum < 5:
+                    self.slider.setTickInterval(spec.step)
+                else:
+                    self.slider.setTickInterval(10)
+
+        self.label = QLabel(spec.name)
+        self.value_label = QLabel(str(value))
+        self.label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.value_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+
+    @property
+    def is_menu(self) -> bool:
+        return isinstance(self.slider, MenuBox)
+
+    def is_dragged(self) -> bool:
+        return not self.is_menu and self.slider.isSliderDown()
+
+    def show_value(self, value: int):
+        """Moves the slider without emitting its signals, so that the value is not written again.
+        """
+        self.slider.blockSignals(True)
+        self.slider.setValue(int(value))
+        self.slider.blockSignals(False)
+        self.value_label.setText(str(value))
+
+    def set_enabled(self, enabled: bool):
+        self.slider.setEnabled(enabled)
+
+    def widgets(self) -> tuple:
+        return self.label, self.slider, self.value_label
+
+
+class ControlPanel(QScrollArea):
+    """Scrollable grid of the ControlRows of one camera.
+
+    The rows are kept while the panel exists: changing the shown controls only
+    creates the rows of added controls and deletes the rows of removed ones, and
+    the other rows are moved in the grid. A camera with lazy_threshold controls
+    or more gets its rows created as they are scrolled into view, a few at a time.
+
+    Args:
+        create_row (Callable): Creates the ControlRow of a control name
+        parent (QWidget, optional): Parent widget. Defaults to None.
+    """
+
+    lazy_threshold = 30
+    batch_size = 5
+
+    def __init__(self, create_row, parent=None):
+        super().__init__(parent)
+        self.create_row = create_row
+        self.rows = {}
+        self.names = []
+        self.shown = 0
+        self.content = QWidget()
+        self.grid = QGridLayout(self.content)
+        self.grid.setSpacing(15)
+        self.grid.setContentsMargins(20, 20, 20, 20)
+        self.grid.setAlignment(Qt.AlignTop)
+        self.setWidget(self.content)
+        self.setWidgetResizable(True)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().valueChanged.connect(self.fill)
+
+    @property
+    def is_lazy(self) -> bool:
+        return len(self.names) >= self.lazy_threshold
+
+    def set_names(self, names: list) -> tuple:
+        """Shows the rows of the controls in the order of names.
+
+        Args:
+            names (list): Control names
+
+        Returns:
+            tuple: (kept, added, removed) number of rows. Rows not yet scrolled
+                into view are not counted as added.
+        """
+        removed = [name for name in self.rows if name not in names]
+        for name in removed:
+            for widget in self.rows.pop(name).widgets():
+                self.grid.removeWidget(widget)
+                widget.deleteLater()
+        kept = len(self.rows)
+        # The rows beyond the new order are placed again when they are shown.
+        for row in self.rows.values():
+            for widget in row.widgets():
+                self.grid.removeWidget(widget)
+                widget.hide()
+        self.names = list(names)
+        self.shown = 0
+        self.show_rows(self.batch_size if self.is_lazy else len(self.names))
+        self.fill()
+        return kept, len(self.rows) - kept, len(removed)
+
+    def show_rows(self, count: int):
+        """Places the first count rows in the grid, creating the missing ones.
+        """
+        count = min(count, len(self.names))
+        for position in range(self.shown, count):
+            name = self.names[position]
+            row = self.rows.get(name)
+            if row is None:
+                row = self.rows[name] = self.create_row(name)
+            for col, widget in enumerate(row.widgets()):
+                self.grid.addWidget(widget, position, col)
+                widget.show()
+        self.shown = max(self.shown, count)
+
+    def fill(self, *args):
+        """Creates rows until they fill the visible area and the next page below it.
+        """
+        while self.shown < len(self.names):
+            bottom = self.verticalScrollBar().value() + 2 * self.viewport().height()
+            if self.content.sizeHint().height() >= bottom:
+                break
+            self.show_rows(self.shown + self.batch_size)
+
+    def get(self, name: str) -> ControlRow:
+        """Gets the row of a control. None if the row has not been created.
+        """
+        return self.rows.get(name)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.fill()